@@ -0,0 +1,425 @@
+# run_benchmarks.py
+# Reproducible benchmark suite for the brain.
+#
+# Everything here runs offline and deterministically (seeded streams, a local
+# stub in place of the Hugging Face endpoint), so two runs on the same machine
+# are comparable:
+#
+#   python benchmarks/run_benchmarks.py --out before.json
+#   ... change something ...
+#   python benchmarks/run_benchmarks.py --out after.json --compare before.json
+#
+# Benchmarks:
+#   ticks    - Brain.main_processing_loop driven by synthetic vision/audio
+#              (ticks/sec, per-stage latency percentiles)
+#   runtime  - BrainRuntime fed events at a fixed rate (reflex latency percentiles)
+#   magi     - run_magi_system against the local stub (decisions/sec)
+#   recall   - Hippocampus.recall at several memory sizes (queries/sec)
+#   vision   - VisionSensor frame pipeline on synthetic frames (frames/sec,
+#              per-frame latency, reflexes raised by a sudden object)
+#   audio    - AudioSensor pipeline on synthetic audio (per-chunk latency,
+#              realtime factor, speech segments and startles found)
+#   policy   - DecisionMaker goal choice one thought at a time vs batched
+#              (goals/sec), and offline policy training (steps/sec, reward)
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from skeleton_loader import BRAIN_DIR, load_skeleton
+import tracing
+
+MAGI_DIR = os.path.join(BRAIN_DIR, "the_forebrain", "Prefrontal Cortex", "the_magi_system")
+
+
+class SyntheticStreams:
+    """Deterministic vision/audio readings with a configurable reflex/stimulus mix.
+
+    reflex_ratio:   share of readings that should trigger a reflex
+    stimulus_ratio: share of readings that should reach the forebrain
+    distinct:       how many different stimuli to cycle through (repeats are
+                    what the attention dedup and the caches feed on)
+    """
+    def __init__(self, seed=0, reflex_ratio=0.05, stimulus_ratio=0.2, distinct=50):
+        self.reflex_ratio = reflex_ratio
+        self.stimulus_ratio = stimulus_ratio
+        self.distinct = distinct
+        self._vision = random.Random(seed)
+        self._audio = random.Random(seed + 1)
+
+    def vision(self):
+        roll = self._vision.random()
+        if roll < self.reflex_ratio:
+            return "fast_moving_object"
+        if roll < self.reflex_ratio + self.stimulus_ratio:
+            return f"object_{self._vision.randrange(self.distinct)}"
+        return None
+
+    def audio(self):
+        roll = self._audio.random()
+        if roll < self.reflex_ratio:
+            return "loud_bang"
+        if roll < self.reflex_ratio + self.stimulus_ratio:
+            return f"hey gemini, question {self._audio.randrange(self.distinct)}"
+        return "background noise" if roll < 0.5 else None
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the components' trace output while a benchmark runs."""
+    tracer = tracing.get_tracer()
+    level, tracer.level = tracer.level, tracing.ERROR
+    try:
+        yield
+    finally:
+        tracer.level = level
+
+
+def _build_brain(skeleton, streams, processes=0):
+    from telemetry import Telemetry
+    brain = skeleton["brain"].Brain(telemetry=Telemetry(), processes=processes)
+    brain.components.wait()  # measure steady state, not the background warm-up
+    brain.vision.scan = streams.vision
+    brain.audio.listen = streams.audio
+    brain.telemetry.instrument(brain.vision, "scan", "VisionSensor.scan")
+    brain.telemetry.instrument(brain.audio, "listen", "AudioSensor.listen")
+    return brain
+
+
+def _spans(telemetry, *names):
+    snapshot = telemetry.snapshot()
+    return {name: snapshot[name] for name in names if name in snapshot}
+
+
+# --- 1. BENCHMARKS ---
+
+def bench_ticks(skeleton, ticks=20_000, seed=0, reflex_ratio=0.05, stimulus_ratio=0.2):
+    streams = SyntheticStreams(seed, reflex_ratio, stimulus_ratio)
+    with quiet():
+        brain = _build_brain(skeleton, streams)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            brain.main_processing_loop()
+        elapsed = time.perf_counter() - start
+        brain.shutdown()
+    return {
+        "ticks": ticks,
+        "ticks_per_sec": ticks / elapsed,
+        "spans": _spans(brain.telemetry, "tick", "stage.reflex", "stage.think", "stage.act", "AttentionGate.filter"),
+    }
+
+
+def bench_runtime(skeleton, rate_hz=500.0, duration=3.0, seed=0, reflex_ratio=0.05, stimulus_ratio=0.2,
+                  processes=0):
+    from brainstem import BrainRuntime
+    streams = SyntheticStreams(seed, reflex_ratio, stimulus_ratio)
+
+    async def run():
+        runtime = BrainRuntime(brain)
+        task = asyncio.create_task(runtime.run())
+        await asyncio.sleep(0.05)
+
+        def feed():
+            # Fixed schedule, so the offered load doesn't drift with feeder jitter
+            interval = 1.0 / rate_hz
+            next_at = time.perf_counter()
+            for _ in range(int(rate_hz * duration)):
+                runtime.push("vision", streams.vision())
+                runtime.push("audio", streams.audio())
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.perf_counter()))
+
+        await asyncio.to_thread(feed)
+        runtime.request_shutdown()
+        await task
+
+    with quiet():
+        brain = _build_brain(skeleton, streams, processes)
+        asyncio.run(run())
+    return {
+        "events": 2 * int(rate_hz * duration),
+        "rate_hz": rate_hz,
+        "processes": processes,
+        "spans": _spans(brain.telemetry, "reflex.latency", "stage.filter", "stage.think", "stage.act"),
+    }
+
+
+def bench_magi(decisions=200, concurrency=8, latency=0.02, tail_rate=0.0, tail_latency=0.5, hedge=False):
+    if MAGI_DIR not in sys.path:
+        sys.path.insert(0, MAGI_DIR)
+    from hf_stub_server import StubInferenceServer
+    from telemetry import LatencyHistogram
+
+    server = StubInferenceServer(latency=latency, tail_rate=tail_rate, tail_latency=tail_latency).start()
+    # With --hedge, a second stub serves as a replica of every model to hedge onto
+    replica = StubInferenceServer(latency=latency, tail_rate=tail_rate, tail_latency=tail_latency,
+                                  seed=1).start() if hedge else None
+    histogram = LatencyHistogram()
+    with quiet():
+        import the_magi_system as magi
+        client = magi.configure_client(base_url=server.url, max_concurrency=3 * concurrency)
+        router = None
+        if hedge:
+            magi.MODEL_REPLICAS = {model: [f"{replica.url}/{model}"] for model in magi.agent_models().values()}
+            router = magi.configure_router()
+
+        async def run():
+            slots = asyncio.Semaphore(concurrency)
+
+            async def one(i):
+                async with slots:
+                    start = time.perf_counter_ns()
+                    await magi.run_magi_system(f"Synthetic question {i}?", client=client, cache=None)
+                    histogram.record(time.perf_counter_ns() - start)
+
+            await asyncio.gather(*(one(i) for i in range(decisions)))
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        magi.configure_router(enabled=False)
+        magi.MODEL_REPLICAS = {}
+    server.stop()
+    if replica is not None:
+        replica.stop()
+    results = {
+        "decisions": decisions,
+        "stub_latency_s": latency,
+        "decisions_per_sec": decisions / elapsed,
+        "latency": histogram.summary(),
+        "http_connections": server.connections,
+        "http_requests": server.requests + (replica.requests if replica is not None else 0),
+    }
+    if router is not None:
+        results["router"] = {k: v for k, v in router.stats.items() if k != "endpoints"}
+    return results
+
+
+def bench_recall(skeleton, sizes=(1_000, 10_000, 100_000), dim=128, queries=1_000, k=5, seed=0):
+    rng = np.random.default_rng(seed)
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as path, quiet():
+            memory = skeleton["forebrain"].Hippocampus(path)
+            vectors = rng.standard_normal((size, dim)).astype(np.float32)
+            for i, vector in enumerate(vectors):
+                memory.store(f"memory {i}", vector)
+            index = memory._view[0]
+            if index._training is not None and index.background_training:
+                index._training.join()
+
+            probes = rng.standard_normal((queries, dim)).astype(np.float32)
+            start = time.perf_counter()
+            for probe in probes:
+                memory.recall(probe, k)
+            elapsed = time.perf_counter() - start
+            memory.save_to_disk()
+        results[str(size)] = {"qps": queries / elapsed, "approximate": index.is_approximate}
+    return results
+
+
+def synthetic_frames(count=300, shape=(480, 640, 3), seed=0):
+    """A noisy static scene with a square drifting across it and, every 50th frame, a sudden object."""
+    rng = np.random.default_rng(seed)
+    scene = rng.integers(0, 200, shape, dtype=np.uint8)
+    frames = np.empty((count,) + shape, dtype=np.uint8)
+    for i in range(count):
+        frame = frames[i]
+        np.add(scene, rng.integers(0, 4, shape, dtype=np.uint8), out=frame)
+        x = (i * 3) % (shape[1] - 40)
+        frame[100:140, x:x + 40] = 255
+        if i % 50 == 49:
+            frame[300:400, 400:500] = 0
+    return frames
+
+
+def bench_vision(skeleton, frames=300, seed=0):
+    from the_midbrain.superior_colliculus.frame_pipeline import ArraySource
+    with quiet():
+        sensor = skeleton["midbrain"].VisionSensor(source=ArraySource(synthetic_frames(frames, seed=seed)))
+        while not sensor.pipeline.exhausted:
+            sensor.scan()
+        sensor.close()
+    return sensor.stats
+
+
+def synthetic_audio(seconds=60.0, sample_rate=16_000, seed=0):
+    """Mostly near-silence, with a voiced tone burst every 5 s and a bang every 10 s."""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0.0, 0.001, int(seconds * sample_rate)).astype(np.float32)
+    t = np.arange(int(0.8 * sample_rate)) / sample_rate
+    voice = (0.2 * np.sin(2 * np.pi * 180 * t) * (1 + 0.5 * np.sin(2 * np.pi * 4 * t))).astype(np.float32)
+    for start in np.arange(1.0, seconds - 1.0, 5.0):
+        i = int(start * sample_rate)
+        audio[i:i + len(voice)] += voice
+    for start in np.arange(3.0, seconds - 1.0, 10.0):
+        i = int(start * sample_rate)
+        audio[i:i + sample_rate // 20] += rng.normal(0.0, 0.8, sample_rate // 20).clip(-1, 1)
+    return audio
+
+
+def bench_audio(skeleton, seconds=60.0, seed=0):
+    from the_midbrain.inferior_colliculus.audio_pipeline import ArraySource
+    with quiet():
+        sensor = skeleton["midbrain"].AudioSensor(source=ArraySource(synthetic_audio(seconds, seed=seed)))
+        while not sensor.pipeline.exhausted:
+            sensor.listen()
+        sensor.close()
+    return sensor.stats
+
+
+def bench_policy(skeleton, thoughts=4_096, batch=256, envs=256, batches=100, seed=0):
+    from the_forebrain.basal_ganglia.goal_policy import SITUATIONS, SituationEnv, as_thought, evaluate, train
+    rng = random.Random(seed)
+    # Distinct texts, so the embedder's cache doesn't hide the embedding cost
+    texts = [f"{as_thought(rng.choice(SITUATIONS)[0])} #{i}" for i in range(thoughts)]
+    with quiet():
+        decision_maker = skeleton["forebrain"].DecisionMaker()
+        decision_maker.choose_goals(["warm up"])
+
+        start = time.perf_counter()
+        for text in texts[:thoughts // 2]:
+            decision_maker.choose_goal(text)
+        single = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(thoughts // 2, thoughts, batch):
+            decision_maker.choose_goals(texts[i:i + batch])
+        batched = time.perf_counter() - start
+
+        policy = decision_maker.policy
+        env = SituationEnv(policy, envs=envs, seed=seed)
+        before = evaluate(policy, env)
+        start = time.perf_counter()
+        train(policy, env, batches, seed=seed, log_every=0)
+        training = time.perf_counter() - start
+        after = evaluate(policy, env)
+        # Trained on noisy embeddings of the Cortex's thoughts; scored on the thoughts themselves
+        labels = [text for text, _ in SITUATIONS]
+        best = [policy.goals[i] for i in env.best]
+        chosen = decision_maker.choose_goals([as_thought(text) for text in labels])
+    return {
+        "single_goals_per_sec": (thoughts // 2) / single,
+        "batched_goals_per_sec": (thoughts - thoughts // 2) / batched,
+        "batch": batch,
+        "training": {
+            "steps": batches * envs * env.horizon,
+            "steps_per_sec": batches * envs * env.horizon / training,
+            "seconds": training,
+            "greedy_reward_before": before,
+            "greedy_reward_after": after,
+            "thought_accuracy": sum(c == b for c, b in zip(chosen, best)) / len(labels),
+        },
+    }
+
+
+# --- 2. RESULTS ---
+
+def _flatten(tree, prefix=""):
+    flat = {}
+    for key, value in tree.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline):
+    """Prints every numeric metric next to the baseline's, with the ratio."""
+    now, before = _flatten(current["results"]), _flatten(baseline["results"])
+    print(f"{'metric':<60} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name in sorted(now.keys() & before.keys()):
+        ratio = now[name] / before[name] if before[name] else float("nan")
+        print(f"{name:<60} {before[name]:>12.4g} {now[name]:>12.4g} {ratio:>7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Brain benchmark suite")
+    parser.add_argument("--only", nargs="*", choices=["ticks", "runtime", "magi", "recall", "vision", "audio", "policy"],
+                        help="run just these benchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=20_000)
+    parser.add_argument("--reflex-ratio", type=float, default=0.05)
+    parser.add_argument("--stimulus-ratio", type=float, default=0.2)
+    parser.add_argument("--rate", type=float, default=500.0, help="runtime events/sec per sensor")
+    parser.add_argument("--duration", type=float, default=3.0, help="runtime benchmark seconds")
+    parser.add_argument("--processes", type=int, default=0, help="runtime forebrain worker processes (0 = in-process)")
+    parser.add_argument("--magi-decisions", type=int, default=200)
+    parser.add_argument("--magi-concurrency", type=int, default=8)
+    parser.add_argument("--stub-latency", type=float, default=0.02, help="seconds per stub inference call")
+    parser.add_argument("--stub-tail-rate", type=float, default=0.0, help="fraction of stub calls that are slow")
+    parser.add_argument("--stub-tail-latency", type=float, default=0.5, help="seconds per slow stub call")
+    parser.add_argument("--hedge", action="store_true", help="route MAGI calls through the hedging router")
+    parser.add_argument("--memory-sizes", type=int, nargs="*", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--frames", type=int, default=300, help="synthetic frames for the vision benchmark")
+    parser.add_argument("--audio-seconds", type=float, default=60.0, help="synthetic audio for the audio benchmark")
+    parser.add_argument("--policy-batches", type=int, default=100, help="training batches for the policy benchmark")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    args = parser.parse_args(argv)
+    selected = set(args.only or ["ticks", "runtime", "magi", "recall", "vision", "audio", "policy"])
+
+    skeleton = load_skeleton()
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="brain-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)  # the Brain's on-disk memory goes here, not into the repo
+    try:
+        mix = dict(seed=args.seed, reflex_ratio=args.reflex_ratio, stimulus_ratio=args.stimulus_ratio)
+        if "ticks" in selected:
+            print("[Bench] ticks...")
+            results["ticks"] = bench_ticks(skeleton, args.ticks, **mix)
+        if "runtime" in selected:
+            print("[Bench] runtime...")
+            results["runtime"] = bench_runtime(skeleton, args.rate, args.duration, processes=args.processes, **mix)
+        if "magi" in selected:
+            print("[Bench] magi...")
+            results["magi"] = bench_magi(args.magi_decisions, args.magi_concurrency, args.stub_latency,
+                                         args.stub_tail_rate, args.stub_tail_latency, args.hedge)
+        if "recall" in selected:
+            print("[Bench] recall...")
+            results["recall"] = bench_recall(skeleton, args.memory_sizes, seed=args.seed)
+        if "vision" in selected:
+            print("[Bench] vision...")
+            results["vision"] = bench_vision(skeleton, args.frames, seed=args.seed)
+        if "audio" in selected:
+            print("[Bench] audio...")
+            results["audio"] = bench_audio(skeleton, args.audio_seconds, seed=args.seed)
+        if "policy" in selected:
+            print("[Bench] policy...")
+            results["policy"] = bench_policy(skeleton, batches=args.policy_batches, seed=args.seed)
+    finally:
+        os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[Bench] Results written to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
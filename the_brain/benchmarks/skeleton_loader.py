@@ -0,0 +1,36 @@
+# skeleton_loader.py
+# Loads the sections of skelital_structure_of_the_brain.py as real modules.
+#
+# The skeleton keeps brain.py, forebrain.py, midbrain.py, hindbrain.py and
+# main.py back to back in one file, each starting with a "# <name>.py" header.
+# This splits it on those headers, turns every section except main.py into a
+# module, and binds the region modules into each other. That is how the
+# sections refer to one another (forebrain.Hippocampus(), ...), so Brain can
+# be built and driven from the benchmarks without any other setup.
+
+import os
+import re
+import sys
+import types
+
+BRAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SKELETON = os.path.join(BRAIN_DIR, "skelital_structure_of_the_brain.py")
+REGIONS = ("forebrain", "midbrain", "hindbrain")
+
+if BRAIN_DIR not in sys.path:
+    sys.path.insert(0, BRAIN_DIR)
+
+
+def load_skeleton(path=SKELETON):
+    """Returns {"brain": module, "forebrain": module, ...} built from the skeleton file."""
+    with open(path) as f:
+        source = f.read()
+
+    parts = re.split(r"(?m)^\s*# (\w+)\.py\s*$", source)
+    sections = dict(zip(parts[1::2], parts[2::2]))
+    modules = {name: types.ModuleType(f"skeleton.{name}") for name in sections if name != "main"}
+    for name in REGIONS + ("brain",):
+        module = modules[name]
+        module.__dict__.update({region: modules[region] for region in REGIONS})
+        exec(compile(sections[name], f"{path}:{name}.py", "exec"), module.__dict__)
+    return modules
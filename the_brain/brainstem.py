@@ -0,0 +1,193 @@
+# brainstem.py
+# Event-driven asyncio runtime for the Brain.
+#
+# Instead of polling every sensor on a fixed 10 Hz tick, sensors push events
+# into the runtime as they happen. Each event goes through the AttentionGate
+# straight away:
+#
+#   reflex   -> reflex queue, drained by a dedicated task (never waits on cognition)
+#   stimulus -> the AttentionGate's salience queue, picked up (most salient first)
+#               by background cognition tasks that run
+#               Cortex -> DecisionMaker -> Cortex -> Cerebellum on worker threads
+#
+# Sensor readings and reflexes are also published on the Brain's Pons message
+# bus ("sensory" and "reflex" topics), as are the stimuli, thoughts and plans
+# of each cognition task, so other listeners can subscribe to any of them. The
+# runtime itself doesn't read them back from the bus, which may drop messages
+# for a slow reader: readings reach the loop with call_soon_threadsafe and
+# reflexes wait in an unbounded queue, so none is ever lost.
+#
+# With a multi-process Brain (processes=N), cognition tasks hand their stimulus
+# to the forebrain worker processes instead of worker threads, so the event
+# loop, reflexes and vitals never compete with cognition for the GIL.
+#
+# Vitals are checked on their own timer and answered in grades: "throttle"
+# lets only one cognition task run at a time, "pause" tells the sensors to
+# back off, "shutdown" stops the brain. Shutdown cancels everything in flight.
+# The salience queue can also tell the sensors to back off; they stay paused
+# while either the vitals or the queue holds them.
+
+import asyncio
+import time
+
+import tracing
+
+
+class BrainRuntime:
+    """Runs a Brain from sensor events instead of a polling loop.
+
+    max_cognition_tasks: stimuli being thought about at the same time (default 4,
+                         or two per forebrain worker process)
+    vitals_interval:     seconds between AutonomicMonitor checks
+
+    Waiting stimuli are bounded, deduplicated and shed by the AttentionGate.
+    """
+    def __init__(self, brain, max_cognition_tasks=None, vitals_interval=1.0):
+        self.brain = brain
+        if max_cognition_tasks is None:
+            pool = brain.forebrain_pool
+            # Keep every worker process busy, with one stimulus queued behind each
+            max_cognition_tasks = 2 * pool.workers if pool is not None else 4
+        self.max_cognition_tasks = max_cognition_tasks
+        self.vitals_interval = vitals_interval
+
+        self._loop = None
+        self._reflexes = None
+        self._stimulus_ready = None
+        self._stopping = None
+        self._cognition = set()
+        self._vitals_level = "ok"
+        self._holds = set()  # what is holding the sensors back: "vitals" and/or "queue"
+
+    # --- 1. SENSOR EVENTS ---
+
+    def push(self, source, data):
+        """Delivers a sensor reading ("vision" or "audio"). Safe to call from any thread."""
+        if self._loop is None:
+            raise RuntimeError("BrainRuntime is not running")
+        pushed_at = time.perf_counter()
+        self.brain.pons.publish("sensory", (source, data, pushed_at))
+        self._loop.call_soon_threadsafe(self._on_sensory, source, data, pushed_at)
+
+    def _on_sensory(self, source, data, pushed_at):
+        # Filtering is cheap, so it happens right here on the event loop
+        with self.brain.telemetry.span("stage.filter"):
+            if source == "vision":
+                reflex_action = self.brain.attention.submit(data, None)
+            else:
+                reflex_action = self.brain.attention.submit(None, data)
+
+        if reflex_action:
+            self.brain.pons.publish("reflex", (reflex_action, pushed_at))
+            self._reflexes.put_nowait((reflex_action, pushed_at))
+        else:
+            self._stimulus_ready.set()
+
+    # --- 2. REFLEX, COGNITION AND VITALS TASKS ---
+
+    async def _reflex_loop(self):
+        """High-priority path: reflexes run as soon as they are queued."""
+        while True:
+            reflex_action, pushed_at = await self._reflexes.get()
+            tracing.info("REFLEX", "%s", reflex_action)
+            self.brain.motor_tuner.execute_reflex(reflex_action)
+            # Sensor push -> reflex executed, including time spent queued
+            self.brain.telemetry.record("reflex.latency", time.perf_counter() - pushed_at)
+
+    async def _cognition_loop(self):
+        slots = asyncio.Semaphore(self.max_cognition_tasks)
+        while True:
+            # Take a slot first, so stimuli wait in the salience queue (where
+            # they can still be coalesced or shed) rather than here
+            await slots.acquire()
+            while self._vitals_level != "ok" and self._cognition:
+                # Throttled: let in-flight work drain down to a single task
+                await asyncio.sleep(self.vitals_interval)
+            stimulus = self.brain.attention.next_stimulus()
+            while stimulus is None:
+                self._stimulus_ready.clear()
+                await self._stimulus_ready.wait()
+                stimulus = self.brain.attention.next_stimulus()
+            task = asyncio.create_task(self._think(stimulus))
+            self._cognition.add(task)
+            task.add_done_callback(self._cognition.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _think(self, stimulus):
+        """PERCEIVE -> THINK -> ACT for one stimulus, off the event loop."""
+        tracing.debug("COGNITION", "Processing new stimulus...")
+        brain = self.brain
+        brain.pons.publish("stimulus", stimulus)
+        with brain.telemetry.span("stage.think"):
+            if brain.forebrain_pool is not None:
+                thought, goal, high_level_plan = await asyncio.wrap_future(brain.forebrain_pool.submit(stimulus))
+            else:
+                thought = await asyncio.to_thread(brain.cortex.process_stimulus, stimulus)
+                goal = await asyncio.to_thread(brain.decision_maker.choose_goal, thought)
+                high_level_plan = await asyncio.to_thread(brain.cortex.generate_plan, goal)
+            brain.pons.publish("thought", thought)
+            brain.pons.publish("plan", high_level_plan)
+        if high_level_plan:
+            tracing.info("ACTION", "Executing: %s", high_level_plan)
+            with brain.telemetry.span("stage.act"):
+                await asyncio.to_thread(brain.motor_tuner.execute_plan, high_level_plan)
+
+    async def _vitals_loop(self):
+        while True:
+            await asyncio.sleep(self.vitals_interval)
+            if not self.brain.components.built("vitals"):
+                continue  # still warming up; don't block the loop building it
+            level = self.brain.vitals.check_system_status()
+            self._hold_sensors("vitals", level in ("pause", "shutdown"))
+            self._vitals_level = level
+            if self.brain.vitals.needs_shutdown():
+                self.request_shutdown()
+
+    def _hold_sensors(self, reason, held):
+        """Pauses the sensors while any reason holds them, resumes them once none does."""
+        paused = bool(self._holds)
+        if held:
+            self._holds.add(reason)
+        else:
+            self._holds.discard(reason)
+        if bool(self._holds) != paused:
+            for sensor in (self.brain.vision, self.brain.audio):
+                sensor.on_backpressure(not paused)
+
+    # --- 3. LIFECYCLE ---
+
+    def request_shutdown(self):
+        """Asks run() to stop. Safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def run(self):
+        """Runs until request_shutdown() (or vitals) stops the brain."""
+        self._loop = asyncio.get_running_loop()
+        self._reflexes = asyncio.Queue()
+        self._stimulus_ready = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+        workers = [
+            asyncio.create_task(self._reflex_loop()),
+            asyncio.create_task(self._cognition_loop()),
+            asyncio.create_task(self._vitals_loop()),
+        ]
+        # The queue reports from the loop's own thread (pushes and pops both happen on it)
+        self.brain.attention.add_backpressure_listener(lambda throttled: self._hold_sensors("queue", throttled))
+        sensors = [self.brain.vision, self.brain.audio]
+        for sensor in sensors:
+            sensor.start(self.push)
+        try:
+            await self._stopping.wait()
+        finally:
+            for sensor in sensors:
+                sensor.stop()
+            # Cancel in-flight cognition too (a blocking call already on a
+            # worker thread finishes in the background, its result is dropped)
+            in_flight = workers + list(self._cognition)
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            self._loop = None
+            self.brain.shutdown()
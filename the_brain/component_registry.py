@@ -0,0 +1,151 @@
+# component_registry.py
+# Lazy, timed construction of the brain's subsystems.
+#
+# Every subsystem is declared up front with a factory and the components it
+# depends on. Nothing is built until it is first used (get) or warmed up in the
+# background (warm_up), so the reflex path can come online in milliseconds while
+# the memory store, models and devices load behind it. Each component is built
+# exactly once, even when several threads ask for it at the same time, and its
+# build time is recorded for the startup report.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import tracing
+
+
+class _Entry:
+    __slots__ = ("name", "factory", "deps", "lock", "instance", "built", "seconds", "error")
+
+    def __init__(self, name, factory, deps):
+        self.name = name
+        self.factory = factory
+        self.deps = tuple(deps)
+        self.lock = threading.Lock()
+        self.instance = None
+        self.built = False
+        self.seconds = None
+        self.error = None
+
+
+class ComponentRegistry:
+    """Builds declared components on first use or during background warm-up.
+
+    on_built: optional callback(name, instance, seconds) run once per component
+    """
+    def __init__(self, on_built=None):
+        self.on_built = on_built
+        self._entries = {}
+        self._warm_up = None
+        self._remaining = 0
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, deps=()):
+        """Declares a component. Dependencies must already be registered."""
+        missing = [dep for dep in deps if dep not in self._entries]
+        if missing:
+            raise KeyError(f"{name} depends on unregistered components: {', '.join(missing)}")
+        self._entries[name] = _Entry(name, factory, deps)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    # --- 1. BUILDING ---
+
+    def get(self, name):
+        """The component, building it (and its dependencies) if needed."""
+        entry = self._entries[name]
+        if entry.built:
+            return entry.instance
+        with entry.lock:
+            if not entry.built:
+                if entry.error is not None:
+                    raise entry.error
+                deps = {dep: self.get(dep) for dep in entry.deps}
+                start = time.perf_counter()
+                try:
+                    instance = entry.factory(**deps)
+                except Exception as e:
+                    entry.error = e
+                    raise
+                entry.seconds = time.perf_counter() - start
+                entry.instance = instance
+                tracing.debug("Registry", "%s ready in %.1f ms", name, entry.seconds * 1000)
+                if self.on_built is not None:
+                    self.on_built(name, instance, entry.seconds)
+                entry.built = True  # only now, so other threads never see it half set up
+        return entry.instance
+
+    def built(self, name):
+        return self._entries[name].built
+
+    def warm_up(self, names=None, max_workers=4, on_done=None):
+        """Builds the given (default: all) components on background threads.
+
+        on_done() is called from the last warm-up thread once every one of them
+        has been built (or has failed).
+        """
+        names = [n for n in (names or self._entries) if not self._entries[n].built]
+        if not names:
+            if on_done is not None:
+                on_done()
+            return
+        self._remaining = len(names)
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warm-up")
+        self._warm_up = [executor.submit(self._warm, name, on_done) for name in names]
+        executor.shutdown(wait=False)
+
+    def _warm(self, name, on_done):
+        try:
+            self.get(name)
+        except Exception as e:
+            tracing.error("Registry", "%s failed to start: %r", name, e)
+        finally:
+            with self._lock:
+                self._remaining -= 1
+                done = self._remaining == 0
+            if done and on_done is not None:
+                on_done()
+
+    def wait(self, timeout=None):
+        """Blocks until a running warm-up has finished (or the timeout passes)."""
+        if self._warm_up is not None:
+            wait(self._warm_up, timeout=timeout)
+
+    # --- 2. REPORTING ---
+
+    @property
+    def init_times(self):
+        """{name: seconds} for every component built so far."""
+        return {e.name: e.seconds for e in self._entries.values() if e.built}
+
+    def report(self):
+        lines = [f"{'component':<20} {'init ms':>9}"]
+        for entry in self._entries.values():
+            if entry.built:
+                status = f"{entry.seconds * 1000:>9.1f}"
+            else:
+                status = f"{'failed' if entry.error is not None else 'not built':>9}"
+            lines.append(f"{entry.name:<20} {status}")
+        return "\n".join(lines)
+
+
+class Component:
+    """Class attribute that resolves to a registry component on first access.
+
+    The instance is then cached on the object, so later lookups are plain
+    attribute reads. The owner must keep its registry in `self.components`.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        instance = obj.components.get(self.name)
+        obj.__dict__[self.name] = instance
+        return instance
@@ -1,33 +1,94 @@
 # brain.py
 # Contains the main Brain class that integrates all components.
 
+import os
+import time
+
 import the_forebrain
 import the_midbrain
 import the_hindbrain
+import tracing
+from component_registry import Component, ComponentRegistry
+from telemetry import Telemetry
+from the_hindbrain.pons.message_bus import Pons
 
 class Brain:
-    def __init__(self):
-        print("[Brain] Initializing all components...")
+    # Components are declared in __init__ and built on first use or by the
+    # background warm-up, so reflexes work long before memory/models are loaded.
+    memory = Component()
+    cortex = Component()
+    decision_maker = Component()
+    vision = Component()
+    audio = Component()
+    attention = Component()
+    motor_tuner = Component()
+    vitals = Component()
+
+    # Built synchronously in __init__: everything a reflex needs
+    REFLEX_PATH = ("attention", "motor_tuner")
+
+    # Built in the forebrain worker processes instead, in multi-process mode
+    WORKER_SIDE = ("embedder", "cortex", "decision_maker")
+
+    # Frames the Pons keeps for its subscribers (power of two)
+    FRAME_RING = 4
+
+    def __init__(self, telemetry=None, warm_up=True, processes=None):
+        tracing.info("Brain", "Initializing all components...")
+        start = time.perf_counter()
         self.is_running = True
+        # Per-stage/per-component latency histograms; off unless BRAIN_TELEMETRY=1
+        self.telemetry = telemetry or Telemetry(enabled=os.getenv("BRAIN_TELEMETRY") == "1")
+        self.components = ComponentRegistry(on_built=self._on_built)
+        register = self.components.register
+        # The Pons: message bus between the regions (sensory, stimulus, thought, plan, reflex).
+        # Every stage's output is published there for anything that wants to listen.
+        self.pons = Pons()
+        # Frames are large: the bus keeps only the last few, and a subscriber further
+        # behind than that skips ahead (counted as dropped)
+        self.pons.topic("frames", capacity=self.FRAME_RING)
+
+        # Multi-process mode (processes=N or BRAIN_PROCESSES=N): the forebrain thinks in N
+        # worker processes so it can't hold the GIL against reflexes. Started before any
+        # component is built, so the workers are forked before the components start their
+        # threads. The trace writer is already running by then; tracing resets its buffer
+        # and locks in every forked child (os.register_at_fork), so that is safe.
+        # Stimuli are labels and transcripts today and travel pickled; a stimulus carrying
+        # large arrays (frames, audio) reaches the workers through shared memory instead.
+        if processes is None:
+            processes = int(os.getenv("BRAIN_PROCESSES", "0"))
+        self.forebrain_pool = None
+        if processes:
+            from the_forebrain.forebrain_pool import ForebrainPool
+            self.forebrain_pool = ForebrainPool(forebrain.worker_forebrain, workers=processes,
+                                                on_memory=lambda *memory: self.memory.store(*memory))
         
         # 1. Initialize Forebrain (The Thinker)
-        self.memory = forebrain.Hippocampus()
+        register("memory", forebrain.Hippocampus)
         # mongo DB or other vector DB could be integrated here
-        self.cortex = forebrain.Cortex(memory_system=self.memory)
+        register("embedder", forebrain.make_embedder)
+        register("cortex", lambda memory, embedder: forebrain.Cortex(memory_system=memory, embedder=embedder),
+                 deps=("memory", "embedder"))
         # frontal_lobe  as decision_maker(the magi system),problem_solver(gemini),motor_cortex(conditional),speech_recognition(cv2),personality(gpt),impulse_control(it wont have impulses).
         # parietal_lobe as sensory_integration(two basic sences),spatial_awareness(visual_sences andd depth perception).
         # temporal_lobe as auditory_processing(speech recognition(pyaudio)),language_comprehension(gpt),memory_storage(hippocampus).
         # occipital_lobe as visual_processing(cv2),image_recognition(cv2).
 
-        self.decision_maker = forebrain.DecisionMaker()
+        # BRAIN_POLICY=goal_policy.npz loads trained policy weights (see the_forebrain/basal_ganglia/goal_policy.py)
+        register("decision_maker", lambda embedder: forebrain.DecisionMaker(
+            embedder=embedder, weights=os.getenv("BRAIN_POLICY")), deps=("embedder",))
         # Could intigrate the magi system here for complex decision making
 
         # 2. Initialize Midbrain (The Sensor & Router)
-        self.vision = midbrain.VisionSensor()
+        # BRAIN_CAMERA=0 (camera index) or a video path attaches real frames; every frame
+        # is also published read-only on the Pons "frames" topic
+        register("vision", lambda: midbrain.VisionSensor(
+            source=os.getenv("BRAIN_CAMERA"), publish=self._publish_frame))
         # oif available, integrate cv2 for visual input
-        self.audio = midbrain.AudioSensor()
+        # BRAIN_AUDIO=mic or a WAV path attaches real audio
+        register("audio", lambda: midbrain.AudioSensor(source=os.getenv("BRAIN_AUDIO")))
         # integrate pyaudio for audio input if available
-        self.attention = midbrain.AttentionGate()
+        register("attention", midbrain.AttentionGate)
         # integrate RAS logic here for attention filtering - Sensory Filtering: RAS filters incoming sensory data, allowing the brain to focus on relevant stimuli while ignoring distractions.
 
         """| Function                   | Description                                                                                                                                                                         |
@@ -40,12 +101,21 @@ class Brain:
 
 
         # 3. Initialize Hindbrain (The Executor & Manager)
-        self.motor_tuner = hindbrain.Cerebellum()
+        register("motor_tuner", hindbrain.Cerebellum)
 # Could integrate fine motor control logic here - The cerebellum fine-tunes motor commands from the motor cortex, ensuring smooth, coordinated movements. It also plays a role in motor learning and balance.
-        self.vitals = hindbrain.AutonomicMonitor()
+        register("vitals", hindbrain.AutonomicMonitor)
 # Could integrate system health monitoring logic here - The medulla oblongata and pons manage autonomic functions like heart rate, breathing, and digestion, keeping the body’s vital systems running smoothly.
         
-        print("[Brain] All components online. Brain is running.")
+        for name in self.REFLEX_PATH:
+            getattr(self, name)
+        tracing.info("Brain", "Reflex path live in %.1f ms.", (time.perf_counter() - start) * 1000)
+        if warm_up:
+            names = None
+            if self.forebrain_pool is not None:
+                names = [n for n in self.components if n not in self.WORKER_SIDE]
+            self.components.warm_up(names, on_done=lambda: tracing.info(
+                "Brain", "All components online in %.1f ms. Brain is running.\n%s",
+                (time.perf_counter() - start) * 1000, self.components.report()))
 
 
 
@@ -60,55 +130,121 @@ class Brain:
 
         
 
+    # Component calls timed when telemetry is enabled
+    INSTRUMENTED = {
+        "vision": [("scan", "VisionSensor.scan")],
+        "audio": [("listen", "AudioSensor.listen")],
+        "attention": [("filter", "AttentionGate.filter")],
+        "cortex": [("process_stimulus", "Cortex.process_stimulus"), ("generate_plan", "Cortex.generate_plan")],
+        "decision_maker": [("choose_goal", "DecisionMaker.choose_goal"),
+                           ("choose_goals", "DecisionMaker.choose_goals")],
+        "motor_tuner": [("execute_plan", "Cerebellum.execute_plan"), ("execute_reflex", "Cerebellum.execute_reflex")],
+        "vitals": [("check_system_status", "AutonomicMonitor.check_system_status")],
+    }
+
+    def _publish_frame(self, frame):
+        # The frame pipeline reuses its few buffers within a handful of frames, and a
+        # subscriber may lag up to FRAME_RING frames behind, so the bus gets its own
+        # copy (only when someone is listening)
+        if self.pons.topic("frames").subscribers:
+            self.pons.publish("frames", frame.copy(), readonly=True)
+
+    def _on_built(self, name, component, seconds):
+        """Records the component's init time and instruments its calls."""
+        self.telemetry.record(f"init.{name}", seconds)
+        for method, span_name in self.INSTRUMENTED.get(name, ()):
+            self.telemetry.instrument(component, method, span_name)
+
     def main_processing_loop(self):
         """
         This is the main "heartbeat" of the brain, running continuously.
         It follows the SENSE -> FILTER -> REFLEX/THINK -> ACT -> LIVE cycle.
         """
-        
+        span = self.telemetry.span # shared no-op unless telemetry is enabled
+        with span("tick"):
+            self._tick(span)
+
+    def _tick(self, span):
         # 1. SENSE (Midbrain)
-        vision_input = self.vision.scan()
-        audio_input = self.audio.listen()
+        with span("stage.sense"):
+            vision_input = self.vision.scan()
+            audio_input = self.audio.listen()
+            sensed_at = time.perf_counter()
+            if vision_input is not None:
+                self.pons.publish("sensory", ("vision", vision_input, sensed_at))
+            if audio_input is not None:
+                self.pons.publish("sensory", ("audio", audio_input, sensed_at))
         
         # 2. FILTER (Midbrain)
         # Attention gate decides what's important and if a reflex is needed
-        stimulus, reflex_action = self.attention.filter(vision_input, audio_input)
+        with span("stage.filter"):
+            stimulus, reflex_action = self.attention.filter(vision_input, audio_input)
 
         # 3. REFLEX (Midbrain -> Hindbrain)
         if reflex_action:
-            print(f"[REFLEX] {reflex_action}")
-            self.motor_tuner.execute_reflex(reflex_action)
+            with span("stage.reflex"):
+                tracing.info("REFLEX", "%s", reflex_action)
+                self.pons.publish("reflex", (reflex_action, sensed_at))
+                self.motor_tuner.execute_reflex(reflex_action)
             return  # Skip cognitive loop for this tick
 
         # 4. PERCEIVE & THINK (Forebrain)
         if stimulus:
-            print(f"[COGNITION] Processing new stimulus...")
-            
-            # Cortex (LLM) processes the stimulus, using memory
-            thought = self.cortex.process_stimulus(stimulus)
+            tracing.debug("COGNITION", "Processing new stimulus...")
+            self.pons.publish("stimulus", stimulus)
             
-            # DecisionMaker (RL) decides what to do
-            goal = self.decision_maker.choose_goal(thought)
-            
-            # Cortex (LLM) generates a high-level plan
-            high_level_plan = self.cortex.generate_plan(goal)
+            with span("stage.think"):
+                thought, goal, high_level_plan = self.think(stimulus)
+                self.pons.publish("thought", thought)
+                self.pons.publish("plan", high_level_plan)
 
             # 5. ACT (Hindbrain)
             if high_level_plan:
-                print(f"[ACTION] Executing: {high_level_plan}")
-                self.motor_tuner.execute_plan(high_level_plan)
+                with span("stage.act"):
+                    tracing.info("ACTION", "Executing: %s", high_level_plan)
+                    self.motor_tuner.execute_plan(high_level_plan)
 
         # 6. LIVE (Hindbrain)
-        # Autonomic functions run in the background
-        self.vitals.check_system_status()
-        if self.vitals.needs_shutdown():
-            self.shutdown()
+        # Autonomic functions run in the background; this just reads their latest sample
+        with span("stage.live"):
+            self.vitals.check_system_status()
+            if self.vitals.needs_shutdown():
+                self.shutdown()
+
+    def think(self, stimulus):
+        """PERCEIVE -> THINK for one stimulus; returns (thought, goal, plan)."""
+        if self.forebrain_pool is not None:
+            return self.forebrain_pool.think(stimulus)
+        # Cortex (LLM) processes the stimulus, using memory
+        thought = self.cortex.process_stimulus(stimulus)
+        
+        # DecisionMaker (RL) decides what to do
+        goal = self.decision_maker.choose_goal(thought)
+        
+        # Cortex (LLM) generates a high-level plan
+        return thought, goal, self.cortex.generate_plan(goal)
 
     def shutdown(self):
-        print("[Brain] Initiating shutdown procedure...")
+        tracing.info("Brain", "Initiating shutdown procedure...")
         self.is_running = False
+        # Let an in-flight warm-up finish, then clean up whatever was built
+        self.components.wait()
+        if self.forebrain_pool is not None:
+            self.forebrain_pool.close() # before saving, so the workers' last memories are stored
         # Add any cleanup logic here (e.g., save memory)
-        self.memory.save_to_disk()
+        if self.components.built("cortex"):
+            self.cortex.close()
+        if self.components.built("memory"):
+            self.memory.save_to_disk()
+        if self.components.built("vitals"):
+            self.vitals.stop()
+        if self.components.built("vision"):
+            self.vision.close()
+        if self.components.built("audio"):
+            self.audio.close()
+        if self.components.built("motor_tuner"):
+            self.motor_tuner.stop()
+        self.telemetry.stop()
 
 
 
@@ -135,68 +271,181 @@ class Brain:
 # forebrain.py
 # Contains components for higher-order cognition.
 
+import os
+import threading
+
+import tracing
+from the_forebrain.cortex.backends import PLAN_PROMPT, THOUGHT_PROMPT, FakeBackend
+from the_forebrain.cortex.micro_batcher import MicroBatcher
+
+def make_embedder(**kwargs):
+    """Local text embedder (see the_forebrain/cortex/embeddings.py)."""
+    # Imported here so loading the forebrain doesn't pull in numpy up front
+    from the_forebrain.cortex.embeddings import Embedder
+    return Embedder(**kwargs)
+
 class Hippocampus:
-    """Simulates long-term memory (a vector database)."""
-    def __init__(self):
-        self.memory_vectors = {}
-        print("[Forebrain] Hippocampus (Memory) initialized.")
+    """Simulates long-term memory (a vector database).
+
+    read_only: a replica (e.g. in a forebrain worker) that recalls what is on
+               disk and keeps new memories in RAM only; the owner writes them
+    """
+    def __init__(self, path="hippocampus_memory", read_only=False):
+        # Imported here so loading the forebrain doesn't pull in numpy up front
+        from the_forebrain.hippocampus.memory_store import MemoryStore
+        # On-disk segments are memory-mapped, so recall works right away
+        # without reading every memory into RAM.
+        self.disk = MemoryStore(path, read_only=read_only, metric="cosine")
+        self.thoughts = [] # memories stored this session (older ones live on disk)
+        self._lock = threading.Lock()
+        self._view = (self._build_index(self.disk.sealed), self.disk.sealed)
+        self._compaction = None
+        if not read_only:
+            self._compaction = self.disk.start_compaction(on_compacted=self._on_compacted)
+        tracing.info("Forebrain", "Hippocampus (Memory) initialized.")
+
+    def _build_index(self, sealed, tail=None):
+        from the_forebrain.hippocampus.vector_index import VectorIndex
+        index = VectorIndex(metric="cosine", background_training=True)
+        for segment in sealed:
+            index.attach(segment.vectors)
+        if tail is not None and len(tail):
+            index.add_batch(tail)
+        index.maybe_train()
+        return index
+
+    def _on_compacted(self, sealed):
+        # Compaction renumbers the sealed memories; swap index and segments together
+        with self._lock:
+            index, _ = self._view
+            self._view = (self._build_index(sealed, index.tail()), sealed)
         
-    def store(self, thought, vector):
-        """Stores a new memory."""
-        print(f"[Memory] Storing: {thought[:20]}...")
-        self.memory_vectors[thought] = vector
+    def store(self, thought, vector, metadata=None):
+        """Stores a new memory (appended to disk immediately)."""
+        tracing.debug("Memory", "Storing: %.20s...", thought)
+        index, _ = self._view
+        vector = index.prepare(vector)
+        if not self.disk.read_only:
+            self.disk.append(thought, vector, metadata, metric=index.metric)
+        with self._lock:
+            self.thoughts.append(thought) # before indexing, so recall never sees an unknown id
+            self._view[0].add(vector)
         
-    def recall(self, query_vector):
-        """Recalls relevant memories."""
-        print(f"[Memory] Recalling based on query...")
-        # In a real system, this would be a K-NN or ANN search
-        if not self.memory_vectors:
-            return None
-        return "A relevant past memory."
+    def recall(self, query_vector, k=5):
+        """Recalls the k most similar memories as [(thought, score), ...], best first."""
+        tracing.debug("Memory", "Recalling based on query...")
+        # Exact k-NN while small, IVF (approximate) once the store grows
+        index, sealed = self._view
+        if len(index) == 0:
+            return []
+        ids, scores = index.search(query_vector, k)
+        memories = []
+        for i, score in zip(ids, scores):
+            thought = sealed.record(i)[0] if i < sealed.rows else self.thoughts[i - sealed.rows]
+            memories.append((thought, float(score)))
+        return memories
 
     def save_to_disk(self):
-        print("[Memory] Saving memories to disk...")
-        # Logic to save self.memory_vectors
+        if self.disk.read_only:
+            return
+        tracing.info("Memory", "Saving memories to disk...")
+        # Memories are appended as they are stored; this just makes them durable.
+        # A compaction still running would rewrite the manifest after the close.
+        if self._compaction is not None:
+            self._compaction.join()
+        self.disk.close()
 
 class Cortex:
     """Simulates the Cerebrum/Cortex (an LLM)."""
-    def __init__(self, memory_system):
+    def __init__(self, memory_system, backend=None, max_batch=16, max_wait=0.0,
+                 embedder=None, cache_threshold=0.92, cache_ttl=600.0):
+        from the_forebrain.cortex.semantic_cache import SemanticCache
         self.memory = memory_system
-        print("[Forebrain] Cortex (LLM) initialized.")
+        # Model calls from concurrent stimuli are batched into one request.
+        # The fake backend stands in for a real LLM (see the_forebrain/cortex/backends.py).
+        self.llm = MicroBatcher(backend or FakeBackend(), max_batch=max_batch, max_wait=max_wait)
+        # Text -> vectors for memory and the cache (local hashing embedder by default)
+        self.embedder = embedder or make_embedder()
+        # Near-duplicate stimuli/goals reuse earlier results (cache_threshold=None turns this off)
+        self.cache = None
+        if cache_threshold is not None:
+            self.cache = SemanticCache(self.embedder, threshold=cache_threshold, ttl=cache_ttl)
+        tracing.info("Forebrain", "Cortex (LLM) initialized.")
+
+    def _cached(self, kind, text):
+        if self.cache is None:
+            return None, None
+        return self.cache.lookup(kind, text)
         
     def process_stimulus(self, stimulus):
         """Analyzes a stimulus using context from memory."""
-        context = self.memory.recall(stimulus)
-        print(f"[Cortex] Thinking about {stimulus} with context: {context}")
+        thought, key = self._cached("thought", stimulus)
+        if thought is not None:
+            # Already thought (and remembered) recently: no model call, no new memory
+            tracing.debug("Cortex", "Reusing thought for %s", stimulus)
+            return thought
+        context = self.memory.recall(self.embedder.embed(_as_text(stimulus)))
+        tracing.debug("Cortex", "Thinking about %s with context: %s", stimulus, context)
         # --- API CALL TO LLM ---
-        # thought = llm.generate(f"Stimulus: {stimulus}, Context: {context}")
-        thought = f"Analyzed thought about {stimulus}"
+        thought = self.llm.generate(THOUGHT_PROMPT.format(stimulus=stimulus, context=context))
+        if self.cache is not None:
+            self.cache.put("thought", key, thought)
         
         # Store the new thought as a memory
-        self.memory.store(thought, f"vector_for_{thought}")
+        self.memory.store(thought, self.embedder.embed(thought))
         return thought
         
     def generate_plan(self, goal):
         """Generates a high-level plan to achieve a goal."""
-        print(f"[Cortex] Generating plan for goal: {goal}")
+        plan, key = self._cached("plan", goal)
+        if plan is not None:
+            return plan
+        tracing.debug("Cortex", "Generating plan for goal: %s", goal)
         # --- API CALL TO LLM ---
-        # plan = llm.generate(f"Create a step-by-step plan for: {goal}")
-        plan = f"Plan for {goal}"
+        plan = self.llm.generate(PLAN_PROMPT.format(goal=goal))
+        if self.cache is not None:
+            self.cache.put("plan", key, plan)
         return plan
 
+    def close(self):
+        self.llm.close()
+
+def _as_text(stimulus):
+    # Stimuli are text labels/transcripts; anything else is embedded by its repr
+    return stimulus if isinstance(stimulus, str) else repr(stimulus)
+
+def worker_forebrain():
+    """Builds the forebrain of one worker process (see the_forebrain/forebrain_pool.py)."""
+    # The main process owns the Hippocampus on disk; workers recall from a replica
+    cortex = Cortex(memory_system=Hippocampus(read_only=True))
+    return cortex, DecisionMaker(embedder=cortex.embedder, weights=os.getenv("BRAIN_POLICY"))
+
 class DecisionMaker:
-    """Simulates the Prefrontal Cortex (an RL Agent)."""
-    def __init__(self):
-        print("[Forebrain] DecisionMaker (RL Agent) initialized.")
+    """Simulates the Prefrontal Cortex (an RL Agent).
+
+    embedder: text embedder shared with the Cortex (default: a new one)
+    weights:  trained policy file; None = untrained (goals scored by text similarity)
+    goals:    candidate goals of an untrained policy (default: goal_policy.GOALS)
+    """
+    def __init__(self, embedder=None, weights=None, goals=None):
+        # Imported here so loading the forebrain doesn't pull in numpy up front
+        from the_forebrain.basal_ganglia.goal_policy import GOALS, GoalPolicy
+        embedder = embedder or make_embedder()
+        if weights:
+            self.policy = GoalPolicy.load(weights, embedder)
+        else:
+            self.policy = GoalPolicy(goals or GOALS, embedder)
+        tracing.info("Forebrain", "DecisionMaker (RL Agent) initialized with %d goals%s.",
+                     len(self.policy.goals), f" from {weights}" if weights else " (untrained)")
         
     def choose_goal(self, thought):
         """Uses a policy to select the best goal."""
-        print(f"[DecisionMaker] Choosing goal based on: {thought}")
-        # --- RL MODEL LOGIC ---
-        # state = self.process_thought(thought)
-        # goal = self.rl_policy(state)
-        goal = "A chosen goal"
-        return goal
+        tracing.debug("DecisionMaker", "Choosing goal based on: %s", thought)
+        return self.choose_goals([thought])[0]
+
+    def choose_goals(self, thoughts):
+        """Picks a goal for each of many thoughts, scoring every candidate for all of them in one pass."""
+        return self.policy.choose_goals([_as_text(thought) for thought in thoughts])
 
 
 
@@ -235,58 +484,196 @@ class DecisionMaker:
    # midbrain.py
 # Contains components for sensory input and attention.
 
+import tracing
+
 class VisionSensor:
-    """Simulates the eyes and visual cortex."""
-    def __init__(self):
-        print("[Midbrain] VisionSensor initialized.")
+    """Simulates the eyes and visual cortex.
+
+    source:  None (placeholder), a camera index / video path, or a frame source
+             such as ArraySource (see the_midbrain/superior_colliculus/frame_pipeline.py)
+    publish: publish(frame) for every frame read, e.g. onto the Pons
+    Other keyword arguments tune the FramePipeline (thresholds, downsample, fps, ...).
+    """
+    def __init__(self, source=None, publish=None, **pipeline_options):
+        self.push = None
+        self.throttled = False
+        self.pipeline = None
+        if source is not None:
+            from the_midbrain.superior_colliculus.frame_pipeline import FramePipeline, VideoSource
+            if not hasattr(source, "read_into"):
+                source = VideoSource(source)
+            # Frames become "fast_moving_object" (reflex), "movement <where>" or nothing
+            self.pipeline = FramePipeline(source, publish=publish, **pipeline_options)
+        tracing.info("Midbrain", "VisionSensor initialized.")
             
     def scan(self):
-        """Scans the environment. Placeholder."""
-        # In a real app, this could be a camera feed.
-        return None # "image_data_placeholder"
+        """Reads one frame; returns its motion label, or None (no camera, or nothing moved)."""
+        if self.pipeline is None:
+            return None # "image_data_placeholder"
+        return self.pipeline.step()
+
+    def start(self, push):
+        """Starts pushing motion labels to the runtime as push("vision", label)."""
+        self.push = push
+        if self.pipeline is not None:
+            self.pipeline.start(lambda label: push("vision", label))
+
+    def stop(self):
+        self.push = None
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+    def close(self):
+        if self.pipeline is not None:
+            self.pipeline.close()
+
+    def on_backpressure(self, throttled):
+        """Called by the AttentionGate; movement stimuli are held back meanwhile (reflexes aren't)."""
+        self.throttled = throttled
+        if self.pipeline is not None:
+            self.pipeline.throttled = throttled
+
+    @property
+    def stats(self):
+        """Frames/sec, per-frame latency and how many frames were unchanged/stimuli/reflexes."""
+        return self.pipeline.stats if self.pipeline is not None else {}
         
 class AudioSensor:
-    """Simulates the ears and auditory cortex."""
-    def __init__(self):
-        print("[Midbrain] AudioSensor initialized.")
+    """Simulates the ears and auditory cortex.
+
+    source:     None (placeholder), "mic", a WAV file path, or an audio source such as
+                ArraySource (see the_midbrain/inferior_colliculus/audio_pipeline.py)
+    transcribe: transcribe(samples, sample_rate) -> text for each speech segment
+    Other keyword arguments tune the AudioPipeline (thresholds, chunk, realtime, ...).
+    """
+    def __init__(self, source=None, transcribe=None, **pipeline_options):
+        self.push = None
+        self.throttled = False
+        self.pipeline = None
+        if source is not None:
+            from the_midbrain.inferior_colliculus.audio_pipeline import AudioPipeline, MicrophoneSource, WavSource
+            if source == "mic":
+                source = MicrophoneSource(chunk=pipeline_options.get("chunk", 256))
+            elif isinstance(source, str):
+                source = WavSource(source)
+            # Chunks become "loud_bang" (reflex), transcribed speech, or nothing
+            self.pipeline = AudioPipeline(source, transcribe=transcribe, **pipeline_options)
+        tracing.info("Midbrain", "AudioSensor initialized.")
+
+    def start(self, push):
+        """Starts pushing reflex labels and speech to the runtime as push("audio", text)."""
+        self.push = push
+        if self.pipeline is not None:
+            self.pipeline.start(lambda label: push("audio", label))
+
+    def stop(self):
+        self.push = None
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+    def close(self):
+        if self.pipeline is not None:
+            self.pipeline.close()
+
+    def on_backpressure(self, throttled):
+        """Called by the AttentionGate; speech is held back meanwhile (startles aren't)."""
+        self.throttled = throttled
+        if self.pipeline is not None:
+            self.pipeline.throttled = throttled
         
     def listen(self):
-        """Listens to the environment. Placeholder."""
-        # In a real app, this could be a microphone stream.
+        """Reads one chunk; returns a reflex label, finished speech, or None."""
+        if self.pipeline is not None:
+            return self.pipeline.step()
         # For a chatbot, this is where we'd get user input.
-        print("[AudioSensor] Listening...")
+        tracing.debug("AudioSensor", "Listening...", sample=100)
         # Simple simulation:
         # return input("USER: ")
         return None # "user_speech_placeholder"
 
+    @property
+    def stats(self):
+        """Chunks (and how many were silent), reflexes, speech found and per-chunk latency."""
+        return self.pipeline.stats if self.pipeline is not None else {}
+
+from the_midbrain.reticular_formation.salience_queue import SalienceQueue
+from the_midbrain.reticular_formation.trigger_engine import TriggerTable
+
 class AttentionGate:
     """Simulates the reticular activating system (RAS)."""
-    def __init__(self):
-        print("[Midbrain] AttentionGate (RAS) initialized.")
-        self.name_trigger = "gemini" # Example trigger
-        
-    def filter(self, vision_input, audio_input):
+    # Salience of input no trigger rule matched. Below the queue's shed threshold,
+    # so routine input is what gets shed when the forebrain falls behind, while
+    # triggered input (rule priority, 0.5 by default) still gets through.
+    ROUTINE_SALIENCE = 0.3
+
+    def __init__(self, capacity=256, dedup_window=2.0, trigger_rules=None):
+        tracing.info("Midbrain", "AttentionGate (RAS) initialized.")
+        # Wake words and reflex triggers (triggers.json, hot-reloaded on change)
+        self.triggers = TriggerTable(trigger_rules) if trigger_rules else TriggerTable()
+        # Stimuli wait here for the forebrain, most salient first
+        self.queue = SalienceQueue(capacity=capacity, dedup_window=dedup_window)
+
+    def assess(self, vision_input, audio_input):
         """
         Decides what's important.
-        Returns (stimulus, reflex_action)
+        Returns (reflex_action, [(stimulus, salience), ...])
         """
-        # 1. Check for reflex-level triggers
-        if vision_input == "fast_moving_object":
-            return (None, "FLINCH")
-        if audio_input == "loud_bang":
-            return (None, "STARTLE")
+        # 1. One pass over each input finds every reflex trigger and wake word
+        vision_reflex, vision_priority = self._classify(vision_input, "vision")
+        audio_reflex, audio_priority = self._classify(audio_input, "audio")
+        if vision_reflex or audio_reflex:
+            return (vision_reflex or audio_reflex, [])
             
         # 2. Check for important stimuli to pass to forebrain
-        if audio_input and (self.name_trigger in audio_input.lower()):
-            print("[Attention] Detected trigger word!")
-            return (audio_input, None)
+        candidates = []
+        if audio_input and audio_priority is not None:
+            tracing.debug("Attention", "Detected trigger word!")
+            candidates.append((audio_input, audio_priority))
             
         if vision_input:
             # Simple logic: always pass visual info if it exists
-            return (vision_input, None)
+            candidates.append((vision_input, vision_priority if vision_priority is not None else self.ROUTINE_SALIENCE))
+
+        return (None, candidates)
+
+    def _classify(self, sensory_input, source):
+        if not isinstance(sensory_input, str):
+            return (None, None)
+        return self.triggers.classify(sensory_input, source)
 
-        # 3. If nothing important, return None
-        return (None, None)  
+    def submit(self, vision_input, audio_input):
+        """Queues anything important for the forebrain; returns a reflex action or None."""
+        reflex_action, candidates = self.assess(vision_input, audio_input)
+        if reflex_action:
+            return reflex_action
+        for stimulus, salience in candidates:
+            self.queue.push(stimulus, salience)
+        return None
+
+    def next_stimulus(self):
+        """The most salient waiting stimulus, or None."""
+        return self.queue.pop()
+
+    def add_backpressure_listener(self, callback):
+        """callback(throttled) fires when the forebrain falls behind / catches up."""
+        self.queue.add_listener(callback)
+
+    @property
+    def stats(self):
+        """Queue depth, drop counts (duplicate/full/shed/evicted) and throughput."""
+        return self.queue.stats
+        
+    def filter(self, vision_input, audio_input):
+        """
+        One tick of attention: queue what's new, hand back the most salient.
+        Returns (stimulus, reflex_action)
+        """
+        reflex_action = self.submit(vision_input, audio_input)
+        if reflex_action:
+            return (None, reflex_action)
+
+        # If nothing important is waiting, this is None
+        return (self.next_stimulus(), None)  
 
 
 
@@ -335,53 +722,117 @@ class AttentionGate:
         # hindbrain.py
 # Contains components for autonomic functions and motor control.
 
+import tracing
+from the_hindbrain.cerebellum.plan_executor import Plan, PlanExecutor
+
 class Cerebellum:
     """Simulates the cerebellum (fine motor control)."""
-    def __init__(self):
-        print("[Hindbrain] Cerebellum (MotorTuner) initialized.")
+    def __init__(self, max_workers=4, step_timeout=None):
+        # Plan steps run as a dependency graph; independent steps run concurrently
+        self.executor = PlanExecutor(max_workers=max_workers, default_timeout=step_timeout)
+        self.control_loops = []
+        tracing.info("Hindbrain", "Cerebellum (MotorTuner) initialized.")
+
+    def start_control_loop(self, channels, read, write, rate=1000.0, **gains):
+        """Drives `channels` actuators with a vectorized PID at `rate` Hz on its own thread.
+
+        read() returns the measurements, write(output) applies the commands;
+        gains are PIDController keyword arguments (kp, ki, kd, output_limits, ...).
+        Returns the ControlLoop (its .controller.setpoint is the movement target).
+        """
+        from the_hindbrain.cerebellum.pid_controller import ControlLoop, PIDController  # pulls in numpy
+        loop = ControlLoop(PIDController(channels, **gains), read, write, rate=rate).start()
+        self.control_loops.append(loop)
+        return loop
         
     def execute_plan(self, high_level_plan):
-        """Converts a high-level plan into fine motor actions."""
-        print(f"[Cerebellum] Executing plan: {high_level_plan}")
-        # In a real app, this would send commands to actuators,
-        # or type text to a screen.
-        # for step in plan.steps:
-        #    self.execute_micro_action(step)
-        pass
+        """Converts a high-level plan into fine motor actions. Returns the StepResults."""
+        tracing.debug("Cerebellum", "Executing plan: %s", high_level_plan)
+        try:
+            plan = high_level_plan if isinstance(high_level_plan, Plan) else Plan.from_text(high_level_plan)
+            run = self.executor.run(plan)
+        except ValueError as e:
+            # A malformed plan is the Cortex's mistake; don't let it stop the brain
+            tracing.error("Cerebellum", "Cannot execute plan: %s", e, sample=100)
+            return []
+        # In a real app, each step would send commands to actuators,
+        # or type text to a screen (see PlanExecutor's runner).
+        results = []
+        for result in run:  # streamed as steps finish
+            tracing.debug("Cerebellum", "Step %s: %s", result.name, result.status)
+            results.append(result)
+        return results
 
     def execute_reflex(self, reflex_action):
         """Executes an immediate, pre-programmed reflex."""
-        print(f"[Cerebellum] EXECUTING REFLEX: {reflex_action}!")
+        # A reflex takes over motor control: any plan in flight is cancelled
+        self.executor.cancel_all(f"reflex {reflex_action}")
+        tracing.info("Cerebellum", "EXECUTING REFLEX: %s!", reflex_action)
         # e.g., self.motor_controller.flinch()
         pass
 
+    def stop(self):
+        self.executor.shutdown()
+        for loop in self.control_loops:
+            loop.stop()
+            tracing.info("Cerebellum", "Control loop stats: %s", loop.stats)
+
 class AutonomicMonitor:
     """Simulates the medulla/pons (autonomic functions)."""
-    def __init__(self):
+    # Graded responses, mildest first
+    LEVELS = ("ok", "throttle", "pause", "shutdown")
+
+    def __init__(self, sample_rate=2.0):
         self.cpu_load = 0
         self.memory_usage = 0
+        self.throttle_threshold = 75 # slow cognition down
+        self.pause_threshold = 85    # pause non-critical sensors
         self.shutdown_threshold = 95 # e.g., 95% CPU
-        print("[Hindbrain] AutonomicMonitor (Vitals) initialized.")
+        # System-wide RAM is shared with every other process, so it can slow the
+        # brain down and pause its sensors but never shut it down
+        self.memory_throttle_threshold = 85
+        self.memory_pause_threshold = 92
+        self.hysteresis = 5          # must drop this far below a threshold to step back down
+        self.level = "ok"
+        self._cpu_level = 0
+        self._memory_level = 0
+        # /proc is read on a background thread; checks below only read its snapshot
+        from the_hindbrain.medulla.vitals_sampler import VitalsSampler  # pulls in numpy
+        self.sampler = VitalsSampler(rate=sample_rate).start()
+        tracing.info("Hindbrain", "AutonomicMonitor (Vitals) initialized.")
 
     def check_system_status(self):
-        """Monitors system health."""
-        # Placeholder for real system checks
-        # self.cpu_load = psutil.cpu_percent()
-        # self.memory_usage = psutil.virtual_memory().percent
-        
-        # Simulating a check
-        self.cpu_load = 0 # (self.cpu_load + 1) % 100
+        """Monitors system health. Returns the response level ("ok" ... "shutdown")."""
+        vitals = self.sampler.snapshot
+        self.cpu_load = vitals.cpu_smoothed
+        self.memory_usage = vitals.mem_smoothed
+
+        # CPU and memory are graded separately; the response is the worse of the two
+        self._cpu_level = self._grade(self.cpu_load, self._cpu_level,
+                                      (self.throttle_threshold, self.pause_threshold, self.shutdown_threshold))
+        self._memory_level = self._grade(self.memory_usage, self._memory_level,
+                                         (self.memory_throttle_threshold, self.memory_pause_threshold))
+        level = max(self._cpu_level, self._memory_level)
         
-        if self.cpu_load > self.shutdown_threshold:
-            print(f"[Vitals] CRITICAL: CPU load at {self.cpu_load}%")
-            return True # Signals a need to shut down
-        
-        # print(f"[Vitals] System OK (CPU: {self.cpu_load}%)")
-        return False
+        if self.LEVELS[level] != self.level:
+            self.level = self.LEVELS[level]
+            log = tracing.info if self.level == "ok" else tracing.warning
+            log("Vitals", "%s: CPU %.0f%%, memory %.0f%%", self.level.upper(), self.cpu_load, self.memory_usage)
+        return self.level
         
+    def _grade(self, load, current, thresholds):
+        """Index into LEVELS for one resource, stepping down only past the hysteresis."""
+        level = sum(load > t for t in thresholds)
+        if level < current and load > thresholds[current - 1] - self.hysteresis:
+            level = current
+        return level
+
     def needs_shutdown(self):
-        """Public method to check if a shutdown is needed."""
-        return self.check_system_status()   
+        """Public method to check if a shutdown is needed (as of the last check)."""
+        return self.level == "shutdown"
+
+    def stop(self):
+        self.sampler.stop()
 
 
 
@@ -426,8 +877,11 @@ class AutonomicMonitor:
 # This is the "brainstem" - the entry point that initializes 
 # and runs the entire brain.
 
-import time
+import asyncio
+
+import tracing
 from brain import Brain
+from brainstem import BrainRuntime
 
 # ==========================================================
 # The "Brainstem" - This is the script's main entry point
@@ -437,25 +891,17 @@ if __name__ == "__main__":
     # 1. Create the single instance of our brain
     my_brain = Brain()
     
-    # 2. Run the main loop
-    while my_brain.is_running:
-        try:
-            # Call the brain's main "heartbeat"
-            my_brain.main_processing_loop()
-            
-            # Prevent the loop from running too fast 
-            # (e.g., 10 "ticks" per second)
-            time.sleep(0.1) 
-            
-        except KeyboardInterrupt:
-            print("\n[Brainstem] Manual shutdown initiated (KeyboardInterrupt).")
-            my_brain.shutdown()
-            
-        except Exception as e:
-            print(f"[FATAL ERROR in main loop] {e}")
-            my_brain.shutdown()
+    # 2. Run it. Sensors push events; nothing polls on a fixed tick, so an
+    # idle brain uses no CPU and a slow LLM call never holds up a reflex.
+    # (Brain.main_processing_loop() is still there for step-by-step use.)
+    try:
+        asyncio.run(BrainRuntime(my_brain).run())
+    except KeyboardInterrupt:
+        # asyncio.run cancels run(), which shuts the brain down on its way out
+        tracing.info("Brainstem", "Manual shutdown initiated (KeyboardInterrupt).")
     
-    print("[Brainstem] Brain has shut down.")
+    tracing.info("Brainstem", "Brain has shut down.")
+    tracing.flush()
 
 
 
@@ -0,0 +1,216 @@
+# telemetry.py
+# Low-overhead latency instrumentation for the brain's tick.
+#
+# Spans time a stage or a component call and feed an HDR-style histogram:
+# log-linear buckets (32 sub-buckets per power of two, so about 3% relative
+# error) with O(1) recording and a fixed memory footprint. Percentiles come
+# from walking the bucket counts.
+#
+# When telemetry is disabled, span() hands back one shared no-op context
+# manager and instrument() leaves methods untouched, so the cost is a single
+# attribute check per stage.
+#
+# Snapshots can be printed or written periodically (start_reporter) or served
+# as JSON from a local HTTP endpoint (serve).
+
+import json
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import tracing
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_NULL_SPAN = nullcontext()
+
+
+class LatencyHistogram:
+    """Log-linear histogram of durations in nanoseconds."""
+    def __init__(self):
+        self._counts = [0] * (64 * SUB_BUCKETS)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        ns = max(int(ns), 0)
+        index = _bucket_index(ns)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += ns
+            if ns > self.max:
+                self.max = ns
+
+    def percentile(self, p):
+        """Upper bound (ns) of the bucket holding the p-th percentile (0 - 100)."""
+        if not self.count:
+            return 0
+        rank = max(1, round(p / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_upper(index), self.max)
+        return self.max
+
+    def summary(self):
+        """count, mean, p50, p90, p99 and max, in milliseconds."""
+        with self._lock:
+            if not self.count:
+                return {"count": 0}
+            return {
+                "count": self.count,
+                "mean_ms": self.total / self.count / 1e6,
+                "p50_ms": self.percentile(50) / 1e6,
+                "p90_ms": self.percentile(90) / 1e6,
+                "p99_ms": self.percentile(99) / 1e6,
+                "max_ms": self.max / 1e6,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self.count = self.total = self.max = 0
+
+
+class _Span:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter_ns() - self.start)
+        return False
+
+
+class Telemetry:
+    """A named set of latency histograms."""
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._reporter = None
+        self._server = None
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    # --- 1. RECORDING ---
+
+    def span(self, name):
+        """Context manager timing the block under `name` (a no-op when disabled)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self.histogram(name))
+
+    def record(self, name, seconds):
+        """Records a duration measured elsewhere (e.g. queueing delay)."""
+        if self.enabled:
+            self.histogram(name).record(seconds * 1e9)
+
+    def instrument(self, obj, method_name, name=None):
+        """Wraps obj.method_name so every call is timed. Does nothing when disabled."""
+        if not self.enabled:
+            return
+        method = getattr(obj, method_name)
+        histogram = self.histogram(name or f"{type(obj).__name__}.{method_name}")
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.record(time.perf_counter_ns() - start)
+
+        timed.__wrapped__ = method
+        setattr(obj, method_name, timed)
+
+    # --- 2. EXPORT ---
+
+    def snapshot(self, reset=False):
+        """{name: summary} for every histogram, optionally resetting them."""
+        snapshot = {name: h.summary() for name, h in sorted(self.histograms.items())}
+        if reset:
+            for histogram in self.histograms.values():
+                histogram.reset()
+        return snapshot
+
+    def format(self, snapshot=None):
+        snapshot = self.snapshot() if snapshot is None else snapshot
+        lines = [f"{'span':<40} {'count':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for name, s in snapshot.items():
+            if s["count"]:
+                lines.append(f"{name:<40} {s['count']:>8} {s['p50_ms']:>9.3f} {s['p99_ms']:>9.3f} {s['max_ms']:>9.3f}")
+        return "\n".join(lines)
+
+    def start_reporter(self, interval=10.0, path=None, reset=True):
+        """Every `interval` seconds, prints the snapshot table or appends it as a JSON line to `path`."""
+        stop = threading.Event()
+
+        def report():
+            while not stop.wait(interval):
+                snapshot = self.snapshot(reset=reset)
+                if path is None:
+                    tracing.info("Telemetry", "\n%s", self.format(snapshot))
+                else:
+                    with open(path, "a") as f:
+                        f.write(json.dumps({"time": time.time(), "spans": snapshot}) + "\n")
+
+        self._reporter = stop
+        threading.Thread(target=report, name="telemetry-reporter", daemon=True).start()
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Serves the current snapshot as JSON on http://host:port/ from a daemon thread."""
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(telemetry.snapshot()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="telemetry-http", daemon=True).start()
+        return self._server
+
+    def stop(self):
+        if self._reporter is not None:
+            self._reporter.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def _bucket_index(ns):
+    # Values below 2 * SUB_BUCKETS get their own bucket; above that each power
+    # of two is split into SUB_BUCKETS equal parts. The mapping is contiguous.
+    exponent = max(ns.bit_length() - SUB_BUCKET_BITS - 1, 0)
+    return (exponent << SUB_BUCKET_BITS) + (ns >> exponent)
+
+
+def _bucket_upper(index):
+    """Largest value that lands in bucket `index`."""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    exponent = (index >> SUB_BUCKET_BITS) - 1
+    sub = index - (exponent << SUB_BUCKET_BITS)
+    return ((sub + 1) << exponent) - 1
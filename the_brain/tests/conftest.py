@@ -0,0 +1,60 @@
+# conftest.py
+# Makes the brain's modules importable the way the benchmarks do: the_brain/
+# on sys.path for the region packages, plus the MAGI folder (its modules
+# import each other by bare name).
+
+import os
+import sys
+
+import pytest
+
+BRAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAGI_DIR = os.path.join(BRAIN_DIR, "the_forebrain", "Prefrontal Cortex", "the_magi_system")
+for path in (BRAIN_DIR, MAGI_DIR, os.path.join(BRAIN_DIR, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(scope="session")
+def skeleton():
+    """The sections of skelital_structure_of_the_brain.py as modules."""
+    from skeleton_loader import load_skeleton
+    return load_skeleton()
+
+
+@pytest.fixture
+def magi_stub():
+    """start(**options) points the MAGI agents at a local stub server and returns it.
+
+    Routing, replicas and the shared client are reset afterwards.
+    """
+    import the_magi_system as magi
+    from hf_stub_server import StubInferenceServer
+    servers = []
+
+    def start(**options):
+        server = StubInferenceServer(**options).start()
+        servers.append(server)
+        magi.configure_client(base_url=server.url)
+        return server
+
+    yield start
+    magi.configure_router(enabled=False)
+    magi.MODEL_REPLICAS = {}
+    if magi._client is not None:
+        magi._client.close()
+        magi._client = None
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def brain(skeleton, tmp_path, monkeypatch):
+    """A fully built Brain storing its memories under tmp_path."""
+    from telemetry import Telemetry
+    monkeypatch.chdir(tmp_path)
+    brain = skeleton["brain"].Brain(telemetry=Telemetry())
+    brain.components.wait()
+    yield brain
+    if brain.is_running:
+        brain.shutdown()
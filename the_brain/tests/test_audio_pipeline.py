@@ -0,0 +1,107 @@
+import threading
+import time
+
+import numpy as np
+
+from the_midbrain.inferior_colliculus.audio_pipeline import (REFLEX_LABEL, SPEECH_LABEL, ArraySource, AudioPipeline,
+                                                              AudioRing)
+from the_midbrain.reticular_formation.trigger_engine import TriggerTable
+
+RATE = 16_000
+
+
+def _audio(*parts):
+    """Concatenates ("silence" | "voice" | "bang", seconds) parts."""
+    rng = np.random.default_rng(0)
+    chunks = []
+    for kind, seconds in parts:
+        n = int(seconds * RATE)
+        if kind == "silence":
+            chunks.append(rng.normal(0.0, 0.001, n))
+        elif kind == "voice":
+            t = np.arange(n) / RATE
+            chunks.append(0.2 * np.sin(2 * np.pi * 180 * t))
+        else:
+            chunks.append(rng.normal(0.0, 0.8, n).clip(-1, 1))
+    return np.concatenate(chunks).astype(np.float32)
+
+
+def _labels(pipeline):
+    labels = []
+    while not pipeline.exhausted:
+        label = pipeline.step()
+        if label is not None:
+            labels.append(label)
+    return labels
+
+
+def test_ring_keeps_the_newest_samples():
+    ring = AudioRing(4)
+    ring.write(np.arange(3, dtype=np.float32))
+    ring.write(np.arange(3, 6, dtype=np.float32))
+    assert ring.read(0, 6).tolist() == [2, 3, 4, 5]
+    ring.write(np.arange(6, 16, dtype=np.float32))
+    assert ring.read(10, 16).tolist() == [12, 13, 14, 15]
+
+
+def test_bangs_startle_and_voice_becomes_a_speech_segment():
+    pipeline = AudioPipeline(ArraySource(_audio(("silence", 0.5), ("bang", 0.05), ("silence", 0.5),
+                                                ("voice", 0.8), ("silence", 0.5))))
+    assert _labels(pipeline) == [REFLEX_LABEL, f"{SPEECH_LABEL} 0.8s"]
+    stats = pipeline.stats
+    assert stats["reflexes"] == 1 and stats["segments"] == 1 and stats["silent"] > 0
+
+
+def test_untranscribed_speech_reaches_the_forebrain_queue():
+    triggers = TriggerTable()
+    assert triggers.classify(f"{SPEECH_LABEL} 0.8s", "audio") == (None, 0.4)
+
+
+def test_a_slow_transcriber_never_delays_the_startle():
+    release = threading.Event()
+
+    def transcribe(samples, sample_rate):
+        release.wait(5)
+        return f"heard {len(samples) / sample_rate:.1f}s"
+
+    pipeline = AudioPipeline(ArraySource(_audio(("voice", 0.8), ("silence", 0.5), ("bang", 0.05))),
+                             transcribe=transcribe)
+    start = time.monotonic()
+    labels = _labels(pipeline)
+    assert time.monotonic() - start < 2
+    assert labels == [REFLEX_LABEL]
+    release.set()
+    assert pipeline.flush(timeout=5) == ["heard 0.8s"]
+    pipeline.close()
+
+
+def test_transcripts_come_out_of_later_steps_and_the_background_reader():
+    heard = []
+    done = threading.Event()
+
+    def emit(label):
+        heard.append(label)
+        if label.startswith("heard"):
+            done.set()
+
+    pipeline = AudioPipeline(ArraySource(_audio(("voice", 0.8), ("silence", 0.5))),
+                             transcribe=lambda samples, rate: "heard you")
+    pipeline.start(emit)
+    assert done.wait(5)
+    pipeline.close()
+    assert heard == ["heard you"]
+
+
+def test_segments_are_dropped_when_the_transcriber_falls_behind():
+    release = threading.Event()
+    pipeline = AudioPipeline(ArraySource(_audio(*[("voice", 0.4), ("silence", 0.5)] * 4)),
+                             transcribe=lambda samples, rate: release.wait(5) and "heard",
+                             transcribe_queue=1)
+    _labels(pipeline)
+    release.set()
+    stats = pipeline.stats
+    assert stats["segments"] == 4
+    # At most one being transcribed plus one waiting; the rest were dropped
+    assert stats["segments_dropped"] in (2, 3)
+    assert pipeline.flush(timeout=5) == ["heard"] * (4 - stats["segments_dropped"])
+    pipeline.close()
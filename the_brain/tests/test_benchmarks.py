@@ -0,0 +1,33 @@
+import json
+
+import run_benchmarks
+from run_benchmarks import SyntheticStreams
+
+
+def _readings(streams, n=2_000):
+    return [(streams.vision(), streams.audio()) for _ in range(n)]
+
+
+def test_streams_are_reproducible():
+    assert _readings(SyntheticStreams(seed=3)) == _readings(SyntheticStreams(seed=3))
+    assert _readings(SyntheticStreams(seed=3)) != _readings(SyntheticStreams(seed=4))
+
+
+def test_streams_follow_the_requested_mix():
+    vision = [v for v, _ in _readings(SyntheticStreams(reflex_ratio=0.1, stimulus_ratio=0.3), 10_000)]
+    assert abs(vision.count("fast_moving_object") / len(vision) - 0.1) < 0.02
+    stimuli = [v for v in vision if v and v.startswith("object_")]
+    assert abs(len(stimuli) / len(vision) - 0.3) < 0.02
+    assert len(set(stimuli)) <= 50
+
+
+def test_suite_writes_and_compares_results(tmp_path, capsys):
+    out = tmp_path / "run.json"
+    run_benchmarks.main(["--only", "ticks", "--ticks", "200", "--out", str(out)])
+    report = json.loads(out.read_text())
+    assert report["meta"]["args"]["ticks"] == 200
+    assert report["results"]["ticks"]["ticks"] == 200
+    assert report["results"]["ticks"]["ticks_per_sec"] > 0
+
+    run_benchmarks.main(["--only", "ticks", "--ticks", "200", "--compare", str(out)])
+    assert "ticks.ticks_per_sec" in capsys.readouterr().out
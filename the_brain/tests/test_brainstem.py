@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from brainstem import BrainRuntime
+
+
+async def _running(runtime):
+    task = asyncio.create_task(runtime.run())
+    await asyncio.sleep(0.05)
+    return task
+
+
+def test_reflex_runs_without_waiting_for_cognition(brain):
+    reflexes = []
+    brain.motor_tuner.execute_reflex = reflexes.append
+    brain.cortex.process_stimulus = lambda stimulus: time.sleep(0.5) or "slow thought"
+
+    async def run():
+        runtime = BrainRuntime(brain, vitals_interval=0.05)
+        task = await _running(runtime)
+        runtime.push("audio", "hey gemini, are you there?")
+        await asyncio.sleep(0.02)
+        runtime.push("vision", "fast_moving_object")
+        await asyncio.sleep(0.05)
+        seen = list(reflexes)
+        runtime.request_shutdown()
+        await task
+        return seen
+
+    assert len(asyncio.run(run())) == 1
+    assert brain.telemetry.snapshot()["reflex.latency"]["count"] == 1
+    assert not brain.is_running
+
+
+def test_stimulus_is_thought_about_and_published(brain):
+    plans = brain.pons.subscribe("plan")
+    thoughts = brain.pons.subscribe("thought")
+
+    async def run():
+        runtime = BrainRuntime(brain, vitals_interval=0.05)
+        task = await _running(runtime)
+        runtime.push("audio", "hey gemini, what time is it?")
+        plan = await asyncio.wait_for(plans.aget(), 5)
+        runtime.request_shutdown()
+        await task
+        return plan
+
+    assert asyncio.run(run())
+    assert "what time is it" in thoughts.poll()
+
+
+def test_sensor_readings_are_published_on_the_pons(brain):
+    sensory = brain.pons.subscribe("sensory")
+
+    async def run():
+        runtime = BrainRuntime(brain, vitals_interval=0.05)
+        task = await _running(runtime)
+        runtime.push("vision", "movement left")
+        runtime.request_shutdown()
+        await task
+
+    asyncio.run(run())
+    source, data, pushed_at = sensory.poll()
+    assert (source, data) == ("vision", "movement left") and pushed_at <= time.perf_counter()
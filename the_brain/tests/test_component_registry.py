@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from component_registry import Component, ComponentRegistry
+
+
+def test_components_are_built_lazily_with_their_dependencies():
+    calls = []
+    built = []
+    registry = ComponentRegistry(on_built=lambda name, instance, seconds: built.append(name))
+    registry.register("store", lambda: calls.append("store") or "store")
+    registry.register("memory", lambda store: calls.append("memory") or f"memory({store})", deps=("store",))
+    assert calls == [] and not registry.built("memory")
+    assert registry.get("memory") == "memory(store)"
+    assert registry.get("memory") == "memory(store)"
+    assert calls == ["store", "memory"]
+    assert built == ["store", "memory"]
+    assert set(registry.init_times) == {"store", "memory"}
+
+
+def test_unregistered_dependencies_are_rejected():
+    registry = ComponentRegistry()
+    with pytest.raises(KeyError):
+        registry.register("memory", lambda store: None, deps=("store",))
+
+
+def test_concurrent_gets_build_once():
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    registry = ComponentRegistry()
+    registry.register("model", slow)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len({id(r) for r in results}) == 1
+
+
+def test_warm_up_builds_everything_and_reports_failures():
+    registry = ComponentRegistry()
+    registry.register("ok", lambda: "ok")
+    registry.register("broken", lambda: 1 / 0)
+    done = threading.Event()
+    registry.warm_up(on_done=done.set)
+    registry.wait(timeout=5)
+    assert done.wait(5)
+    assert registry.built("ok") and not registry.built("broken")
+    with pytest.raises(ZeroDivisionError):
+        registry.get("broken")
+    lines = registry.report().splitlines()
+    assert lines[1].split()[0] == "ok"
+    assert lines[2].split() == ["broken", "failed"]
+
+
+def test_component_descriptor_caches_the_instance():
+    registry = ComponentRegistry()
+    registry.register("memory", lambda: object())
+
+    class Owner:
+        memory = Component()
+
+        def __init__(self):
+            self.components = registry
+
+    owner = Owner()
+    assert owner.memory is registry.get("memory")
+    assert "memory" in owner.__dict__
+    assert isinstance(Owner.memory, Component)
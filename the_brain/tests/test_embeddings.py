@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from the_forebrain.cortex.embeddings import Embedder, EmbeddingBackend, HashingEmbedder
+
+
+class _CountingBackend(EmbeddingBackend):
+    dim = 4
+
+    def __init__(self):
+        self.seen = []
+
+    def embed_batch(self, texts):
+        self.seen.append(list(texts))
+        return np.array([[len(t), 0, 0, 0] for t in texts], dtype=np.float32)
+
+
+def test_batches_match_single_texts_and_are_normalised():
+    embedder = HashingEmbedder(dim=64)
+    texts = ["a loud bang", "", "A LOUD BANG", "bright light to the left"]
+    batch = embedder.embed_batch(texts)
+    assert batch.shape == (4, 64) and batch.dtype == np.float32
+    for text, row in zip(texts, batch):
+        assert np.allclose(embedder.embed_batch([text])[0], row)
+    assert np.allclose(np.linalg.norm(batch[[0, 3]], axis=1), 1.0)
+    assert not batch[1].any()
+    assert np.allclose(batch[0], batch[2])  # case-insensitive
+    assert embedder.embed_batch([]).shape == (0, 64)
+
+
+def test_similar_texts_score_higher_than_unrelated_ones():
+    vectors = HashingEmbedder().embed_batch(["a loud bang nearby", "a loud bang close by", "quiet evening"])
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2] + 0.3
+
+
+def test_vectors_are_stable_across_processes():
+    code = ("import sys; sys.path.insert(0, sys.argv[1]);"
+            "from the_forebrain.cortex.embeddings import HashingEmbedder;"
+            "print(HashingEmbedder(dim=16).embed_batch(['a loud bang'])[0].tolist())")
+    brain_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code, brain_dir],
+                            capture_output=True, text=True, check=True).stdout
+    assert np.allclose(json.loads(output), HashingEmbedder(dim=16).embed_batch(["a loud bang"])[0])
+
+
+def test_ngram_lengths_are_checked():
+    with pytest.raises(ValueError):
+        HashingEmbedder(ngrams=(5,))
+
+
+def test_embedder_only_sends_uncached_texts_to_the_backend():
+    backend = _CountingBackend()
+    embedder = Embedder(backend, cache_size=2)
+    out = embedder.embed_batch(["ab", "abc", "ab"])
+    assert out[:, 0].tolist() == [2, 3, 2]
+    assert backend.seen == [["ab", "abc"]]
+    assert embedder.embed("abc")[0] == 3
+    assert backend.seen == [["ab", "abc"]]
+    embedder.embed("abcd")  # evicts "ab", the least recently used
+    embedder.embed("ab")
+    assert backend.seen[-1] == ["ab"]
+    assert embedder.stats == {"hits": 2, "misses": 4, "entries": 2, "hit_rate": 2 / 6}
+    assert embedder.dim == 4
@@ -0,0 +1,107 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from the_forebrain.forebrain_pool import ForebrainPool
+
+
+class _Memory:
+    def store(self, thought, vector, metadata=None):
+        pass
+
+
+class _Cortex:
+    memory = _Memory()
+
+    def process_stimulus(self, stimulus):
+        if stimulus == "die":
+            os._exit(3)
+        if stimulus == "slow":
+            time.sleep(2.0)
+        return f"thought about {stimulus}"
+
+    def generate_plan(self, goal):
+        return f"plan for {goal}"
+
+    def close(self):
+        pass
+
+
+class _DecisionMaker:
+    def choose_goal(self, thought):
+        return f"goal for {thought}"
+
+
+def _factory():
+    return _Cortex(), _DecisionMaker()
+
+
+@pytest.fixture
+def pool():
+    pool = ForebrainPool(_factory, workers=2)
+    yield pool
+    pool.close()
+
+
+def test_pool_thinks(pool):
+    assert pool.think("x", timeout=10) == ("thought about x", "goal for thought about x",
+                                            "plan for goal for thought about x")
+
+
+def test_dead_worker_fails_its_job_while_the_pool_is_busy(pool):
+    slow = pool.submit("slow")
+    doomed = pool.submit("die")
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        doomed.result(timeout=5)
+    assert time.monotonic() - start < 5
+    assert slow.result(timeout=10)[0] == "thought about slow"
+
+    # New work goes to the surviving worker
+    assert pool.think("after", timeout=10)[0] == "thought about after"
+    assert pool.stats["in_flight"].count(None) == 1
+
+
+def _array_factory():
+    class ArrayCortex(_Cortex):
+        def process_stimulus(self, stimulus):
+            label, frame = stimulus
+            return f"{label}: {frame.shape} read-only={not frame.flags.writeable}"
+
+        def generate_plan(self, goal):
+            return np.full((128, 128), 7.0)  # large results come back through shared memory too
+
+    return ArrayCortex(), _DecisionMaker()
+
+
+def test_large_arrays_travel_through_shared_memory():
+    pool = ForebrainPool(_array_factory, workers=1)
+    try:
+        frame = np.arange(256 * 256, dtype=np.uint8).reshape(256, 256)
+        thought, _, plan = pool.think(("movement left", frame), timeout=10)
+        stats = pool.stats
+    finally:
+        pool.close()
+    assert thought == "movement left: (256, 256) read-only=True"
+    assert plan.shape == (128, 128) and plan.flags.writeable and (plan == 7.0).all()
+    assert stats["shared_blocks"] == 1 and stats["shared_bytes"] == 65536
+
+
+def test_brain_thinks_in_worker_processes(skeleton, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    brain = skeleton["brain"].Brain(processes=1)
+    try:
+        brain.components.wait()
+        assert not brain.components.built("cortex")
+        thought, goal, plan = brain.think("a loud voice")
+        assert thought == "Analyzed thought about a loud voice"
+        assert plan == f"Plan for {goal}"
+        frame = np.zeros((256, 256), dtype=np.uint8)
+        assert brain.think(("movement left", frame))[0].startswith("Analyzed thought about ('movement left'")
+        assert brain.forebrain_pool.stats["completed"] == 2
+        assert brain.forebrain_pool.stats["shared_blocks"] == 1
+    finally:
+        brain.shutdown()
+    assert brain.memory.thoughts[0] == "Analyzed thought about a loud voice"
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from the_midbrain.superior_colliculus.frame_pipeline import REFLEX_LABEL, ArraySource, FramePipeline
+
+SHAPE = (96, 128)
+
+
+def _frames(dtype=np.uint8, white=255, channels=None):
+    """Still, a faint patch appearing on the left, still again, then a big bright object in the middle."""
+    shape = SHAPE + ((channels,) if channels else ())
+    still = np.zeros(shape, dtype=dtype)
+    drift = still.copy()
+    drift[40:56, 8:24] = white / 10
+    sudden = drift.copy()
+    sudden[16:80, 40:96] = white
+    return [still, still, drift, drift, sudden]
+
+
+@pytest.mark.parametrize("dtype, white", [(np.uint8, 255), (np.uint16, 65535), (np.float32, 1.0)])
+def test_motion_becomes_stimuli_and_reflexes(dtype, white):
+    pipeline = FramePipeline(ArraySource(_frames(dtype, white)), downsample=2)
+    labels = [pipeline.step() for _ in range(6)]
+    assert labels == [None, None, "movement left", None, REFLEX_LABEL, None]
+    assert pipeline.exhausted
+    stats = pipeline.stats
+    assert (stats["frames"], stats["unchanged"], stats["stimuli"], stats["reflexes"]) == (5, 3, 1, 1)
+
+
+def test_colour_frames_are_summed_over_channels():
+    pipeline = FramePipeline(ArraySource(_frames(channels=3)), downsample=2)
+    assert [pipeline.step() for _ in range(5)] == [None, None, "movement left", None, REFLEX_LABEL]
+
+
+def test_unsupported_frames_are_rejected():
+    with pytest.raises(ValueError, match="dtype"):
+        FramePipeline(ArraySource(_frames(np.int16, 255)))
+    with pytest.raises(ValueError, match="too small"):
+        FramePipeline(ArraySource([np.zeros((8, 8), dtype=np.uint8)]))
+
+
+def test_throttling_holds_movement_back_but_not_reflexes():
+    pipeline = FramePipeline(ArraySource(_frames()), downsample=2)
+    pipeline.throttled = True
+    assert [pipeline.step() for _ in range(5)] == [None, None, None, None, REFLEX_LABEL]
+
+
+def test_every_frame_is_published_from_a_reused_buffer():
+    published = []
+    pipeline = FramePipeline(ArraySource(_frames(), loop=True), pool_size=2,
+                             publish=lambda frame: published.append(frame))
+    for _ in range(4):
+        pipeline.step()
+    assert len(published) == 4
+    assert np.shares_memory(published[0], published[2])
+    assert not np.shares_memory(published[0], published[1])
+
+
+def test_brain_keeps_only_a_few_frames_on_the_bus(brain):
+    frames = brain.pons.subscribe("frames")
+    for value in range(10):
+        brain._publish_frame(np.full(SHAPE, value, dtype=np.uint8))
+    kept = frames.drain()
+    assert [int(frame[0, 0]) for frame in kept] == [6, 7, 8, 9]
+    assert frames.dropped == 6 and not kept[0].flags.writeable
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from the_forebrain.basal_ganglia.goal_policy import (GOALS, SITUATIONS, GoalPolicy, SituationEnv, as_thought,
+                                                     evaluate, train)
+
+
+def test_situations_are_observed_as_the_cortexs_thoughts():
+    policy = GoalPolicy()
+    env = SituationEnv(policy, envs=4, noise=0.0)
+    observation = env.reset()
+    thoughts = [as_thought(SITUATIONS[i][0]) for i in env.situation]
+    assert thoughts[0].startswith("Analyzed thought about ")
+    assert np.allclose(observation, policy.embedder.embed_batch(thoughts))
+
+
+def test_reflex_triggers_are_not_situations():
+    stimuli = {stimulus for stimulus, _ in SITUATIONS}
+    assert not stimuli & {"fast_moving_object", "loud_bang"}
+
+
+def test_training_picks_the_best_goal_for_each_thought():
+    policy = GoalPolicy()
+    env = SituationEnv(policy, envs=128, seed=1)
+    before = evaluate(policy, env)
+    history = train(policy, env, batches=60, seed=1, log_every=0)
+    assert evaluate(policy, env) > before
+    assert history[-1] > history[0]
+    thoughts = [as_thought(stimulus) for stimulus, _ in SITUATIONS]
+    assert policy.choose_goals(thoughts) == [GOALS[i] for i in env.best]
+
+
+def test_weights_round_trip(tmp_path):
+    policy = GoalPolicy()
+    train(policy, SituationEnv(policy, envs=32), batches=5, log_every=0)
+    policy.save(tmp_path / "policy.npz")
+    loaded = GoalPolicy.load(tmp_path / "policy.npz", policy.embedder)
+    assert loaded.goals == policy.goals
+    assert np.array_equal(loaded.weights, policy.weights)
+    assert loaded.choose_goals([]) == []
+    with pytest.raises(ValueError):
+        GoalPolicy(goals=GOALS[:2], embedder=policy.embedder, weights=policy.weights)
+
+
+def test_decision_maker_uses_the_trained_policy(skeleton, tmp_path):
+    policy = GoalPolicy()
+    train(policy, SituationEnv(policy), batches=60, log_every=0)
+    policy.save(tmp_path / "policy.npz")
+    decision_maker = skeleton["forebrain"].DecisionMaker(weights=str(tmp_path / "policy.npz"))
+    assert decision_maker.choose_goal(as_thought("gemini, something is burning")) == "avoid danger"
+    assert decision_maker.choose_goals([as_thought("movement left"), as_thought("gemini, can you hear me")]) == [
+        "investigate movement", "answer the speaker"]
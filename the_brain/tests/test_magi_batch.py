@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import the_magi_system as magi
+from magi_cache import MagiCache
+
+
+def _reply(model_id, prompt):
+    # MELCHIOR says yes, BALTHASAR and CASPER say no
+    return "DECISION: YES" if model_id == magi.MODEL_LOGIC else "DECISION: NO"
+
+
+def test_batch_sends_micro_batches_and_keeps_input_order(magi_stub):
+    server = magi_stub(reply=_reply)
+    questions = [f"question {i}?" for i in range(10)]
+    results = asyncio.run(magi.run_magi_batch(questions, batch_size=4))
+    assert [r.question for r in results] == questions
+    assert all(r.decision == "REJECTED" for r in results)
+    assert server.requests == 3 * 3  # three agents, ceil(10 / 4) batches each
+
+
+def test_batch_reuses_cached_answers_and_decisions(magi_stub):
+    server = magi_stub(reply=_reply)
+    cache = MagiCache(":memory:")
+    cache.put_response("BALTHASAR", magi.MODEL_SAFETY, "b?", "DECISION: NO")
+    cache.put_response("CASPER", magi.MODEL_HUMANITY, "b?", "DECISION: NO")
+
+    first = asyncio.run(magi.run_magi_batch(["a?", "b?"], cache=cache))
+    assert first[1].decision == "REJECTED" and sorted(first[1].cached_agents) == ["BALTHASAR", "CASPER"]
+    requests = server.requests
+    second = asyncio.run(magi.run_magi_batch(["a?", "b?"], cache=cache))
+    assert [r.decision for r in second] == ["REJECTED", "REJECTED"]
+    assert server.requests == requests
+
+
+def test_stopping_early_cancels_the_remaining_batches(magi_stub):
+    def reply(model_id, prompt):
+        if "slow" in prompt:
+            time.sleep(0.5)
+        return _reply(model_id, prompt)
+
+    magi_stub(reply=reply)
+
+    async def first_only():
+        batches = magi.iter_magi_batch(["fast?", "slow?"], batch_size=1)
+        async for i, result in batches:
+            break
+        await batches.aclose()
+        await asyncio.sleep(0)
+        return i, [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    i, left = asyncio.run(first_only())
+    assert i == 0 and left == []
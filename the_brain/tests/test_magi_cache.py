@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import the_magi_system as magi
+from magi_cache import MagiCache
+
+
+def test_entries_persist_and_expire(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = MagiCache(path)
+    cache.put_response("MELCHIOR", "m1", "Ship  it?", "DECISION: YES")
+    cache.put_decision("Ship it?", ["m1", "m2", "m3"], {"decision": "PASSED"})
+    cache.close()
+
+    cache = MagiCache(path)
+    assert cache.get_response("MELCHIOR", "m1", "ship it?") == "DECISION: YES"
+    assert cache.get_decision("SHIP IT?", ["m1", "m2", "m3"]) == {"decision": "PASSED"}
+    assert cache.get_decision("Ship it?", ["m1", "m2", "other"]) is None
+    cache.close()
+
+    expired = MagiCache(path, ttl=-1)
+    expired.put_response("MELCHIOR", "m1", "Later?", "DECISION: NO")
+    assert expired.get_response("MELCHIOR", "m1", "Later?") is None
+    expired.close()
+
+
+def test_lru_is_bounded():
+    cache = MagiCache(":memory:", max_entries=2)
+    for i in range(5):
+        cache.put_response("CASPER", "m", f"q{i}", "x")
+    assert cache.stats["memory_entries"] == 2
+    assert cache.get_response("CASPER", "m", "q0") == "x"  # still on disk
+
+
+def test_invalidate_matches_whole_model_ids():
+    cache = MagiCache(":memory:")
+    cache.put_response("MELCHIOR", "org/m_1", "q", "x")
+    cache.put_response("MELCHIOR", "Org/M_1", "q", "x")
+    cache.put_response("CASPER", "orgXm_1", "q", "x")
+    cache.put_decision("q", ["org/m_1", "b", "c"], {})
+    cache.put_decision("r", ["a", "org/m_1"], {})
+    cache.put_decision("q", ["org/m_10", "b", "c"], {})
+
+    assert cache.invalidate(model_id="org/m_1") == 3
+    cache._lru.clear()
+    assert cache.get_response("MELCHIOR", "Org/M_1", "q") == "x"
+    assert cache.get_response("CASPER", "orgXm_1", "q") == "x"
+    assert cache.get_decision("q", ["org/m_10", "b", "c"]) == {}
+
+    assert cache.invalidate(question="Q") == 3
+    assert cache.invalidate() == 0
+
+
+def test_put_many_writes_everything():
+    cache = MagiCache(":memory:")
+    cache.put_many([("MELCHIOR", "m", "q", "x"), ("CASPER", "m", "q", "y")], [("q", ["m"], {"decision": "PASSED"})])
+    cache._lru.clear()
+    assert cache.get_response("CASPER", "m", "q") == "y"
+    assert cache.get_decision("q", ["m"]) == {"decision": "PASSED"}
+
+
+def test_votes_are_cached_off_the_event_loop(magi_stub):
+    server = magi_stub(reply=lambda model_id, prompt: "DECISION: YES")
+    cache = MagiCache(":memory:")
+    writers = []
+    put_many = cache.put_many
+    cache.put_many = lambda *args: writers.append(threading.current_thread()) or put_many(*args)
+
+    async def vote_and_audit():
+        # The audit waits for the third agent too, so no call is still in flight afterwards
+        result = await magi.run_magi_system("Ship it?", cache=cache, audit=True)
+        if result.audit is not None:
+            await result.audit
+        return result
+
+    first = asyncio.run(vote_and_audit())
+    requests = server.requests
+    second = asyncio.run(magi.run_magi_system("ship it?", cache=cache))
+
+    assert first.decision == second.decision == "PASSED"
+    assert server.requests == requests
+    assert second.cached_agents
+    assert writers and threading.main_thread() not in writers
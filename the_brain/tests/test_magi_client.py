@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from hf_stub_server import StubInferenceServer
+from magi_client import InferenceClient, InferenceQueueFull
+
+
+@pytest.fixture
+def stub():
+    server = StubInferenceServer(latency=0.05).start()
+    yield server
+    server.stop()
+
+
+def test_calls_share_keep_alive_connections(stub):
+    client = InferenceClient(stub.url, max_concurrency=2)
+
+    async def ask(n):
+        return await asyncio.gather(*(client.post("m", {"inputs": f"q{i}"}) for i in range(n)))
+
+    try:
+        answers = asyncio.run(ask(10))
+    finally:
+        client.close()
+    assert len(answers) == 10 and stub.requests == 10
+    assert stub.connections <= 2
+
+
+def test_full_queue_refuses_calls(stub):
+    client = InferenceClient(stub.url, max_concurrency=1, max_queue=1)
+
+    async def ask():
+        calls = [asyncio.ensure_future(client.post("m", {"inputs": "q"})) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceQueueFull):
+            await client.post("m", {"inputs": "q"})
+        await asyncio.gather(*calls)
+
+    try:
+        asyncio.run(ask())
+    finally:
+        client.close()
+    assert client.pending == 0
+
+
+
+def test_full_urls_bypass_the_base_url(stub):
+    client = InferenceClient("http://127.0.0.1:9/models")  # nothing listens on the discard port
+    try:
+        assert client.post_sync(f"{stub.url}/replica", {"inputs": "hi"})
+    finally:
+        client.close()
+    assert stub.requests == 1
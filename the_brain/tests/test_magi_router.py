@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+
+import the_magi_system as magi
+from magi_cache import MagiCache
+from magi_router import CLOSED, HALF_OPEN, OPEN, MagiRouter, RouteUnavailable
+
+DEAD = "http://127.0.0.1:9/models"  # nothing listens on the discard port
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _send(down):
+    async def send(endpoint, timeout):
+        if endpoint in down:
+            raise OSError(f"{endpoint} is down")
+        return endpoint
+    return send
+
+
+def test_fails_over_and_opens_the_circuit():
+    clock = Clock()
+    router = MagiRouter({"A": ["a", "a-replica"]}, failure_threshold=2, cooldown=5, clock=clock)
+    send = _send({"a"})
+    assert asyncio.run(router.call("A", send)) == "a-replica"
+    assert router.endpoints["a"].state == CLOSED
+    assert asyncio.run(router.call("A", send)) == "a-replica"
+    assert router.endpoints["a"].state == OPEN
+    assert router.candidates("A") == ["a-replica"]
+    assert router.stats["failovers"] == 2
+    assert router.stats["hedge_wins"] == 0
+
+
+def test_checking_availability_does_not_start_a_trial():
+    clock = Clock()
+    router = MagiRouter({"A": ["a"], "B": ["b", "a"]}, failure_threshold=1, cooldown=5, clock=clock)
+    asyncio.run(router.call("B", _send({"b"})))
+    assert router.endpoints["b"].state == OPEN
+
+    clock.now = 10
+    router.candidates("A")
+    router.candidates("B")
+    assert router.endpoints["b"].state == OPEN  # due for a trial, but none was sent
+
+    # The next call to B is the trial; it succeeds and closes the circuit
+    assert asyncio.run(router.call("B", _send(set()))) == "b"
+    assert router.endpoints["b"].state == CLOSED
+    assert asyncio.run(router.call("B", _send(set()))) == "b"
+
+
+def test_failed_trial_reopens_the_circuit():
+    clock = Clock()
+    router = MagiRouter({"A": ["a"]}, failure_threshold=1, cooldown=5, clock=clock)
+    with pytest.raises(OSError):
+        asyncio.run(router.call("A", _send({"a"})))
+    with pytest.raises(RouteUnavailable):
+        asyncio.run(router.call("A", _send(set())))
+
+    clock.now = 10
+    with pytest.raises(OSError):
+        asyncio.run(router.call("A", _send({"a"})))
+    assert router.endpoints["a"].state == OPEN
+    assert router.endpoints["a"].opened_at == 10
+
+
+def test_only_one_trial_at_a_time():
+    clock = Clock()
+    router = MagiRouter({"A": ["a"]}, failure_threshold=1, cooldown=5, clock=clock)
+    with pytest.raises(OSError):
+        asyncio.run(router.call("A", _send({"a"})))
+    clock.now = 10
+
+    async def slow(endpoint, timeout):
+        await asyncio.sleep(0.05)
+        return endpoint
+
+    async def two_calls():
+        trial = asyncio.ensure_future(router.call("A", slow))
+        await asyncio.sleep(0)
+        assert router.endpoints["a"].state == HALF_OPEN
+        with pytest.raises(RouteUnavailable):
+            await router.call("A", slow)
+        return await trial
+
+    assert asyncio.run(two_calls()) == "a"
+    assert router.endpoints["a"].state == CLOSED
+
+
+def test_hedges_a_slow_call_onto_the_replica():
+    router = MagiRouter({"A": ["a", "a-replica"]}, min_samples=5, hedge_budget=1.0)
+    delays = {"a": 0.001, "a-replica": 0.001}
+
+    async def send(endpoint, timeout):
+        await asyncio.sleep(delays[endpoint])
+        return endpoint
+
+    async def run():
+        for _ in range(10):
+            await router.call("A", send)
+        delays["a"] = 0.5
+        return await router.call("A", send)
+
+    assert asyncio.run(run()) == "a-replica"
+    assert router.stats["hedges"] == 1
+    assert router.stats["hedge_wins"] == 1
+
+
+def _reply(model_id, prompt):
+    # MELCHIOR's model says yes, the other two say no
+    return "DECISION: YES" if model_id == magi.MODEL_LOGIC else "DECISION: NO"
+
+
+@pytest.fixture
+def cache():
+    cache = MagiCache(":memory:")
+    yield cache
+    cache.close()
+
+
+def test_tally_counts_each_model_once():
+    votes = {"MELCHIOR": "YES", "BALTHASAR": "YES", "CASPER": "NO"}
+    assert magi.tally(votes) == "PASSED"
+    models = {"MELCHIOR": "m1", "BALTHASAR": "m1", "CASPER": "m2"}
+    assert magi.tally(votes, 0, models) == "INCONCLUSIVE"
+    assert magi.tally(votes, 1, models) is None
+
+
+def test_default_routes_never_cross_models(magi_stub):
+    stub = magi_stub(reply=_reply)
+    magi.MODEL_REPLICAS = {magi.MODEL_SAFETY: [f"{stub.url}/{magi.MODEL_SAFETY}"]}
+    router = magi.configure_router()
+    models = magi.agent_models()
+    for agent, route in router.routes.items():
+        assert {magi.model_of(endpoint) for endpoint in route} == {models[agent]}
+
+
+def test_replica_answer_is_cached_under_the_agents_model(magi_stub, cache):
+    stub = magi_stub(reply=_reply)
+    magi.MODEL_REPLICAS = {magi.MODEL_SAFETY: [f"{DEAD}/{magi.MODEL_SAFETY}", f"{stub.url}/{magi.MODEL_SAFETY}"]}
+    magi.configure_router(routes={"BALTHASAR": magi.MODEL_REPLICAS[magi.MODEL_SAFETY]})
+    result = asyncio.run(magi.run_magi_system("Replica?", cache=cache))
+    assert result.models["BALTHASAR"] == magi.MODEL_SAFETY
+    assert cache.get_response("BALTHASAR", magi.MODEL_SAFETY, "Replica?") == "DECISION: NO"
+    assert cache.get_decision("Replica?", magi.agent_models().values()) is not None
+
+
+def test_fallback_answer_is_cached_under_the_model_that_gave_it(magi_stub, cache):
+    magi_stub(reply=_reply)
+    # A hand-made route that falls back to another agent's model
+    magi.configure_router(routes={"BALTHASAR": [f"{DEAD}/{magi.MODEL_SAFETY}", magi.MODEL_LOGIC]})
+    result = asyncio.run(magi.run_magi_system("Fallback?", cache=cache))
+
+    assert result.models["BALTHASAR"] == magi.MODEL_LOGIC
+    assert cache.get_response("BALTHASAR", magi.MODEL_SAFETY, "Fallback?") is None
+    assert cache.get_response("BALTHASAR", magi.MODEL_LOGIC, "Fallback?") == "DECISION: YES"
+    # MELCHIOR and BALTHASAR both heard from MODEL_LOGIC: one yes, one no, no quorum
+    assert result.decision == "INCONCLUSIVE"
+    assert cache.get_decision("Fallback?", magi.agent_models().values()) is None
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import the_magi_system as magi
+
+
+def _votes(yes=(), slow=(), delay=1.0):
+    """Stub reply: YES from the models in `yes`, NO otherwise; `slow` models take `delay` s."""
+    def reply(model_id, prompt):
+        if model_id in slow:
+            time.sleep(delay)
+        return "DECISION: YES" if model_id in yes else "DECISION: NO"
+    return reply
+
+
+def test_tally():
+    assert magi.tally({"MELCHIOR": "YES", "BALTHASAR": "YES"}, pending=1) == "PASSED"
+    assert magi.tally({"MELCHIOR": "NO", "BALTHASAR": "NO"}) == "REJECTED"
+    assert magi.tally({"MELCHIOR": "YES", "BALTHASAR": "NO"}, pending=1) is None
+    assert magi.tally({"MELCHIOR": "YES", "BALTHASAR": "NO", "CASPER": "ABSTAIN"}) == "INCONCLUSIVE"
+
+
+def test_two_matching_votes_settle_without_the_slow_agent(magi_stub):
+    magi_stub(reply=_votes(slow={magi.MODEL_HUMANITY}, delay=2.0))
+    start = time.perf_counter()
+    result = asyncio.run(magi.run_magi_system("Ship it?"))
+    assert time.perf_counter() - start < 1.5
+    assert result.decision == "REJECTED"
+    assert sorted(result.deciding_agents) == ["BALTHASAR", "MELCHIOR"]
+
+
+def test_audit_records_the_slow_agent(magi_stub):
+    magi_stub(reply=_votes(yes={magi.MODEL_HUMANITY}, slow={magi.MODEL_HUMANITY}, delay=0.3))
+
+    async def vote():
+        result = await magi.run_magi_system("Ship it?", audit=True)
+        assert "CASPER" not in result.votes
+        await result.audit
+        return result
+
+    result = asyncio.run(vote())
+    assert result.decision == "REJECTED"
+    assert result.votes["CASPER"] == "YES"
+
+
+def test_cancelling_the_vote_cancels_the_agent_calls(magi_stub):
+    magi_stub(reply=_votes(slow={magi.MODEL_LOGIC, magi.MODEL_SAFETY, magi.MODEL_HUMANITY}, delay=0.5))
+
+    async def cancel_midway():
+        vote = asyncio.create_task(magi.run_magi_system("Ship it?"))
+        await asyncio.sleep(0.1)
+        vote.cancel()
+        await asyncio.gather(vote, return_exceptions=True)
+        await asyncio.sleep(0)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(cancel_midway()) == []
+
+
+def test_cancelling_a_routed_vote_cancels_the_routed_calls(magi_stub):
+    magi_stub(reply=_votes(slow={magi.MODEL_LOGIC, magi.MODEL_SAFETY, magi.MODEL_HUMANITY}, delay=0.5))
+    router = magi.configure_router()
+
+    async def cancel_midway():
+        vote = asyncio.create_task(magi.run_magi_system("Ship it?"))
+        await asyncio.sleep(0.1)
+        vote.cancel()
+        await asyncio.gather(vote, return_exceptions=True)
+        await asyncio.sleep(0)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(cancel_midway()) == []
+    assert not router._background
+
+
+def test_cancelled_call_stays_pending_until_its_thread_finishes(magi_stub):
+    magi_stub(reply=_votes(slow={"m"}, delay=0.3))
+    client = magi.get_client()
+
+    async def cancel_midway():
+        call = asyncio.create_task(client.post("m", {"inputs": "q"}))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        return client.pending
+
+    assert asyncio.run(cancel_midway()) == 1
+    time.sleep(0.5)
+    assert client.pending == 0
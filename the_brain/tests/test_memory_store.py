@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pytest
+
+from the_forebrain.hippocampus.memory_store import MemoryStore
+
+
+def _thoughts(path):
+    store = MemoryStore(path)
+    return [thought for segment in store.sealed for thought, _ in segment.records()]
+
+
+def _append(store, thought, metric=None):
+    store.append(thought, np.ones(4, dtype=np.float32), metric=metric)
+
+
+def _files(path):
+    return sorted(name for name in os.listdir(path) if name.startswith("seg-"))
+
+
+def test_segments_roll_and_reload(tmp_path):
+    store = MemoryStore(tmp_path, segment_rows=2)
+    for i in range(5):
+        _append(store, f"t{i}")
+    store.close()
+    assert _thoughts(tmp_path) == [f"t{i}" for i in range(5)]
+    assert len(MemoryStore(tmp_path).sealed) == 3
+
+
+def test_append_after_close_keeps_both(tmp_path):
+    store = MemoryStore(tmp_path)
+    _append(store, "first")
+    store.close()
+    _append(store, "second")
+    store.close()
+    assert _thoughts(tmp_path) == ["first", "second"]
+
+
+def test_compaction_keeps_this_sessions_segment(tmp_path):
+    for i in range(4):
+        store = MemoryStore(tmp_path)
+        _append(store, f"old{i}")
+        store.close()
+    store = MemoryStore(tmp_path)
+    _append(store, "new")
+    store.close()
+    assert store.compact()
+    assert sorted(_thoughts(tmp_path)) == ["new", "old0", "old1", "old2", "old3"]
+
+
+def test_compaction_drops_superseded_memories(tmp_path):
+    for i in range(4):
+        store = MemoryStore(tmp_path)
+        _append(store, "same" if i % 2 else f"t{i}")
+        store.close()
+    assert MemoryStore(tmp_path).compact()
+    assert _thoughts(tmp_path) == ["t0", "t2", "same"]
+
+
+def test_hippocampus_save_right_after_storing(tmp_path, monkeypatch, skeleton):
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    for session in range(4):
+        memory = skeleton["forebrain"].Hippocampus()
+        for i in range(5):
+            memory.store(f"s{session}-{i}", rng.standard_normal(8))
+        memory.save_to_disk()
+    memory = skeleton["forebrain"].Hippocampus()
+    memory.save_to_disk()
+    assert len(_thoughts(tmp_path / "hippocampus_memory")) == 20
+
+
+def test_reopening_with_another_metric_raises(tmp_path):
+    store = MemoryStore(tmp_path, metric="cosine")
+    _append(store, "t", metric="cosine")
+    store.close()
+    with pytest.raises(ValueError, match="cosine"):
+        MemoryStore(tmp_path, metric="dot")
+    with pytest.raises(ValueError):
+        _append(MemoryStore(tmp_path), "u", metric="dot")
+
+
+def test_files_still_mapped_are_deleted_later(tmp_path, monkeypatch):
+    for i in range(4):
+        store = MemoryStore(tmp_path)
+        _append(store, f"t{i}")
+        store.close()
+    store = MemoryStore(tmp_path)
+    before = _files(tmp_path)
+
+    # As on Windows, where a mapped file can't be removed
+    real_remove = os.remove
+
+    def refuse(path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(os, "remove", refuse)
+    assert store.compact()
+    merged = sorted(set(_files(tmp_path)) - set(before))
+    assert len(merged) == 3 and set(before) < set(_files(tmp_path))
+
+    monkeypatch.setattr(os, "remove", real_remove)
+    store.close()
+    assert _files(tmp_path) == merged
+    assert _thoughts(tmp_path) == ["t0", "t1", "t2", "t3"]
+
+
+def test_leftover_segment_files_are_removed_on_open(tmp_path):
+    store = MemoryStore(tmp_path)
+    _append(store, "kept")
+    store.close()
+    for ext in (".vec", ".txt", ".off"):
+        (tmp_path / f"seg-000099{ext}").write_bytes(b"")
+    MemoryStore(tmp_path)
+    assert _files(tmp_path) == ["seg-000000.off", "seg-000000.txt", "seg-000000.vec"]
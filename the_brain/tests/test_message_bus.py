@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from the_hindbrain.pons.message_bus import Pons, Topic
+
+
+def test_every_subscriber_sees_every_message():
+    pons = Pons(capacity=8)
+    a, b = pons.subscribe("thought", "a"), pons.subscribe("thought", "b")
+    for i in range(3):
+        pons.publish("thought", i)
+    assert a.drain() == [0, 1, 2]
+    assert [b.poll(), b.poll(), b.poll(), b.poll()] == [0, 1, 2, None]
+
+
+def test_slow_subscribers_skip_ahead_when_the_ring_wraps():
+    topic = Topic("sensory", capacity=4)
+    slow = topic.subscribe("slow")
+    for i in range(10):
+        topic.publish(i)
+    assert slow.lag == 10
+    assert slow.drain() == [6, 7, 8, 9]
+    assert slow.dropped == 6 and slow.received == 4
+    with pytest.raises(ValueError):
+        Topic("bad", capacity=6)
+
+
+def test_slots_are_released_once_everyone_has_read_them():
+    topic = Topic("frames", capacity=4)
+    a, b = topic.subscribe("a"), topic.subscribe("b")
+    topic.publish("x")
+    topic.publish("y")
+    a.drain()
+    assert topic._payloads[:2] == ["x", "y"]  # b hasn't read them yet
+    b.poll()
+    assert topic._payloads[:2] == [None, "y"]
+    a.close()
+    b.close()
+    assert topic._payloads == [None] * 4  # the last subscriber leaving frees what it never read
+    topic.publish("z")
+    assert topic._payloads == [None] * 4
+    assert topic.subscribe(from_start=True).poll() is None
+
+
+def test_from_start_replays_what_is_still_kept():
+    topic = Topic("plan", capacity=4)
+    live = topic.subscribe()
+    for i in range(6):
+        topic.publish(i)
+    assert topic.subscribe(from_start=True).drain() == [2, 3, 4, 5]
+    assert topic.subscribe().poll() is None
+    live.close()
+
+
+def test_readonly_payloads_are_views():
+    topic = Topic("frames")
+    sub = topic.subscribe()
+    frame = np.zeros((2, 2), dtype=np.uint8)
+    topic.publish(frame, readonly=True)
+    view = sub.get(timeout=1)
+    assert np.shares_memory(view, frame) and not view.flags.writeable
+    assert frame.flags.writeable
+    with pytest.raises(TimeoutError):
+        sub.get(timeout=0.01)
+
+
+def test_aget_wakes_on_a_publish_from_another_thread():
+    topic = Topic("reflex")
+    sub = topic.subscribe()
+
+    async def main():
+        waiter = asyncio.ensure_future(sub.aget())
+        await asyncio.sleep(0.01)
+        threading.Thread(target=topic.publish, args=("flinch",)).start()
+        return await asyncio.wait_for(waiter, 5)
+
+    assert asyncio.run(main()) == "flinch"
+
+
+def test_stats_do_not_change_state():
+    pons = Pons(topics=("stimulus",))
+    sub = pons.subscribe("stimulus", "forebrain")
+    for i in range(5):
+        pons.publish("stimulus", i)
+    sub.poll()
+    first = pons.stats["stimulus"]
+    second = pons.stats["stimulus"]
+    assert first["published"] == second["published"] == 5
+    assert second["rate_per_sec"] > 0
+    assert second["subscribers"] == {"forebrain": {"lag": 4, "received": 1, "dropped": 0}}
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+import pytest
+
+from the_forebrain.cortex.backends import THOUGHT_PROMPT, CortexBackend, FakeBackend, placeholder_reply
+from the_forebrain.cortex.micro_batcher import MicroBatcher
+
+
+class _GatedBackend(FakeBackend):
+    """FakeBackend whose first call waits until the test opens the gate."""
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+        self.batches = []
+
+    def generate_batch(self, prompts):
+        self.batches.append(list(prompts))
+        self.entered.set()
+        self.gate.wait(5)
+        return super().generate_batch(prompts)
+
+
+def test_placeholder_reply_recognizes_the_cortex_prompts():
+    assert placeholder_reply(THOUGHT_PROMPT.format(stimulus="a loud bang", context=[])) == \
+        "Analyzed thought about a loud bang"
+    assert placeholder_reply("Create a step-by-step plan for: rest") == "Plan for rest"
+    assert placeholder_reply("hello") == "Response to: hello"
+    with pytest.raises(NotImplementedError):
+        CortexBackend().generate_batch(["x"])
+
+
+def test_prompts_waiting_during_a_call_go_out_together():
+    backend = _GatedBackend(max_batch=4)
+    batcher = MicroBatcher(backend, max_batch=16)
+    assert batcher.max_batch == 4
+    first = batcher.submit("p0")
+    assert backend.entered.wait(5)
+    futures = [batcher.submit(f"p{i}") for i in range(1, 7)]
+    backend.gate.set()
+    assert first.result(5) == "Response to: p0"
+    assert [f.result(5) for f in futures] == [f"Response to: p{i}" for i in range(1, 7)]
+    batcher.close()
+    assert backend.batches == [["p0"], ["p1", "p2", "p3", "p4"], ["p5", "p6"]]
+    assert batcher.stats["batches"] == 3 and batcher.stats["items"] == 7
+
+
+def test_max_wait_holds_a_batch_open_for_stragglers():
+    backend = FakeBackend()
+    batcher = MicroBatcher(backend, max_batch=3, max_wait=5.0)
+    futures = [batcher.submit(f"p{i}") for i in range(3)]
+    assert [f.result(5) for f in futures] == [f"Response to: p{i}" for i in range(3)]
+    batcher.close()
+    assert backend.calls == 1
+
+
+def test_backend_errors_reach_every_caller_in_the_batch():
+    def reply(prompt):
+        raise ValueError("model down")
+
+    batcher = MicroBatcher(FakeBackend(reply=reply))
+    with pytest.raises(ValueError):
+        batcher.generate("p", timeout=5)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit("late")
+
+
+def test_cancelled_prompts_are_not_sent():
+    backend = _GatedBackend()
+    batcher = MicroBatcher(backend)
+    batcher.submit("first")
+    assert backend.entered.wait(5)
+    cancelled = batcher.submit("gave up")
+    kept = batcher.submit("kept")
+    assert cancelled.cancel()
+    backend.gate.set()
+    assert kept.result(5) == "Response to: kept"
+    batcher.close()
+    assert backend.batches == [["first"], ["kept"]]
+
+
+def test_agenerate_awaits_without_blocking_the_loop():
+    batcher = MicroBatcher(FakeBackend(latency=0.01))
+
+    async def main():
+        return await asyncio.gather(*(batcher.agenerate(f"p{i}") for i in range(5)))
+
+    assert asyncio.run(main()) == [f"Response to: p{i}" for i in range(5)]
+    batcher.close()
@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+import pytest
+
+from the_hindbrain.cerebellum.pid_controller import ControlLoop, PIDController
+
+
+def test_proportional_and_clamped_output_per_channel():
+    pid = PIDController(3, kp=[1.0, 2.0, 10.0], output_limits=(-5.0, 5.0))
+    pid.setpoint[:] = 1.0
+    assert pid.step([0.0, 0.0, 0.0], 0.01).tolist() == [1.0, 2.0, 5.0]
+    with pytest.raises(ValueError):
+        pid.step([0.0, 0.0, 0.0], 0.0)
+
+
+def test_integral_pauses_while_the_output_is_saturated():
+    pid = PIDController(1, kp=0.0, ki=1.0, output_limits=(-1.0, 1.0))
+    pid.setpoint[:] = 10.0
+    for _ in range(100):
+        pid.step([0.0], 0.1)
+    assert pid.output[0] == 1.0
+    assert pid.integral[0] == pytest.approx(1.0)  # wound up only until the output hit its limit
+
+
+def test_derivative_acts_on_the_measurement_not_the_setpoint():
+    pid = PIDController(1, kp=0.0, kd=1.0)
+    pid.step([0.0], 0.1)
+    pid.setpoint[:] = 5.0
+    assert pid.step([0.0], 0.1)[0] == 0.0
+    assert pid.step([1.0], 0.1)[0] == pytest.approx(-10.0)
+    pid.reset()
+    assert pid.step([1.0], 0.1)[0] == 0.0
+
+
+def test_control_loop_drives_a_plant_to_the_setpoint():
+    state = np.zeros(4)
+
+    def write(out):
+        state[:] += out * 0.2
+
+    pid = PIDController(4, kp=1.0)
+    pid.setpoint[:] = [1.0, -1.0, 2.0, 0.5]
+    loop = ControlLoop(pid, lambda: state.copy(), write, rate=500.0).start()
+    try:
+        deadline = time.monotonic() + 5
+        while loop.ticks < 100 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        loop.stop()
+    assert loop.spin == 0.0
+    assert np.allclose(state, pid.setpoint, atol=1e-3)
+    stats = loop.stats
+    assert stats["ticks"] >= 100 and stats["errors"] == 0 and stats["rate_hz"] == 500.0
+
+
+def test_failing_steps_are_counted_not_fatal():
+    def read():
+        raise OSError("sensor unplugged")
+
+    loop = ControlLoop(PIDController(1), read, lambda out: None, rate=1000.0).start()
+    try:
+        deadline = time.monotonic() + 5
+        while loop.errors < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        loop.stop()
+    assert loop.errors >= 5 and loop.ticks == loop.errors
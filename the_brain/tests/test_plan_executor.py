@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from the_hindbrain.cerebellum.plan_executor import (CANCELLED, DONE, FAILED, SKIPPED, TIMEOUT, Plan,
+                                                      PlanExecutor, Step)
+
+
+def test_numbered_plan_folds_preamble_and_sub_items():
+    plan = Plan.from_text("Here is the plan:\n1. a\n2. b\n   - sub\n3. c")
+    plan.validate()
+    assert [(s.name, s.description, s.deps) for s in plan.steps] == [
+        ("1", "a", ()), ("2", "b; sub", ("1",)), ("3", "c", ("2",))]
+
+
+def test_plain_lines_are_one_step_each():
+    plan = Plan.from_text("look around\nlisten\nreport", goal="scan")
+    assert plan.goal == "scan"
+    assert [s.description for s in plan.steps] == ["look around", "listen", "report"]
+    assert [s.deps for s in plan.steps] == [(), ("1",), ("2",)]
+
+
+def test_explicit_dependencies():
+    plan = Plan.from_text("1. a [after: none]\n2. b [after: none]\n3. c [after: 1, 2]")
+    plan.validate()
+    assert [s.deps for s in plan.steps] == [(), (), ("1", "2")]
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        Plan.from_text("1. a\n2. b [after: 9]").validate()
+
+
+def test_cerebellum_skips_a_plan_it_cannot_run(skeleton):
+    cerebellum = skeleton["hindbrain"].Cerebellum()
+    try:
+        assert cerebellum.execute_plan("1. a\n2. b [after: 9]") == []
+    finally:
+        cerebellum.stop()
+
+
+def _plan(*steps):
+    return Plan("test", [Step(name, action=action, deps=deps) for name, action, deps in steps])
+
+
+def test_independent_steps_run_concurrently_and_values_flow_to_dependents():
+    both = threading.Barrier(2, timeout=5)
+
+    def meet(value):
+        def action(ctx):
+            both.wait()  # only returns once both steps are running at the same time
+            return value
+        return action
+
+    executor = PlanExecutor(max_workers=2)
+    try:
+        results = executor.execute(_plan(
+            ("a", meet(1), ()), ("b", meet(2), ()),
+            ("sum", lambda ctx: ctx.inputs["a"] + ctx.inputs["b"], ("a", "b"))), timeout=5)
+    finally:
+        executor.shutdown()
+    assert [(r.name, r.status, r.value) for r in results] == [("a", DONE, 1), ("b", DONE, 2), ("sum", DONE, 3)]
+
+
+def test_failures_skip_dependents_and_timeouts_are_reported():
+    release = threading.Event()
+
+    def stall(ctx):
+        ctx.cancelled.wait(5)
+        release.set()
+
+    executor = PlanExecutor(default_timeout=0.05)
+    try:
+        run = executor.run(_plan(
+            ("boom", lambda ctx: 1 / 0, ()), ("after boom", lambda ctx: None, ("boom",)),
+            ("stall", stall, ()), ("after stall", lambda ctx: None, ("stall",))))
+        streamed = [r.name for r in run]
+        results = {r.name: r for r in run.wait(5)}
+    finally:
+        executor.shutdown()
+    assert sorted(streamed) == sorted(results)
+    assert results["boom"].status == FAILED and isinstance(results["boom"].error, ZeroDivisionError)
+    assert results["after boom"].status == SKIPPED
+    assert results["stall"].status == TIMEOUT and release.wait(5)
+    assert results["after stall"].status == SKIPPED
+
+
+def test_cancel_all_stops_running_and_pending_steps():
+    started = threading.Event()
+
+    def hold(ctx):
+        started.set()
+        ctx.cancelled.wait(5)
+
+    executor = PlanExecutor()
+    try:
+        run = executor.run(_plan(("hold", hold, ()), ("next", lambda ctx: None, ("hold",))))
+        assert started.wait(5)
+        executor.cancel_all("reflex")
+        results = run.wait(5)
+    finally:
+        executor.shutdown()
+    assert [(r.name, r.status) for r in results] == [("hold", CANCELLED), ("next", CANCELLED)]
+    assert run.cancelled.is_set()
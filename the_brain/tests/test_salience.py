@@ -0,0 +1,45 @@
+from the_midbrain.reticular_formation.salience_queue import SalienceQueue
+
+
+def test_queue_sheds_low_salience_under_pressure():
+    queue = SalienceQueue(capacity=8, dedup_window=0)
+    for i in range(8):
+        queue.push(f"routine {i}", 0.3)
+    assert queue.push("urgent", 0.9)
+    assert queue.stats["dropped"]["shed"] > 0
+    assert queue.pop() == "urgent"
+
+
+def test_attention_gate_sheds_routine_input_but_keeps_wake_words(skeleton):
+    gate = skeleton["midbrain"].AttentionGate(capacity=8)
+    for i in range(32):
+        gate.submit(f"movement at {i}", None)
+    assert gate.stats["dropped"]["shed"] > 0
+
+    gate.submit(None, "hey gemini, what was that?")
+    assert gate.next_stimulus() == "hey gemini, what was that?"
+
+
+def test_repeats_are_coalesced_and_recent_ones_dropped():
+    now = [0.0]
+    queue = SalienceQueue(capacity=8, dedup_window=2.0, clock=lambda: now[0])
+    assert queue.push("movement left", 0.3)
+    assert queue.push("movement left", 0.6)
+    assert queue.coalesced == 1 and queue.depth == 1
+    assert queue.pop() == "movement left"
+    assert not queue.push("movement left", 0.3)
+    assert queue.dropped["duplicate"] == 1
+    now[0] = 3.0
+    assert queue.push("movement left", 0.3)
+
+
+def test_backpressure_listeners_follow_the_watermarks():
+    queue = SalienceQueue(capacity=8, dedup_window=0)
+    events = []
+    queue.add_listener(events.append)
+    for i in range(6):
+        queue.push(f"question {i}", 0.9)
+    assert events == [True]
+    while queue.pop() is not None:
+        pass
+    assert events == [True, False]
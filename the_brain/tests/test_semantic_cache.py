@@ -0,0 +1,80 @@
+import numpy as np
+
+from the_forebrain.cortex.semantic_cache import SemanticCache
+
+VECTORS = {
+    "a loud bang": [1.0, 0.0, 0.0],
+    "a very loud bang": [0.99, 0.1, 0.0],
+    "a quiet hum": [0.0, 1.0, 0.0],
+    "bright light": [0.0, 0.0, 1.0],
+}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(**options):
+    clock = _Clock()
+    cache = SemanticCache(lambda text: np.array(VECTORS[text]), clock=clock, **options)
+    return cache, clock
+
+
+def test_near_duplicates_hit_and_distinct_texts_miss():
+    cache, _ = _cache(threshold=0.95)
+    result, key = cache.lookup("thought", "a loud bang")
+    assert result is None
+    cache.put("thought", key, "danger")
+    assert cache.lookup("thought", "a very loud bang")[0] == "danger"
+    assert cache.lookup("thought", "a quiet hum")[0] is None
+    assert cache.lookup("plan", "a loud bang")[0] is None  # kinds are kept apart
+    stats = cache.stats
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 1)
+    assert stats["hit_rate"] == 0.25
+
+
+def test_non_text_stimuli_are_not_cached():
+    cache, _ = _cache()
+    assert cache.lookup("thought", {"frame": 1}) == (None, None)
+    cache.put("thought", None, "ignored")
+    assert cache.stats["stored"] == 0
+
+
+def test_expired_entries_are_never_served():
+    cache, clock = _cache(ttl=10.0)
+    _, key = cache.lookup("thought", "a loud bang")
+    cache.put("thought", key, "danger")
+    clock.now = 9.0
+    assert cache.lookup("thought", "a loud bang")[0] == "danger"
+    clock.now = 11.0
+    assert cache.lookup("thought", "a loud bang")[0] is None
+    assert cache.stats["expired"] == 1 and cache.stats["entries"] == 0
+
+
+def test_full_cache_overwrites_the_least_recently_used_entry():
+    cache, clock = _cache(capacity=2)
+    for text in ("a loud bang", "a quiet hum"):
+        clock.now += 1
+        cache.put("thought", cache.lookup("thought", text)[1], text)
+    clock.now += 1
+    assert cache.lookup("thought", "a loud bang")[0] == "a loud bang"  # now the most recent
+    clock.now += 1
+    cache.put("thought", cache.lookup("thought", "bright light")[1], "bright light")
+    assert cache.lookup("thought", "a quiet hum")[0] is None
+    assert cache.lookup("thought", "a loud bang")[0] == "a loud bang"
+    assert cache.stats["evicted"] == 1
+
+
+def test_invalidate_drops_one_kind_or_all():
+    cache, _ = _cache()
+    for kind in ("thought", "plan"):
+        cache.put(kind, cache.lookup(kind, "a loud bang")[1], kind)
+    cache.invalidate("plan")
+    assert cache.lookup("plan", "a loud bang")[0] is None
+    assert cache.lookup("thought", "a loud bang")[0] == "thought"
+    cache.invalidate()
+    assert cache.lookup("thought", "a loud bang")[0] is None
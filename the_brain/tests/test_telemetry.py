@@ -0,0 +1,72 @@
+import json
+import urllib.request
+
+import pytest
+
+from telemetry import LatencyHistogram, Telemetry
+
+
+def test_percentiles_within_bucket_error():
+    histogram = LatencyHistogram()
+    for ns in range(1, 100_001):
+        histogram.record(ns * 1_000)
+    for p in (50, 90, 99):
+        assert histogram.percentile(p) == pytest.approx(p * 1_000_000, rel=0.04)
+    assert histogram.percentile(100) == histogram.max == 100_000_000
+    assert histogram.summary()["count"] == 100_000
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for ns in (0, 1, 5, 63):
+        histogram.record(ns)
+    assert [histogram.percentile(p) for p in (25, 50, 75, 100)] == [0, 1, 5, 63]
+
+
+def test_spans_and_instrumented_calls_are_recorded():
+    telemetry = Telemetry()
+
+    class Cortex:
+        def think(self, x):
+            return x * 2
+
+    cortex = Cortex()
+    telemetry.instrument(cortex, "think")
+    assert cortex.think(21) == 42
+    with telemetry.span("stage.think"):
+        pass
+    telemetry.record("reflex.latency", 0.002)
+
+    snapshot = telemetry.snapshot(reset=True)
+    assert {name: s["count"] for name, s in snapshot.items()} == {
+        "Cortex.think": 1, "reflex.latency": 1, "stage.think": 1}
+    assert snapshot["reflex.latency"]["max_ms"] == pytest.approx(2.0)
+    assert telemetry.snapshot()["Cortex.think"] == {"count": 0}
+
+
+def test_disabled_telemetry_changes_nothing():
+    telemetry = Telemetry(enabled=False)
+
+    class Sensor:
+        def scan(self):
+            return None
+
+    sensor = Sensor()
+    scan = sensor.scan
+    telemetry.instrument(sensor, "scan")
+    assert sensor.scan == scan
+    assert telemetry.span("a") is telemetry.span("b")
+    telemetry.record("x", 1.0)
+    assert telemetry.snapshot() == {}
+
+
+def test_snapshot_is_served_as_json():
+    telemetry = Telemetry()
+    telemetry.record("tick", 0.001)
+    server = telemetry.serve(port=0)
+    try:
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/") as response:
+            assert json.load(response)["tick"]["count"] == 1
+    finally:
+        telemetry.stop()
@@ -0,0 +1,73 @@
+import io
+import os
+import threading
+
+import pytest
+
+import tracing
+from tracing import DEBUG, ERROR, INFO, WARNING, Tracer
+
+
+def _tracer(**options):
+    stream = io.StringIO()
+    return Tracer(stream=stream, flush_interval=60, **options), stream
+
+
+def test_records_are_formatted_on_flush():
+    tracer, stream = _tracer()
+    tracer.log(INFO, "Memory", "Storing: %.5s...", "a long thought")
+    tracer.log(WARNING, "Vitals", "%s: CPU %.0f%%", "PAUSE", 87.4)
+    tracer.log(INFO, "Bad", "%d", "not a number")
+    assert stream.getvalue() == ""
+    tracer.flush()
+    assert stream.getvalue().splitlines() == [
+        "[Memory] Storing: a lon...", "[Vitals] WARNING: PAUSE: CPU 87%", "[Bad] %d ('not a number',)"]
+
+
+def test_levels_and_sampling():
+    tracer, stream = _tracer(level=WARNING)
+    tracer.log(DEBUG, "A", "hidden")
+    tracer.log(INFO, "A", "hidden")
+    for i in range(10):
+        tracer.log(ERROR, "Cerebellum", "failed %d", i, sample=5)
+    tracer.flush()
+    assert stream.getvalue().splitlines() == ["[Cerebellum] ERROR: failed 0 (1 in 5)",
+                                              "[Cerebellum] ERROR: failed 5 (1 in 5)"]
+
+
+def test_full_buffer_drops_the_oldest():
+    tracer, stream = _tracer(capacity=3)
+    tracer._writer = threading.current_thread()  # no background writer for this test
+    for i in range(5):
+        tracer.log(INFO, "T", "%d", i)
+    tracer.flush()
+    assert tracer.dropped == 2
+    assert stream.getvalue().splitlines() == ["[T] 2", "[T] 3", "[T] 4"]
+
+
+def test_warnings_wake_the_writer():
+    tracer, stream = _tracer()
+    tracer.log(WARNING, "Vitals", "hot")
+    for _ in range(100):
+        if stream.getvalue():
+            break
+        threading.Event().wait(0.01)
+    assert stream.getvalue() == "[Vitals] WARNING: hot\n"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_child_gets_a_fresh_writer():
+    tracer = tracing.get_tracer()
+    tracing.info("Test", "make sure the writer thread is running")
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        ok = tracer._writer is None and not tracer._buffer and not tracer._write_lock.locked()
+        os.write(write, b"1" if ok else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    try:
+        assert os.read(read, 1) == b"1"
+    finally:
+        os.close(read)
+        os.close(write)
@@ -0,0 +1,53 @@
+import json
+import os
+
+from the_midbrain.reticular_formation.trigger_engine import TriggerTable
+
+RULES = [
+    {"pattern": "loud_bang", "source": "audio", "exact": True, "reflex": "STARTLE"},
+    {"pattern": "gemini", "source": "audio", "priority": 0.9, "word": True},
+    {"pattern": "movement", "source": "vision", "priority": 0.4},
+]
+
+
+def _write(path, rules, mtime):
+    path.write_text(json.dumps(rules))
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_classify_by_source_and_kind():
+    table = TriggerTable(path=None, rules=RULES)
+    assert table.classify("LOUD_BANG", "audio") == ("STARTLE", None)
+    assert table.classify("a loud_bang nearby", "audio") == (None, None)  # exact rule
+    assert table.classify("hey Gemini, look", "audio") == (None, 0.9)
+    assert table.classify("geminis", "audio") == (None, None)  # word rule
+    assert table.classify("movement left", "audio") == (None, None)  # vision-only rule
+    assert table.classify("movement left", "vision") == (None, 0.4)
+
+
+def test_spans_point_into_the_original_text():
+    # Casefolding lengthens "İ" and "ß", which would shift offsets into the folded text
+    table = TriggerTable(path=None, rules=[{"pattern": "gemini"}, {"pattern": "strasse"}])
+    assert [(m.start, m.end) for m in table.scan("İİ hey GEMINI")] == [(7, 13)]
+    text = "Große Straße, gemini"
+    assert [text[m.start:m.end] for m in table.scan(text)] == ["Straße", "gemini"]
+
+
+def test_rules_file_is_hot_reloaded(tmp_path):
+    path = tmp_path / "triggers.json"
+    _write(path, RULES, 1_000_000_000)
+    table = TriggerTable(str(path), check_interval=0.0)
+    assert table.classify("hey gemini", "audio") == (None, 0.9)
+
+    _write(path, RULES + [{"pattern": "fire", "reflex": "FLEE"}], 2_000_000_000)
+    assert table.classify("fire!", "vision") == ("FLEE", None)
+    assert len(table) == 4
+
+
+def test_broken_rules_file_keeps_the_current_rules(tmp_path):
+    path = tmp_path / "triggers.json"
+    _write(path, RULES, 1_000_000_000)
+    table = TriggerTable(str(path), check_interval=0.0)
+    path.write_text("[{not json")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert table.classify("hey gemini", "audio") == (None, 0.9)
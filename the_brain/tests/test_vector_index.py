@@ -0,0 +1,91 @@
+import threading
+
+import numpy as np
+
+from the_forebrain.hippocampus.vector_index import VectorIndex
+
+
+def test_exact_search_finds_the_stored_vector():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16))
+    index = VectorIndex(dim=16)
+    index.add_batch(vectors)
+    ids, scores = index.search(vectors[123], k=3)
+    assert ids[0] == 123
+    assert scores[0] > 0.999
+
+
+def test_ivf_search_during_concurrent_stores():
+    rng = np.random.default_rng(0)
+    index = VectorIndex(dim=16, ivf_threshold=2_000, nprobe=64)
+    index.add_batch(rng.standard_normal((4_000, 16)))
+    assert index.is_approximate
+
+    stop = threading.Event()
+
+    def store():
+        writer_rng = np.random.default_rng(1)
+        while not stop.is_set():
+            index.add(writer_rng.standard_normal(16))
+
+    writer = threading.Thread(target=store)
+    writer.start()
+    try:
+        for _ in range(2_000):
+            ids, scores = index.search(rng.standard_normal(16), k=5)
+            assert len(ids) == len(scores) == 5
+            assert ids.max() < len(index)
+    finally:
+        stop.set()
+        writer.join()
+
+
+def test_exact_search_while_the_tail_grows():
+    rng = np.random.default_rng(0)
+    index = VectorIndex(dim=16)
+    index.add_batch(rng.standard_normal((8, 16)))
+    stop = threading.Event()
+
+    def store():
+        writer_rng = np.random.default_rng(1)
+        while not stop.is_set():
+            index.add_batch(writer_rng.standard_normal((64, 16)))
+
+    writer = threading.Thread(target=store)
+    writer.start()
+    try:
+        for _ in range(500):
+            ids, scores = index.search(rng.standard_normal(16), k=5)
+            assert np.all(np.isfinite(scores)) and np.all(np.abs(scores) <= 1.0 + 1e-5)
+    finally:
+        stop.set()
+        writer.join()
+
+
+def test_training_starts_once_under_concurrent_inserts(monkeypatch):
+    index = VectorIndex(dim=16, ivf_threshold=10_000)
+    index.add_batch(np.random.default_rng(0).standard_normal((1_000, 16)))
+    index.ivf_threshold = 1_000
+    started = []
+
+    def train():
+        started.append(threading.get_ident())
+        threading.Event().wait(0.2)
+        index._training = None
+
+    monkeypatch.setattr(index, "_train_ivf", train)
+    threads = [threading.Thread(target=index.maybe_train) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(started) == 1
+
+
+def test_training_sample_is_capped():
+    index = VectorIndex(dim=16, ivf_threshold=10_000)
+    index.TRAINING_SAMPLE = 2_000
+    index.add_batch(np.random.default_rng(0).standard_normal((20_000, 16)))
+    centroids, list_ids, _ = index._ivf
+    assert len(centroids) <= 2_000 // 39
+    assert sum(len(ids.view()) for ids in list_ids) == 20_000
@@ -0,0 +1,107 @@
+import types
+
+import pytest
+
+from brainstem import BrainRuntime
+from the_hindbrain.medulla.vitals_sampler import VitalsSampler
+
+
+class _Sampler:
+    """Stands in for VitalsSampler with readings set by the test."""
+    def __init__(self):
+        self.snapshot = types.SimpleNamespace(cpu_smoothed=0.0, mem_smoothed=0.0)
+
+    def set(self, cpu, memory=0.0):
+        self.snapshot = types.SimpleNamespace(cpu_smoothed=cpu, mem_smoothed=memory)
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def vitals(skeleton):
+    monitor = skeleton["hindbrain"].AutonomicMonitor(sample_rate=50.0)
+    monitor.sampler.stop()
+    monitor.sampler = _Sampler()
+    return monitor
+
+
+def _levels(vitals, readings):
+    levels = []
+    for reading in readings:
+        vitals.sampler.set(*reading)
+        levels.append(vitals.check_system_status())
+    return levels
+
+
+def test_cpu_levels_step_down_only_past_the_hysteresis(vitals):
+    readings = [(50,), (80,), (72,), (69,), (90,), (81,), (79,), (96,), (92,), (89,)]
+    assert _levels(vitals, readings) == ["ok", "throttle", "throttle", "ok", "pause", "pause", "throttle",
+                                         "shutdown", "shutdown", "pause"]
+    assert not vitals.needs_shutdown()
+
+
+def test_memory_pauses_but_never_shuts_down(vitals):
+    assert _levels(vitals, [(10, 88), (10, 99), (10, 89), (10, 86), (10, 50)]) == [
+        "throttle", "pause", "pause", "throttle", "ok"]
+    assert not vitals.needs_shutdown()
+    # The worse of CPU and memory wins
+    assert _levels(vitals, [(96, 99)]) == ["shutdown"]
+
+
+def _proc(tmp_path, busy, total, used_kb):
+    (tmp_path / "self" / "fd").mkdir(parents=True, exist_ok=True)
+    (tmp_path / "stat").write_text(f"cpu  {busy} 0 0 {total - busy} 0 0 0 0 0 0\n")
+    (tmp_path / "self" / "stat").write_text("1 (python) S " + " ".join(["0"] * 20) + "\n")
+    (tmp_path / "self" / "statm").write_text("100 50 0 0 0 0 0\n")
+    (tmp_path / "meminfo").write_text(f"MemTotal: 1000 kB\nMemAvailable: {1000 - used_kb} kB\n")
+    (tmp_path / "loadavg").write_text("0.50 0.40 0.30 1/100 1\n")
+
+
+def test_sampler_smooths_and_keeps_history(tmp_path):
+    sampler = VitalsSampler(history=4, smoothing=0.5, proc=str(tmp_path))
+    _proc(tmp_path, busy=0, total=100, used_kb=200)
+    first = sampler.sample()
+    assert first.mem_percent == first.mem_smoothed == 20.0
+
+    _proc(tmp_path, busy=80, total=200, used_kb=600)  # 80% busy since the last sample
+    second = sampler.sample()
+    assert second.cpu_percent == pytest.approx(80.0)
+    assert second.cpu_smoothed == pytest.approx(40.0)
+    assert second.mem_smoothed == pytest.approx(40.0)
+
+    for _ in range(5):
+        sampler.sample()
+    assert sampler.history().shape == (4, 7)
+
+
+def test_sampler_keeps_the_last_estimate_when_proc_is_unreadable(tmp_path):
+    sampler = VitalsSampler(proc=str(tmp_path))
+    _proc(tmp_path, busy=0, total=100, used_kb=300)
+    sampler.sample()
+    (tmp_path / "meminfo").unlink()
+    assert sampler.sample().mem_smoothed == 30.0
+
+
+class _Sensor:
+    def __init__(self):
+        self.calls = []
+
+    def on_backpressure(self, throttled):
+        self.calls.append(throttled)
+
+
+def test_sensors_stay_paused_while_vitals_or_the_queue_hold_them():
+    brain = types.SimpleNamespace(vision=_Sensor(), audio=_Sensor())
+    runtime = BrainRuntime(brain, max_cognition_tasks=1)
+    runtime._hold_sensors("vitals", True)
+    runtime._hold_sensors("queue", True)
+    runtime._hold_sensors("queue", False)  # the queue drained, but vitals still say pause
+    assert brain.vision.calls == [True]
+    runtime._hold_sensors("vitals", False)
+    assert brain.vision.calls == brain.audio.calls == [True, False]
+
+    runtime._hold_sensors("queue", True)
+    runtime._hold_sensors("vitals", True)
+    runtime._hold_sensors("vitals", False)  # vitals recovered during queue overload
+    assert brain.vision.calls == [True, False, True]
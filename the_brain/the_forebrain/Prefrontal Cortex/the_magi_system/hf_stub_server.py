@@ -0,0 +1,107 @@
+# hf_stub_server.py
+# A local stand-in for the Hugging Face Inference API.
+#
+# Point the MAGI system at it with HF_API_URL (or an InferenceClient) to try
+# things out without a token or network access:
+#
+#   python hf_stub_server.py --port 8765 --latency 0.2
+#   HF_API_URL=http://127.0.0.1:8765/models python the_magi_system.py
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubInferenceServer(ThreadingHTTPServer):
+    """Answers POST /models/<model_id> with a canned generated_text reply.
+
+    latency:      seconds to sleep before each reply
+    reply:        function (model_id, prompt) -> generated text
+    tail_rate:    fraction of requests that are slow (a latency tail, e.g. 0.05)
+    tail_latency: seconds those slow requests take
+    """
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, reply=None, tail_rate=0.0, tail_latency=1.0,
+                 seed=0):
+        super().__init__(address, _StubHandler)
+        self.latency = latency
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self._random = random.Random(seed)
+        self.reply = reply or (lambda model_id, prompt: "Looks reasonable. DECISION: YES")
+        self.connections = 0  # TCP connections accepted (shows keep-alive reuse)
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/models"
+
+    def start(self):
+        """Serves on a daemon thread and returns self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server._count_lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        with self.server._count_lock:
+            self.server.requests += 1
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        model_id = self.path.split("/models/", 1)[-1]
+
+        with self.server._count_lock:
+            slow = self.server.tail_rate and self.server._random.random() < self.server.tail_rate
+        delay = self.server.tail_latency if slow else self.server.latency
+        if delay:
+            time.sleep(delay)
+        inputs = payload.get("inputs", "")
+        if isinstance(inputs, list):
+            # Batched request: one output per input
+            outputs = [{"generated_text": self.server.reply(model_id, prompt)} for prompt in inputs]
+        else:
+            outputs = [{"generated_text": self.server.reply(model_id, inputs)}]
+        body = json.dumps(outputs).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the HF Inference API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per reply")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of replies that are slow")
+    parser.add_argument("--tail-latency", type=float, default=1.0, help="seconds per slow reply")
+    args = parser.parse_args()
+
+    server = StubInferenceServer(("127.0.0.1", args.port), latency=args.latency, tail_rate=args.tail_rate,
+                                 tail_latency=args.tail_latency)
+    print(f"Stub HF inference API on {server.url} (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,163 @@
+# magi_cache.py
+# Persistent cache for MAGI decisions and per-agent answers.
+#
+# An in-memory LRU sits in front of a SQLite file, so repeated questions are
+# answered without any inference call, even across restarts. Two kinds of
+# entries are kept, both keyed on the normalised question text:
+#
+#   decision  - the final vote, keyed on all three model ids
+#   response  - one agent's raw answer, keyed on that agent and its model id
+#
+# Because agent answers are cached on their own, changing one model id only
+# costs a call to that one agent.
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_question(question: str) -> str:
+    """Lower-cases and collapses whitespace so trivially different phrasings share an entry."""
+    return re.sub(r"\s+", " ", question).strip().lower()
+
+
+class MagiCache:
+    """Two-level (memory LRU + SQLite) cache with TTL expiry.
+
+    path:        SQLite file (":memory:" for a throwaway cache)
+    ttl:         seconds an entry stays valid
+    max_entries: size of the in-memory LRU
+    """
+    def __init__(self, path: str = "magi_cache.sqlite3", ttl: float = 24 * 3600, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()  # (kind, model, question) -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS magi_cache ("
+            " kind TEXT, model TEXT, question TEXT, value TEXT, expires_at REAL,"
+            " PRIMARY KEY (kind, model, question))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS magi_cache_question ON magi_cache (question)")
+        self._db.commit()
+
+    # --- 1. PUBLIC API ---
+
+    def get_response(self, agent: str, model_id: str, question: str) -> Optional[str]:
+        return self._get(("response", f"{agent}:{model_id}", normalize_question(question)))
+
+    def put_response(self, agent: str, model_id: str, question: str, response: str):
+        self._put(("response", f"{agent}:{model_id}", normalize_question(question)), response)
+
+    def get_decision(self, question: str, model_ids) -> Optional[dict]:
+        value = self._get(("decision", "|".join(model_ids), normalize_question(question)))
+        return json.loads(value) if value is not None else None
+
+    def put_decision(self, question: str, model_ids, decision: dict):
+        self._put(("decision", "|".join(model_ids), normalize_question(question)), json.dumps(decision))
+
+    def put_many(self, responses=(), decisions=()):
+        """Stores several entries in one SQLite commit.
+
+        responses: [(agent, model_id, question, response), ...]
+        decisions: [(question, model_ids, decision), ...]
+        """
+        items = [(("response", f"{agent}:{model_id}", normalize_question(question)), response)
+                 for agent, model_id, question, response in responses]
+        items += [(("decision", "|".join(model_ids), normalize_question(question)), json.dumps(decision))
+                  for question, model_ids, decision in decisions]
+        self._put_many(items)
+
+    def invalidate(self, question: Optional[str] = None, model_id: Optional[str] = None) -> int:
+        """Drops entries for a question and/or any entry involving a model id (all if neither).
+
+        Returns the number of on-disk entries removed.
+        """
+        question = normalize_question(question) if question is not None else None
+
+        def matches(kind, model, q):
+            return (question is None or q == question) and (model_id is None or model_id in model.split("|")
+                                                             or model.endswith(f":{model_id}"))
+        # The same test in SQL, so SQLite filters the rows instead of Python
+        # reading every one of them
+        where, args = [], {}
+        if question is not None:
+            where.append("question = :question")
+            args["question"] = question
+        if model_id is not None:
+            where.append("(instr('|' || model || '|', '|' || :model || '|') > 0"
+                         " OR substr(model, -length(:model) - 1) = ':' || :model)")
+            args["model"] = model_id
+        sql = "DELETE FROM magi_cache" + (" WHERE " + " AND ".join(where) if where else "")
+        with self._lock:
+            for key in [key for key in self._lru if matches(*key)]:
+                del self._lru[key]
+            removed = self._db.execute(sql, args).rowcount
+            self._db.commit()
+        return removed
+
+    def purge_expired(self) -> int:
+        """Removes expired entries from disk; returns how many were removed."""
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM magi_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+        return cursor.rowcount
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self._lru)}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # --- 2. LRU + SQLITE ---
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM magi_cache WHERE kind = ? AND model = ? AND question = ?", key
+                ).fetchone()
+                entry = tuple(row) if row else None
+                if entry is not None:
+                    self._remember(key, entry)
+            else:
+                self._lru.move_to_end(key)
+
+            if entry is None or entry[1] < now:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key, value):
+        self._put_many([(key, value)])
+
+    def _put_many(self, items):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            for key, value in items:
+                self._remember(key, (value, expires_at))
+            self._db.executemany("INSERT OR REPLACE INTO magi_cache VALUES (?, ?, ?, ?, ?)",
+                                 [key + (value, expires_at) for key, value in items])
+            self._db.commit()
+
+    def _remember(self, key, entry):
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
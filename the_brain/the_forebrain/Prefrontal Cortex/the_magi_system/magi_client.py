@@ -0,0 +1,89 @@
+# magi_client.py
+# Shared HTTP client layer for the MAGI agents.
+#
+# One requests.Session (with a per-host connection pool) is reused by every
+# agent call, so TCP+TLS handshakes are paid once per connection instead of
+# once per call. Calls run on a fixed-size worker pool, which caps how many
+# inference requests are in flight; anything beyond that waits in a bounded
+# queue and is refused once the queue is full.
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+
+Timeout = Union[float, tuple]
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when more calls are waiting than the client's queue allows."""
+
+
+class InferenceClient:
+    """Pooled keep-alive client for an inference endpoint.
+
+    base_url:        e.g. "https://api-inference.huggingface.co/models"
+    max_concurrency: calls in flight at once (also the connection pool size)
+    max_queue:       calls allowed to wait for a free slot before refusing
+    timeout:         default per-call timeout, seconds or (connect, read)
+    """
+    def __init__(self, base_url: str, token: Optional[str] = None, max_concurrency: int = 6,
+                 max_queue: int = 64, timeout: Timeout = (10, 120)):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        # requests is imported here, not at module level, so importing the MAGI
+        # system stays cheap until the first client is actually needed
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="magi-http")
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Calls in flight plus calls waiting in the queue."""
+        return self._pending
+
+    def post_sync(self, model_id: str, payload: dict, timeout: Optional[Timeout] = None):
+        """Blocking POST to <base_url>/<model_id> (or to model_id itself if it is a full URL,
+        e.g. a replica); returns the decoded JSON body."""
+        url = model_id if "://" in model_id else f"{self.base_url}/{model_id}"
+        resp = self.session.post(url, json=payload,
+                                 timeout=timeout if timeout is not None else self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def post(self, model_id: str, payload: dict, timeout: Optional[Timeout] = None):
+        """Awaitable POST, run on the client's bounded worker pool."""
+        with self._pending_lock:
+            if self._pending >= self.max_concurrency + self.max_queue:
+                raise InferenceQueueFull(f"{self._pending} inference calls already pending")
+            self._pending += 1
+        try:
+            call = self._executor.submit(self.post_sync, model_id, payload, timeout)
+        except BaseException:
+            self._done()
+            raise
+        # Counted until the worker thread is really done: cancelling the awaiting
+        # task doesn't stop an HTTP call that has already started
+        call.add_done_callback(self._done)
+        return await asyncio.wrap_future(call)
+
+    def _done(self, _call=None):
+        with self._pending_lock:
+            self._pending -= 1
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
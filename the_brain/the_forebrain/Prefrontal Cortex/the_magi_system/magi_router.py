@@ -0,0 +1,276 @@
+# magi_router.py
+# Latency-aware routing of MAGI agent calls across model endpoints.
+#
+# Every call's outcome is measured, per endpoint: an EWMA of latency for
+# steering away from slow endpoints, and percentiles over a window of recent
+# calls for hedging and timeouts. This replaces the hypothalamus sketch's
+# static health table with numbers from real calls.
+#
+# Each agent has a route: its endpoints in order of preference, all serving
+# the agent's own model (the model and its replicas), so routing never changes
+# which model answers and the three MAGI keep their different voices. A call
+# goes to the first healthy endpoint, unless its EWMA is more than
+# `slow_factor` times the fastest one's, in which case it moves to the back.
+# If the chosen endpoint hasn't answered by its p95, one hedged duplicate goes
+# to the next endpoint and whichever answers first wins. The slower call is
+# left to finish in the background so its latency still counts (the HTTP
+# thread can't be stopped anyway). Hedges are capped at `hedge_budget` of all
+# calls, so a slow endpoint can't double the load. A failure before the hedge
+# fires fails over straight away.
+#
+# Endpoints that keep failing are skipped by a circuit breaker: after
+# `failure_threshold` failures in a row it opens for `cooldown` seconds. After
+# that the next call sent there is a trial (half-open) and no other call goes
+# there until it returns: success closes the circuit, failure reopens it.
+#
+# Once an endpoint has enough samples, its read timeout shrinks from the
+# client default (120 s) to `timeout_factor` x its p99.
+
+import asyncio
+import bisect
+import collections
+import time
+from typing import Awaitable, Callable, Optional
+
+import tracing
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class RouteUnavailable(RuntimeError):
+    """Raised when every endpoint of a route has its circuit open."""
+
+
+class EndpointStats:
+    """Latency and failure tracking plus the circuit breaker for one endpoint.
+
+    window: recent successful latencies kept for percentiles
+    alpha:  EWMA weight of the newest latency
+    """
+    def __init__(self, name: str, window: int = 256, alpha: float = 0.2):
+        self.name = name
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._recent = collections.deque(maxlen=window)
+        self._sorted: list = []
+
+    def record(self, seconds: float):
+        self.calls += 1
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+        if len(self._recent) == self._recent.maxlen:
+            self._sorted.pop(bisect.bisect_left(self._sorted, self._recent[0]))
+        self._recent.append(seconds)
+        bisect.insort(self._sorted, seconds)
+
+    def record_failure(self, threshold: int, now: float):
+        self.calls += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= threshold:
+            if self.state != OPEN:
+                tracing.warning("MAGI", "Circuit open for %s after %d failures", self.name,
+                                self.consecutive_failures)
+            self.state = OPEN
+            self.opened_at = now
+
+    def available(self, cooldown: float, now: float) -> bool:
+        """Whether a call may go here: closed, or open past its cooldown (a trial is due)."""
+        if self.state == OPEN:
+            return now - self.opened_at >= cooldown
+        return self.state == CLOSED  # half-open: the trial call is still out
+
+    def sending(self):
+        """Marks a call as sent; on an open circuit it is the trial."""
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+
+    def abandoned(self):
+        """A call was cancelled before it returned; a trial is due again."""
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+
+    @property
+    def samples(self) -> int:
+        return len(self._sorted)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._sorted:
+            return None
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+    def snapshot(self) -> dict:
+        ms = lambda s: None if s is None else s * 1000
+        return {"state": self.state, "calls": self.calls, "failures": self.failures,
+                "ewma_ms": ms(self.ewma), "p50_ms": ms(self.percentile(0.5)),
+                "p95_ms": ms(self.percentile(0.95)), "p99_ms": ms(self.percentile(0.99))}
+
+
+class MagiRouter:
+    """Routes each agent's calls over its endpoints with hedging and circuit breaking.
+
+    routes:            agent -> [endpoint, ...] in order of preference
+    hedge_quantile:    hedge once the call has taken longer than this percentile
+    hedge_budget:      most hedges as a fraction of calls
+    min_samples:       latencies needed before an endpoint's percentiles are trusted
+    failure_threshold: failures in a row that open an endpoint's circuit
+    cooldown:          seconds an open circuit waits before a trial call
+    slow_factor:       an endpoint this many times slower (EWMA) than the route's
+                       fastest is tried last
+    timeout_factor:    read timeout = this x p99 once trusted (None = keep the client's)
+    max_timeout:       longest read timeout, seconds (the client default)
+    """
+    def __init__(self, routes: dict, hedge_quantile: float = 0.95, hedge_budget: float = 0.1,
+                 min_samples: int = 20, failure_threshold: int = 3, cooldown: float = 30.0,
+                 slow_factor: float = 3.0, timeout_factor: Optional[float] = 4.0, max_timeout: float = 120.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.routes = {agent: list(endpoints) for agent, endpoints in routes.items()}
+        self.hedge_quantile = hedge_quantile
+        self.hedge_budget = hedge_budget
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slow_factor = slow_factor
+        self.timeout_factor = timeout_factor
+        self.max_timeout = max_timeout
+        self.clock = clock
+        self.endpoints = {name: EndpointStats(name) for endpoints in self.routes.values() for name in endpoints}
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self._background: set = set()
+
+    # --- 1. CHOOSING ENDPOINTS ---
+
+    def candidates(self, agent: str) -> list:
+        """The route's endpoints that may be called now, in the order to try them."""
+        now = self.clock()
+        usable = [name for name in self.routes[agent] if self.endpoints[name].available(self.cooldown, now)]
+        measured = [self.endpoints[name].ewma for name in usable if self.endpoints[name].ewma is not None]
+        if not measured:
+            return usable
+        limit = self.slow_factor * min(measured)
+        # Stable sort: preference order, with much slower endpoints moved to the back
+        return sorted(usable, key=lambda name: (self.endpoints[name].ewma or 0.0) > limit)
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        stats = self.endpoints[endpoint]
+        if stats.samples < self.min_samples or self.hedges >= self.hedge_budget * max(self.calls, 1):
+            return None
+        return stats.percentile(self.hedge_quantile)
+
+    def timeout(self, endpoint: str, default=None):
+        """Read timeout for a call: `timeout_factor` x p99 once trusted, else `default`."""
+        stats = self.endpoints[endpoint]
+        if self.timeout_factor is None or stats.samples < self.min_samples:
+            return default
+        read = min(self.max_timeout, max(1.0, self.timeout_factor * stats.percentile(0.99)))
+        connect = default[0] if isinstance(default, tuple) else 10
+        return (connect, read)
+
+    # --- 2. CALLING ---
+
+    async def call(self, agent: str, send: Callable[[str, object], Awaitable], timeout=None):
+        """Runs send(endpoint, timeout) on the best endpoint, hedging or failing over as needed.
+
+        timeout: caller's timeout; when given it is used as is instead of the adaptive one
+        """
+        self.calls += 1
+        order = self.candidates(agent)
+        if not order:
+            raise RouteUnavailable(f"Every endpoint for {agent} has its circuit open")
+        running = {}  # task -> endpoint
+        last_error = None
+        hedged = None
+
+        def launch(endpoint):
+            self.endpoints[endpoint].sending()
+            task = asyncio.ensure_future(self._timed(endpoint, send, timeout or self.timeout(endpoint)))
+            running[task] = endpoint
+
+        def next_backup():
+            # Still usable now? (another call may have taken a trial slot meanwhile)
+            while backups:
+                endpoint = backups.pop(0)
+                if self.endpoints[endpoint].available(self.cooldown, self.clock()):
+                    return endpoint
+            return None
+
+        launch(order[0])
+        backups = order[1:]
+        delay = self.hedge_delay(order[0]) if backups else None
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The primary is past its p95: race a duplicate on the next endpoint
+                    hedged = next_backup()
+                    if hedged is not None:
+                        self.hedges += 1
+                        tracing.debug("MAGI", "Hedging %s: %s slower than %.0f ms", agent, order[0], delay * 1000)
+                        launch(hedged)
+                    delay = None
+                    continue
+                for task in done:
+                    endpoint = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if endpoint == hedged:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = error
+                if not running:
+                    # Failed before any hedge: fail over to the next endpoint
+                    backup = next_backup()
+                    if backup is not None:
+                        self.failovers += 1
+                        launch(backup)
+                        delay = None
+            raise last_error
+        except asyncio.CancelledError:
+            # The caller gave up, so nobody wants the losing calls either
+            for task in running:
+                task.cancel()
+            raise
+        finally:
+            for task in running:
+                # Losing calls finish in the background so their latency is still recorded
+                self._background.add(task)
+                task.add_done_callback(self._settled)
+
+    def _settled(self, task):
+        self._background.discard(task)
+        if not task.cancelled():
+            task.exception()  # already recorded as a failure; don't warn about it again
+
+    async def _timed(self, endpoint: str, send, timeout):
+        start = time.perf_counter()
+        try:
+            result = await send(endpoint, timeout)
+        except asyncio.CancelledError:
+            self.endpoints[endpoint].abandoned()
+            raise
+        except Exception:
+            self.endpoints[endpoint].record_failure(self.failure_threshold, self.clock())
+            raise
+        self.endpoints[endpoint].record(time.perf_counter() - start)
+        return result
+
+    # --- 3. METRICS ---
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "endpoints": {name: stats.snapshot() for name, stats in self.endpoints.items()},
+        }
@@ -1,9 +1,22 @@
 import os
 import re
+import sys
+import time
 import asyncio
-import requests
+from dataclasses import dataclass, field
 from typing import Optional
 
+from magi_cache import MagiCache
+from magi_client import InferenceClient
+from magi_router import MagiRouter
+
+# The MAGI system also runs on its own from this folder; make the brain's
+# shared modules (tracing) importable either way
+_BRAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if _BRAIN_DIR not in sys.path:
+    sys.path.append(_BRAIN_DIR)
+import tracing
+
 # NOTE:
 # This version uses the Hugging Face Inference API so you can use free/community-hosted
 # models (or HF's free tier). Create a free Hugging Face account and set:
@@ -14,26 +27,128 @@ from typing import Optional
 # and `MODEL_HUMANITY` to other models available on https://huggingface.co/models.
 
 # --- 1. CONFIGURE (Hugging Face) MODELS ---
-HF_TOKEN = os.getenv("HF_API_TOKEN")
-if not HF_TOKEN:
-    # We don't raise here to keep UX smooth; requests will fail if token missing.
-    print("Warning: HF_API_TOKEN not set. Hugging Face Inference calls will likely fail.")
-
 # Example models (instruction-capable / smaller models suitable for free-tier use)
 MODEL_LOGIC = "google/flan-t5-large"        # MELCHIOR - logical / reasoning
 MODEL_SAFETY = "bigscience/bloomz-1b1"     # BALTHASAR - pragmatic / safety
 MODEL_HUMANITY = "google/flan-t5-small"    # CASPER - humanist / intuitive
 
-HF_API_URL = "https://api-inference.huggingface.co/models"
+# Override to point at a local stub (see hf_stub_server.py) or a private endpoint
+HF_API_URL = os.getenv("HF_API_URL", "https://api-inference.huggingface.co/models")
+
+# Shared keep-alive client; every agent call goes through it
+_client: Optional[InferenceClient] = None
+
+def configure_client(max_concurrency: int = 6, max_queue: int = 64, timeout=(10, 120),
+                     base_url: Optional[str] = None) -> InferenceClient:
+    """(Re)creates the shared client used by the query_* agents."""
+    global _client
+    if _client is not None:
+        _client.close()
+    # The token is read when the first client is made, not at import time
+    token = os.getenv("HF_API_TOKEN")
+    if not token and not base_url:
+        # We don't raise here to keep UX smooth; requests will fail if token missing.
+        tracing.warning("MAGI", "HF_API_TOKEN not set. Hugging Face Inference calls will likely fail.")
+    _client = InferenceClient(base_url or HF_API_URL, token=token, max_concurrency=max_concurrency,
+                              max_queue=max_queue, timeout=timeout)
+    return _client
+
+def get_client() -> InferenceClient:
+    """Returns the shared client, creating it with default settings on first use."""
+    return _client or configure_client()
+
+# Shared decision cache; off until configure_cache() is called
+_cache: Optional[MagiCache] = None
+
+def configure_cache(path: str = "magi_cache.sqlite3", ttl: float = 24 * 3600,
+                    max_entries: int = 1024) -> MagiCache:
+    """Turns on the shared MAGI cache used by run_magi_system."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = MagiCache(path, ttl=ttl, max_entries=max_entries)
+    return _cache
+
+# Other deployments of the same model: model id -> [full URL, ...]. The router
+# hedges and fails over between a model and its replicas only, never to another
+# agent's model, so the three MAGI stay three independent voices.
+MODEL_REPLICAS: dict = {}
+
+def model_of(endpoint: str) -> str:
+    """The model id an endpoint (model id or replica URL) serves."""
+    for model_id, replicas in MODEL_REPLICAS.items():
+        if endpoint in replicas:
+            return model_id
+    return endpoint
+
+# Shared router; off (every agent calls its own model) until configure_router() is called
+_router: Optional[MagiRouter] = None
+
+def configure_router(routes: Optional[dict] = None, enabled: bool = True, **options) -> Optional[MagiRouter]:
+    """Turns on latency-aware routing with hedged requests for the query_* agents.
+
+    routes:  agent -> [endpoint, ...] in order of preference; by default each
+             agent's own model followed by its MODEL_REPLICAS
+    enabled: False turns routing off again (agents call their own model directly)
+    options go to MagiRouter (hedge_quantile, hedge_budget, cooldown, ...).
+    """
+    global _router
+    if not enabled:
+        _router = None
+        return None
+    if routes is None:
+        routes = {agent: [model] + list(MODEL_REPLICAS.get(model, ())) for agent, model in agent_models().items()}
+    _router = MagiRouter(routes, **options)
+    return _router
+
+def get_router() -> Optional[MagiRouter]:
+    return _router
+
+def _build_payload(prompt, max_length: Optional[int] = 256) -> dict:
+    return {"inputs": prompt, "parameters": {"max_new_tokens": max_length}}
 
 def _hf_post_sync(model_id: str, prompt: str, max_length: Optional[int] = 256):
-    """Synchronous POST to Hugging Face Inference API. Wrapped in asyncio with to_thread."""
-    headers = {"Authorization": f"Bearer {HF_TOKEN}"} if HF_TOKEN else {}
-    payload = {"inputs": prompt, "parameters": {"max_new_tokens": max_length}}
-    resp = requests.post(f"{HF_API_URL}/{model_id}", json=payload, headers=headers, timeout=120)
-    resp.raise_for_status()
-    data = resp.json()
+    """Synchronous POST to Hugging Face Inference API through the shared client."""
+    return _parse_hf_response(get_client().post_sync(model_id, _build_payload(prompt, max_length)))
 
+async def _hf_post(model_id: str, prompt: str, client: Optional[InferenceClient] = None,
+                   timeout=None, max_length: Optional[int] = 256) -> str:
+    """Awaitable POST on the client's bounded, pooled worker threads."""
+    client = client or get_client()
+    data = await client.post(model_id, _build_payload(prompt, max_length), timeout=timeout)
+    return _parse_hf_response(data)
+
+async def _hf_post_batch(model_id: str, prompts: list, client: Optional[InferenceClient] = None,
+                         timeout=None, max_length: Optional[int] = 256) -> list:
+    """One batched request (list of inputs) -> one generated text per prompt.
+
+    Batches don't go through the router: their latency grows with the batch
+    size and would skew the per-call percentiles it hedges on, and a hedged
+    batch would duplicate every prompt in it.
+    """
+    client = client or get_client()
+    data = await client.post(model_id, _build_payload(prompts, max_length), timeout=timeout)
+    if not isinstance(data, list) or len(data) != len(prompts):
+        raise RuntimeError(f"HF batch response has {len(data) if isinstance(data, list) else 'no'} "
+                           f"outputs for {len(prompts)} inputs")
+    return [_parse_hf_response(item) for item in data]
+
+async def _agent_post(agent: str, model_id: str, prompt: str, client: Optional[InferenceClient] = None,
+                      timeout=None) -> tuple:
+    """One agent call: straight to its model, or through the shared router if configured.
+
+    Returns (id of the model that answered, text).
+    """
+    if _router is None or agent not in _router.routes:
+        return model_id, await _hf_post(model_id, prompt, client, timeout)
+
+    async def send(endpoint, call_timeout):
+        return model_of(endpoint), await _hf_post(endpoint, prompt, client, call_timeout)
+
+    return await _router.call(agent, send, timeout)
+
+def _parse_hf_response(data):
+    """Extracts the generated text from an HF inference response."""
     # Response formats vary by model and HF runtime. Try common possibilities.
     if isinstance(data, dict) and "error" in data:
         raise RuntimeError(f"HF inference error: {data['error']}")
@@ -49,26 +164,34 @@ def _hf_post_sync(model_id: str, prompt: str, max_length: Optional[int] = 256):
 
 # --- 2. DEFINE THE 3 AI AGENTS (as async functions) ---
 
-async def query_melchior(prompt: str) -> str:
+AGENT_PROMPTS = {
+    "MELCHIOR": "You are MELCHIOR, a purely logical analyst. Answer succinctly and conclude with 'DECISION: [YES/NO]'.\n\n",
+    "BALTHASAR": "You are BALTHASAR, a protective and pragmatic advisor. Answer with practical concerns and conclude with 'DECISION: [YES/NO]'.\n\n",
+    "CASPER": "You are CASPER, an empathetic and intuitive advisor. Speak from the heart and conclude with 'DECISION: [YES/NO]'.\n\n",
+}
+
+def agent_prompt(agent: str, question: str) -> str:
+    return AGENT_PROMPTS[agent] + f"Question: {question}\n"
+
+async def ask_agent(agent: str, question: str, client: Optional[InferenceClient] = None, timeout=None) -> tuple:
+    """Asks one agent; returns (id of the model that answered, text)."""
+    return await _agent_post(agent, agent_models()[agent], agent_prompt(agent, question), client, timeout)
+
+async def query_melchior(prompt: str, client: Optional[InferenceClient] = None, timeout=None) -> str:
     """The Scientist - uses an instruction-following HF model for logical reasoning.
 
-    Runs the HF call in a thread so it can be awaited concurrently with other agents.
+    Runs the HF call on the shared client's worker pool so it can be awaited
+    concurrently with other agents.
     """
-    system_prompt = "You are MELCHIOR, a purely logical analyst. Answer succinctly and conclude with 'DECISION: [YES/NO]'.\n\n" \
-                    f"Question: {prompt}\n"
-    return await asyncio.to_thread(_hf_post_sync, MODEL_LOGIC, system_prompt)
+    return (await ask_agent("MELCHIOR", prompt, client, timeout))[1]
 
-async def query_balthasar(prompt: str) -> str:
+async def query_balthasar(prompt: str, client: Optional[InferenceClient] = None, timeout=None) -> str:
     """The Mother/Pragmatist - pragmatic/safety-focused HF model."""
-    system_prompt = "You are BALTHASAR, a protective and pragmatic advisor. Answer with practical concerns and conclude with 'DECISION: [YES/NO]'.\n\n" \
-                    f"Question: {prompt}\n"
-    return await asyncio.to_thread(_hf_post_sync, MODEL_SAFETY, system_prompt)
+    return (await ask_agent("BALTHASAR", prompt, client, timeout))[1]
 
-async def query_casper(prompt: str) -> str:
+async def query_casper(prompt: str, client: Optional[InferenceClient] = None, timeout=None) -> str:
     """The Humanist/Intuitive - uses a more conversational HF model."""
-    system_prompt = "You are CASPER, an empathetic and intuitive advisor. Speak from the heart and conclude with 'DECISION: [YES/NO]'.\n\n" \
-                    f"Question: {prompt}\n"
-    return await asyncio.to_thread(_hf_post_sync, MODEL_HUMANITY, system_prompt)
+    return (await ask_agent("CASPER", prompt, client, timeout))[1]
 
 # --- 3. THE ORCHESTRATOR AND VOTING ---
 
@@ -79,53 +202,282 @@ def parse_vote(response_text):
         return match.group(1).upper()
     return "ABSTAIN" # If the AI fails to follow instructions
 
-async def run_magi_system(main_question):
-    print(f"--- ❓ MAGI QUERY --- \n{main_question}\n")
-    
-    # Run all three AI queries in parallel
-    tasks = [
-        query_melchior(main_question),
-        query_balthasar(main_question),
-        query_casper(main_question)
-    ]
-    responses = await asyncio.gather(*tasks)
-    
-    melchior_response, balthasar_response, casper_response = responses
+AGENTS = {
+    "MELCHIOR": query_melchior,
+    "BALTHASAR": query_balthasar,
+    "CASPER": query_casper,
+}
 
-    # Parse the votes
-    votes = {
-        "MELCHIOR": parse_vote(melchior_response),
-        "BALTHASAR": parse_vote(balthasar_response),
-        "CASPER": parse_vote(casper_response)
-    }
+def agent_models() -> dict:
+    """Current model id per agent (read at call time so the MODEL_* globals can be swapped)."""
+    return {"MELCHIOR": MODEL_LOGIC, "BALTHASAR": MODEL_SAFETY, "CASPER": MODEL_HUMANITY}
 
-    print("--- 🗳️ VOTES ---")
-    print(f"MELCHIOR (Logic): {votes['MELCHIOR']}")
-    print(f"BALTHASAR (Safety): {votes['BALTHASAR']}")
-    print(f"CASPER (Humanity): {votes['CASPER']}\n")
+@dataclass
+class MagiResult:
+    """Outcome of one MAGI vote.
 
-    # Tally the votes
+    votes/responses/timings hold the agents heard so far; with audit=True the
+    `audit` task fills in the rest once the slower agents answer.
+    """
+    question: str
+    decision: str
+    deciding_agents: list
+    votes: dict = field(default_factory=dict)
+    responses: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)  # agent -> seconds
+    models: dict = field(default_factory=dict)  # agent -> id of the model that answered
+    cached_agents: list = field(default_factory=list)  # answers served from the cache
+    elapsed: float = 0.0
+    audit: Optional[asyncio.Task] = None
+
+def tally(votes, pending=0, models=None):
+    """PASSED/REJECTED once two votes agree, INCONCLUSIVE once that can't happen, else None.
+
+    models: agent -> model that answered; answers from the same model count as one vote
+    """
+    if models:
+        distinct = {}
+        for agent, vote in votes.items():
+            distinct.setdefault(models.get(agent, agent), vote)
+        votes = distinct
     vote_list = list(votes.values())
     yes_votes = vote_list.count("YES")
     no_votes = vote_list.count("NO")
-
-    final_decision = "INCONCLUSIVE"
     if yes_votes >= 2:
-        final_decision = "PASSED"
-    elif no_votes >= 2:
-        final_decision = "REJECTED"
+        return "PASSED"
+    if no_votes >= 2:
+        return "REJECTED"
+    if yes_votes + pending < 2 and no_votes + pending < 2:
+        return "INCONCLUSIVE"
+    return None
+
+async def _timed_query(name, question, client, timeout):
+    start = time.perf_counter()
+    try:
+        model_id, response = await ask_agent(name, question, client, timeout)
+    except Exception as e:
+        # A failed agent abstains rather than sinking the whole vote
+        model_id, response = agent_models()[name], f"ERROR: {e}"
+    return name, response, time.perf_counter() - start, model_id
+
+def _record(result, name, response, seconds, model_id):
+    result.responses[name] = response
+    result.votes[name] = parse_vote(response)
+    result.timings[name] = seconds
+    result.models[name] = model_id
+
+def _answers(result, names):
+    """Cache entries for the named agents' answers, errors left out.
+
+    Each is keyed on the model that actually answered (a router may have used a replica's).
+    """
+    return [(name, result.models[name], result.question, result.responses[name])
+            for name in names if not result.responses[name].startswith("ERROR: ")]
+
+async def _cache_writes(cache, answers=(), decisions=()):
+    """Stores answers and decisions in one SQLite commit, run off the event loop."""
+    if cache is not None and (answers or decisions):
+        await asyncio.to_thread(cache.put_many, answers, decisions)
+
+def _cacheable(result, models):
+    """A decision is cached only if every agent answered with its own model, without errors."""
+    return (all(result.models.get(name) == model_id for name, model_id in models.items() if name in result.models)
+            and not any(r.startswith("ERROR: ") for r in result.responses.values()))
+
+async def _finish_audit(result, pending, cache=None):
+    """Waits for the agents that didn't decide the vote and records their answers."""
+    for next_done in asyncio.as_completed(pending):
+        name, *answer = await next_done
+        _record(result, name, *answer)
+        await _cache_writes(cache, _answers(result, [name]))
+    return result
+
+async def run_magi_system(main_question, client: Optional[InferenceClient] = None, timeout=None,
+                          audit: bool = False, cache: Optional[MagiCache] = None) -> MagiResult:
+    """Asks all three agents and returns as soon as the vote is settled.
+
+    Votes are tallied as each answer arrives, so two matching votes decide
+    without waiting for the slowest model. The remaining call is cancelled,
+    or with audit=True left running in the background (see MagiResult.audit).
+
+    client:  an InferenceClient to use instead of the shared one
+    timeout: per-call timeout override, seconds or (connect, read)
+    cache:   a MagiCache to use instead of the shared one (see configure_cache)
+    """
+    tracing.info("MAGI", "--- ❓ MAGI QUERY --- \n%s\n", main_question)
+    start = time.perf_counter()
+    cache = cache or _cache
+    models = agent_models()
+    result = MagiResult(main_question, "INCONCLUSIVE", [])
 
-    print(f"--- 🏛️ FINAL DECISION: {final_decision} ---")
+    # A cached decision for the same question and models needs no calls at all
+    if cache is not None:
+        cached = cache.get_decision(main_question, models.values())
+        if cached is not None:
+            result.decision = cached["decision"]
+            result.votes = cached["votes"]
+            result.deciding_agents = result.cached_agents = list(cached["votes"])
+            result.elapsed = time.perf_counter() - start
+            tracing.info("MAGI", "--- 🏛️ FINAL DECISION: %s (cached) ---", result.decision)
+            return result
+
+    # Reuse cached per-agent answers; only query the agents we haven't heard from
+    pending = set()
+    for name in AGENTS:
+        response = cache.get_response(name, models[name], main_question) if cache is not None else None
+        if response is not None:
+            _record(result, name, response, 0.0, models[name])
+            result.cached_agents.append(name)
+            result.deciding_agents.append(name)
+        else:
+            # Run the remaining AI queries in parallel
+            pending.add(asyncio.create_task(_timed_query(name, main_question, client, timeout)))
+
+    answered = []
+    try:
+        # Tally the votes as they come in
+        final_decision = tally(result.votes, len(pending), result.models)
+        while pending and final_decision is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name, response, seconds, model_id = task.result()
+                _record(result, name, response, seconds, model_id)
+                answered.append(name)
+                result.deciding_agents.append(name)
+                tracing.debug("MAGI", "%s: %s (%.2fs)", name, result.votes[name], seconds)
+            final_decision = tally(result.votes, len(pending), result.models)
+
+        result.decision = final_decision or "INCONCLUSIVE"
+        result.elapsed = time.perf_counter() - start
+        if pending and audit:
+            result.audit = asyncio.create_task(_finish_audit(result, pending, cache))
+            pending = set()
+    finally:
+        # Settled, failed or cancelled by the caller: the calls nobody waits for
+        # give their client slots back
+        for task in pending:
+            task.cancel()
+    decisions = []
+    if cache is not None and _cacheable(result, models):
+        decisions.append((main_question, list(models.values()),
+                          {"decision": result.decision, "votes": dict(result.votes)}))
+    await _cache_writes(cache, _answers(result, answered), decisions)
+
+    tracing.info("MAGI", "--- 🏛️ FINAL DECISION: %s (%s) ---", result.decision, ", ".join(result.deciding_agents))
 
     # Optional: Print the full reasoning
-    # print("\n--- REASONING ---")
-    # print(f"\n[MELCHIOR]:\n{melchior_response}")
-    # print(f"\n[BALTHASAR]:\n{balthasar_response}")
-    # print(f"\n[CASPER]:\n{casper_response}")
+    # tracing.info("MAGI", "--- REASONING ---")
+    # for name, response in result.responses.items():
+    #     tracing.info("MAGI", "[%s]:\n%s", name, response)
+
+    return result
+
+# --- 4. BATCHED EVALUATION ---
+
+async def iter_magi_batch(questions, batch_size: int = 16, client: Optional[InferenceClient] = None,
+                          timeout=None, cache: Optional[MagiCache] = None):
+    """Votes on many questions, yielding (index, MagiResult) as each one is settled.
+
+    Each agent's prompts are sent in micro-batches of `batch_size` inputs per
+    request, and all three agents' batches run concurrently (bounded by the
+    client). A question is yielded as soon as two votes agree.
+    """
+    cache = cache or _cache
+    models = agent_models()
+    results = [MagiResult(question, "INCONCLUSIVE", []) for question in questions]
+    settled = [False] * len(questions)
+
+    # Cached decisions and agent answers first; batch up whatever is left per agent
+    todo = {name: [] for name in AGENTS}
+    for i, result in enumerate(results):
+        cached = cache.get_decision(result.question, models.values()) if cache is not None else None
+        if cached is not None:
+            result.decision, result.votes = cached["decision"], cached["votes"]
+            result.deciding_agents = result.cached_agents = list(cached["votes"])
+            settled[i] = True
+            yield i, result
+            continue
+        for name in AGENTS:
+            response = cache.get_response(name, models[name], result.question) if cache is not None else None
+            if response is not None:
+                _record(result, name, response, 0.0, models[name])
+                result.cached_agents.append(name)
+            else:
+                todo[name].append(i)
+
+    async def run_batch(name, indices):
+        start = time.perf_counter()
+        prompts = [agent_prompt(name, results[i].question) for i in indices]
+        try:
+            responses = await _hf_post_batch(models[name], prompts, client, timeout)
+        except Exception as e:
+            responses = [f"ERROR: {e}"] * len(indices)
+        return name, indices, responses, time.perf_counter() - start
+
+    pending = {
+        asyncio.create_task(run_batch(name, indices[lo:lo + batch_size]))
+        for name, indices in todo.items()
+        for lo in range(0, len(indices), batch_size)
+    }
+    try:
+        outstanding = [0] * len(questions)  # agent answers still to come, per question
+        for indices in todo.values():
+            for i in indices:
+                outstanding[i] += 1
+
+        # Questions that cached agent answers already settle
+        for i, result in enumerate(results):
+            decision = None if settled[i] else tally(result.votes, outstanding[i], result.models)
+            if decision is not None:
+                settled[i] = True
+                result.decision = decision
+                result.deciding_agents = list(result.votes)
+                yield i, result
+
+        for next_done in asyncio.as_completed(pending):
+            name, indices, responses, seconds = await next_done
+            answers, decisions, decided = [], [], []
+            for i, response in zip(indices, responses):
+                result = results[i]
+                _record(result, name, response, seconds, models[name])
+                answers += _answers(result, [name])
+                outstanding[i] -= 1
+                if settled[i]:
+                    continue
+                result.deciding_agents.append(name)
+                decision = tally(result.votes, outstanding[i], result.models)
+                if decision is not None:
+                    settled[i] = True
+                    result.decision = decision
+                    decided.append(i)
+                    if cache is not None and _cacheable(result, models):
+                        decisions.append((result.question, list(models.values()),
+                                          {"decision": decision, "votes": dict(result.votes)}))
+            # One commit per finished batch
+            await _cache_writes(cache, answers, decisions)
+            for i in decided:
+                yield i, results[i]
+    finally:
+        # The caller may stop iterating early: don't leave batches running for nobody
+        for task in pending:
+            task.cancel()
 
-    return final_decision
+async def run_magi_batch(questions, batch_size: int = 16, client: Optional[InferenceClient] = None,
+                         timeout=None, cache: Optional[MagiCache] = None) -> list:
+    """Votes on many questions at once and returns their MagiResults in input order."""
+    questions = list(questions)
+    tracing.info("MAGI", "--- ❓ MAGI BATCH --- %d questions", len(questions))
+    start = time.perf_counter()
+    results = [None] * len(questions)
+    async for i, result in iter_magi_batch(questions, batch_size, client, timeout, cache):
+        result.elapsed = time.perf_counter() - start
+        results[i] = result
+    elapsed = time.perf_counter() - start
+    rate = len(questions) / elapsed if elapsed else float("inf")
+    tracing.info("MAGI", "--- 🏛️ BATCH DONE: %d decisions in %.2fs (%.1f questions/s) ---", len(questions), elapsed, rate)
+    return results
 
-# --- 4. RUN IT ---
+# --- 5. RUN IT ---
 if __name__ == "__main__":
     question = "Should we shut down the server for 15 minutes during peak hours to apply a critical security patch that plugs a 0-day exploit?"
     
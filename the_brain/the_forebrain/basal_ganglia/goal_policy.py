@@ -0,0 +1,254 @@
+# goal_policy.py
+# The DecisionMaker's policy: which goal to pursue for a thought (the basal
+# ganglia's action selection).
+#
+# A thought's state features are its embedding plus a bias term, and every
+# candidate goal has a column of weights, so scoring all goals for a batch of
+# thoughts is one matrix product: (thoughts, dim + 1) @ (dim + 1, goals). The
+# chosen goal is the best-scoring one. An untrained policy scores goals by how
+# similar their text is to the thought; training replaces that with learned
+# weights.
+#
+# Training is offline, with REINFORCE (policy gradient with a baseline) in a
+# simulated environment. SituationEnv runs `envs` episodes side by side in
+# lockstep: each env is in one of a set of situations (a stimulus and the
+# reward every goal earns in it), observed as the embedding of the Cortex's
+# thought about the stimulus plus noise, since a thought is what the
+# DecisionMaker is given. Picking the best goal resolves the situation and a
+# new one arrives; otherwise it usually lingers. Stepping every env, sampling every action and
+# computing the gradient are whole-array operations, so a few hundred
+# thousand steps take seconds on one CPU core.
+#
+#   python -m the_forebrain.basal_ganglia.goal_policy --out goal_policy.npz
+#   BRAIN_POLICY=goal_policy.npz python skelital_structure_of_the_brain.py
+
+import argparse
+import time
+
+import numpy as np
+
+import tracing
+from the_forebrain.cortex.backends import THOUGHT_PROMPT, placeholder_reply
+
+GOALS = ("avoid danger", "investigate movement", "answer the speaker", "note it and carry on")
+
+# (stimulus, reward of each goal in GOALS); the stimuli are the kind the
+# AttentionGate passes on to the forebrain: movement from the VisionSensor and
+# speech that matched a trigger. Reflex triggers (fast_moving_object,
+# loud_bang) are handled in the hindbrain and never reach the DecisionMaker.
+SITUATIONS = (
+    ("movement left", (-0.2, 1.0, -0.5, 0.2)),
+    ("movement top-right", (-0.2, 1.0, -0.5, 0.2)),
+    ("movement bottom", (-0.2, 1.0, -0.5, 0.2)),
+    ("gemini, something is burning", (1.0, 0.3, -0.5, -1.0)),
+    ("gemini, watch out behind you", (1.0, 0.2, -0.5, -1.0)),
+    ("gemini, can you hear me", (-0.5, -0.2, 1.0, -0.3)),
+    ("gemini, what should we do next", (-0.5, -0.2, 1.0, -0.3)),
+    ("gemini, the fan is humming again", (-0.5, 0.0, -0.2, 1.0)),
+    ("untranscribed_speech 1.2s", (-0.3, 0.3, -0.2, 1.0)),
+)
+
+
+def as_thought(stimulus):
+    """The thought the Cortex's default backend has about a stimulus."""
+    return placeholder_reply(THOUGHT_PROMPT.format(stimulus=stimulus, context=[]))
+
+
+# --- 1. POLICY ---
+
+class GoalPolicy:
+    """Linear softmax policy over a fixed set of candidate goals.
+
+    goals:    candidate goal texts
+    embedder: text -> vectors (an Embedder; default: a new one)
+    weights:  (dim + 1, len(goals)) array; None = score goals by text similarity
+    """
+    def __init__(self, goals=GOALS, embedder=None, weights=None):
+        if embedder is None:
+            from the_forebrain.cortex.embeddings import Embedder
+            embedder = Embedder()
+        self.goals = tuple(goals)
+        self.embedder = embedder
+        if weights is None:
+            weights = np.zeros((embedder.dim + 1, len(self.goals)), dtype=np.float32)
+            weights[:-1] = embedder.embed_batch(list(self.goals)).T
+        weights = np.asarray(weights, dtype=np.float32)
+        if weights.shape != (embedder.dim + 1, len(self.goals)):
+            raise ValueError(f"Weights of shape {weights.shape} don't fit {len(self.goals)} goals "
+                             f"over {embedder.dim}-dim embeddings")
+        self.weights = weights
+
+    def state(self, vectors):
+        """Embeddings (n, dim) -> state features (n, dim + 1)."""
+        features = np.empty((len(vectors), self.weights.shape[0]), dtype=np.float32)
+        features[:, :-1] = vectors
+        features[:, -1] = 1.0
+        return features
+
+    def scores(self, features):
+        """Every goal's score for every state, (n, goals), in one matrix product."""
+        return features @ self.weights
+
+    def probabilities(self, features):
+        scores = self.scores(features)
+        scores -= scores.max(axis=-1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=-1, keepdims=True)
+        return scores
+
+    def sample(self, features, rng):
+        """Draws one goal index per state from the softmax (for exploration while training)."""
+        cumulative = np.cumsum(self.probabilities(features), axis=-1)
+        draws = rng.random((len(features), 1), dtype=np.float32)
+        return np.minimum((draws > cumulative).sum(axis=-1), len(self.goals) - 1)
+
+    def choose(self, vectors):
+        """Best goal index per embedding."""
+        return self.scores(self.state(vectors)).argmax(axis=-1)
+
+    def choose_goals(self, thoughts):
+        """The best goal for each thought (texts), all scored at once."""
+        if not thoughts:
+            return []
+        return [self.goals[i] for i in self.choose(self.embedder.embed_batch(list(thoughts)))]
+
+    def save(self, path):
+        np.savez(path, weights=self.weights, goals=np.array(self.goals))
+
+    @classmethod
+    def load(cls, path, embedder=None):
+        with np.load(path) as saved:
+            return cls([str(g) for g in saved["goals"]], embedder, saved["weights"])
+
+
+# --- 2. SIMULATED ENVIRONMENT ---
+
+class SituationEnv:
+    """Many simulated episodes stepped together.
+
+    policy:     supplies the goals and the embedder observations are made with
+    situations: [(stimulus, rewards per goal), ...]
+    thought:    thought(stimulus) -> the text the DecisionMaker sees for it
+    envs:       episodes run side by side
+    horizon:    steps per episode
+    persist:    chance an unresolved situation is still there next step
+    noise:      standard deviation of the noise added to observations
+    """
+    def __init__(self, policy, situations=SITUATIONS, envs=256, horizon=16, persist=0.8, noise=0.03, seed=0,
+                 thought=as_thought):
+        texts = [thought(stimulus) for stimulus, _ in situations]
+        self.rewards = np.array([rewards for _, rewards in situations], dtype=np.float32)
+        if self.rewards.shape[1] != len(policy.goals):
+            raise ValueError(f"Situations reward {self.rewards.shape[1]} goals, the policy has {len(policy.goals)}")
+        self.prototypes = policy.embedder.embed_batch(texts)
+        self.best = self.rewards.argmax(axis=1)
+        self.envs = envs
+        self.horizon = horizon
+        self.persist = persist
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.situation = np.zeros(envs, dtype=np.int64)
+        self.t = 0
+        self._observation = np.empty((envs, self.prototypes.shape[1]), dtype=np.float32)
+
+    def reset(self):
+        """Starts a new episode in every env; returns the observations (envs, dim)."""
+        self.situation = self.rng.integers(len(self.prototypes), size=self.envs)
+        self.t = 0
+        return self._observe()
+
+    def step(self, actions):
+        """Applies one goal index per env; returns (observations, rewards, done)."""
+        rewards = self.rewards[self.situation, actions]
+        resolved = actions == self.best[self.situation]
+        moves = resolved | (self.rng.random(self.envs) >= self.persist)
+        self.situation = np.where(moves, self.rng.integers(len(self.prototypes), size=self.envs), self.situation)
+        self.t += 1
+        return self._observe(), rewards, self.t >= self.horizon
+
+    def _observe(self):
+        # The observation buffer is reused: callers copy what they keep
+        self._observation[...] = self.rng.standard_normal(self._observation.shape, dtype=np.float32)
+        self._observation *= self.noise
+        self._observation += self.prototypes[self.situation]
+        return self._observation
+
+
+# --- 3. TRAINING ---
+
+def train(policy, env, batches=300, learning_rate=2.0, gamma=0.9, seed=0, log_every=50):
+    """REINFORCE over batches of `env.envs` parallel episodes; updates policy.weights in place.
+
+    Returns the mean reward per step of every batch.
+    """
+    rng = np.random.default_rng(seed)
+    steps, width, goals = env.horizon, policy.weights.shape[0], len(policy.goals)
+    features = np.empty((steps, env.envs, width), dtype=np.float32)
+    actions = np.empty((steps, env.envs), dtype=np.int64)
+    rewards = np.empty((steps, env.envs), dtype=np.float32)
+    returns = np.empty_like(rewards)
+    history = []
+    for batch in range(batches):
+        observation = env.reset()
+        for t in range(steps):
+            features[t] = policy.state(observation)
+            actions[t] = policy.sample(features[t], rng)
+            observation, rewards[t], _ = env.step(actions[t])
+
+        # Discounted returns, with the mean return of each step as the baseline
+        running = np.zeros(env.envs, dtype=np.float32)
+        for t in range(steps - 1, -1, -1):
+            running = rewards[t] + gamma * running
+            returns[t] = running
+        advantage = returns - returns.mean(axis=1, keepdims=True)
+        advantage /= advantage.std() + 1e-6
+
+        # Gradient of log pi(action | state) for a linear softmax: x (onehot - p)
+        grad = -policy.probabilities(features)
+        np.add.at(grad, (np.arange(steps)[:, None], np.arange(env.envs), actions), 1.0)
+        grad *= advantage[..., None]
+        policy.weights += (learning_rate / (steps * env.envs)) * (
+            features.reshape(-1, width).T @ grad.reshape(-1, goals))
+
+        history.append(float(rewards.mean()))
+        if log_every and (batch + 1) % log_every == 0:
+            tracing.info("Policy", "Batch %d: mean reward %.3f", batch + 1, history[-1])
+    return history
+
+
+def evaluate(policy, env, episodes=1):
+    """Mean reward per step of the greedy policy over `episodes` batches of parallel episodes."""
+    total = 0.0
+    for _ in range(episodes):
+        observation = env.reset()
+        done = False
+        while not done:
+            observation, rewards, done = env.step(policy.choose(observation))
+            total += float(rewards.mean())
+    return total / (episodes * env.horizon)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the DecisionMaker's goal policy offline")
+    parser.add_argument("--envs", type=int, default=256, help="episodes simulated side by side")
+    parser.add_argument("--batches", type=int, default=300)
+    parser.add_argument("--horizon", type=int, default=16, help="steps per episode")
+    parser.add_argument("--learning-rate", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="goal_policy.npz")
+    args = parser.parse_args(argv)
+
+    policy = GoalPolicy()
+    env = SituationEnv(policy, envs=args.envs, horizon=args.horizon, seed=args.seed)
+    before = evaluate(policy, env)
+    start = time.perf_counter()
+    train(policy, env, args.batches, args.learning_rate, seed=args.seed)
+    seconds = time.perf_counter() - start
+    tracing.info("Policy", "%d steps in %.1f s; greedy reward %.3f -> %.3f",
+                 args.batches * args.envs * args.horizon, seconds, before, evaluate(policy, env))
+    policy.save(args.out)
+    tracing.info("Policy", "Saved to %s", args.out)
+
+
+if __name__ == "__main__":
+    main()
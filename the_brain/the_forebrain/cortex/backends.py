@@ -0,0 +1,73 @@
+# backends.py
+# Model backends for the Cortex.
+#
+# A backend turns a batch of prompts into a batch of completions in a single
+# call. That is the only thing the Cortex and its MicroBatcher need from it, so
+# a hosted LLM, a local model or the in-process fake below can be swapped
+# freely. Real backends should send the whole batch as one request (e.g. the
+# Hugging Face Inference API accepts a list of inputs).
+
+import re
+import threading
+import time
+
+# The Cortex's prompt templates (the fake backend recognizes them)
+THOUGHT_PROMPT = "Stimulus: {stimulus}, Context: {context}"
+PLAN_PROMPT = "Create a step-by-step plan for: {goal}"
+
+
+class CortexBackend:
+    """Interface for Cortex model backends."""
+    # Largest batch the backend accepts in one call
+    max_batch = 32
+
+    def generate_batch(self, prompts):
+        """Returns one completion per prompt, in order."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FakeBackend(CortexBackend):
+    """Deterministic in-process backend for tests and benchmarks.
+
+    reply:     callable(prompt) -> completion (default: placeholder_reply)
+    latency:   seconds each call takes, whatever the batch size (request overhead)
+    per_item:  extra seconds per prompt in the batch
+    max_batch: largest batch accepted
+    """
+    def __init__(self, reply=None, latency=0.0, per_item=0.0, max_batch=32):
+        self.reply = reply or placeholder_reply
+        self.latency = latency
+        self.per_item = per_item
+        self.max_batch = max_batch
+        self.calls = 0
+        self.prompts = 0
+        self._lock = threading.Lock()
+
+    def generate_batch(self, prompts):
+        if len(prompts) > self.max_batch:
+            raise ValueError(f"batch of {len(prompts)} exceeds max_batch={self.max_batch}")
+        with self._lock:
+            self.calls += 1
+            self.prompts += len(prompts)
+        delay = self.latency + self.per_item * len(prompts)
+        if delay:
+            time.sleep(delay)
+        return [self.reply(prompt) for prompt in prompts]
+
+
+_THOUGHT = re.compile(r"^Stimulus: (.*), Context: ", re.DOTALL)
+_PLAN = re.compile(r"^Create a step-by-step plan for: (.*)$", re.DOTALL)
+
+
+def placeholder_reply(prompt):
+    """Stands in for a model: the Cortex's placeholder thoughts and plans."""
+    match = _THOUGHT.match(prompt)
+    if match:
+        return f"Analyzed thought about {match.group(1)}"
+    match = _PLAN.match(prompt)
+    if match:
+        return f"Plan for {match.group(1)}"
+    return f"Response to: {prompt}"
@@ -0,0 +1,154 @@
+# embeddings.py
+# Text -> fixed-width float32 vectors for memory and the semantic cache.
+#
+# The default backend is a feature-hashing embedder over character n-grams: no
+# model, no network, and deterministic across processes (it does not use
+# Python's salted hash()), so vectors written to disk in one session still
+# match queries in the next. A whole batch is hashed with NumPy in one pass:
+# the texts are packed into a single byte array, every n-gram is hashed
+# vectorially, and the buckets are summed with one bincount.
+#
+# A model backend (anything with `dim` and `embed_batch(texts)`) can be swapped
+# in; Embedder adds an LRU of recent texts in front of whichever is used.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EmbeddingBackend:
+    """Interface for embedding backends."""
+    dim = None
+
+    def embed_batch(self, texts):
+        """Returns a float32 (len(texts), dim) array, one row per text."""
+        raise NotImplementedError
+
+
+class HashingEmbedder(EmbeddingBackend):
+    """Signed feature hashing of character n-grams, L2-normalised.
+
+    dim:    output width
+    ngrams: n-gram lengths to hash (each at most 4)
+    """
+    def __init__(self, dim=256, ngrams=(3, 4)):
+        if any(n < 1 or n > 4 for n in ngrams):
+            raise ValueError("n-gram lengths must be between 1 and 4")
+        self.dim = dim
+        self.ngrams = tuple(ngrams)
+
+    def embed_batch(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return out
+        # One byte array for the whole batch; a 0 byte separates texts so no
+        # n-gram is counted across two of them
+        encoded = [b" " + t.lower().encode("utf-8", "replace") + b" " for t in texts]
+        data = np.frombuffer(b"\x00".join(encoded), dtype=np.uint8).astype(np.uint64)
+        owner = np.repeat(np.arange(len(texts)), [len(e) + 1 for e in encoded])[:len(data)]
+        is_sep = data == 0
+
+        buckets, weights = [], []
+        for n in self.ngrams:
+            if len(data) < n:
+                continue
+            count = len(data) - n + 1
+            gram = np.zeros(count, dtype=np.uint64)
+            crosses = np.zeros(count, dtype=bool)
+            for j in range(n):
+                gram |= data[j:j + count] << np.uint64(8 * j)
+                crosses |= is_sep[j:j + count]
+            h = _mix(gram ^ np.uint64(n * 0x9E3779B9))
+            keep = ~crosses
+            rows = owner[:count][keep]
+            h = h[keep]
+            buckets.append(rows * self.dim + (h % np.uint64(self.dim)).astype(np.int64))
+            weights.append(np.where(h >> np.uint64(63), -1.0, 1.0))
+
+        if buckets:
+            flat = np.bincount(np.concatenate(buckets), weights=np.concatenate(weights),
+                               minlength=len(texts) * self.dim)
+            out[:] = flat.reshape(len(texts), self.dim)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Local sentence-transformers model (optional dependency, loaded on first use)."""
+    def __init__(self, model_name="all-MiniLM-L6-v2"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("SentenceTransformerBackend needs `pip install sentence-transformers`") from e
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed_batch(self, texts):
+        return np.asarray(self.model.encode(list(texts), normalize_embeddings=True), dtype=np.float32)
+
+
+class Embedder:
+    """Batched text embedding with an LRU cache of recent texts.
+
+    backend:    an EmbeddingBackend (default: HashingEmbedder())
+    cache_size: texts whose vectors are kept
+    """
+    def __init__(self, backend=None, cache_size=4096):
+        self.backend = backend or HashingEmbedder()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dim(self):
+        return self.backend.dim
+
+    def __call__(self, text):
+        return self.embed(text)
+
+    def embed(self, text):
+        """One text -> a float32 (dim,) vector."""
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts):
+        """Texts -> float32 (len(texts), dim); only uncached texts reach the backend."""
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                vector = self._cache.get(text)
+                if vector is None:
+                    missing.setdefault(text, []).append(i)
+                else:
+                    self._cache.move_to_end(text)
+                    out[i] = vector
+            self.hits += len(texts) - len(missing)  # repeats within a batch count as hits
+            self.misses += len(missing)
+        if missing:
+            vectors = self.backend.embed_batch(list(missing))
+            with self._lock:
+                for (text, rows), vector in zip(missing.items(), vectors):
+                    vector = np.array(vector, dtype=np.float32)
+                    vector.flags.writeable = False
+                    self._cache[text] = vector
+                    out[rows] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return out
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache),
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+def _mix(h):
+    # 64-bit finalizer (splitmix64) so nearby n-grams land in unrelated buckets
+    with np.errstate(over="ignore"):
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return h ^ (h >> np.uint64(31))
@@ -0,0 +1,114 @@
+# micro_batcher.py
+# Gathers concurrent Cortex prompts into batched backend calls.
+#
+# Callers submit one prompt at a time and get a Future back. A dispatcher
+# thread takes whatever is waiting (up to max_batch prompts) and sends it to
+# the backend as one request, then resolves each caller's future with its own
+# completion. While a batch is being generated new prompts pile up and go out
+# together in the next one, so under load the per-request overhead is shared;
+# max_wait additionally holds a batch open for stragglers after its first
+# prompt arrives (0 = send immediately, best for latency when traffic is light).
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Size- or deadline-bounded batching in front of a CortexBackend.
+
+    max_batch: prompts per backend call (capped by the backend's own max_batch)
+    max_wait:  seconds a batch may wait for more prompts after the first one
+    """
+    def __init__(self, backend, max_batch=16, max_wait=0.0):
+        self.backend = backend
+        self.max_batch = min(max_batch, getattr(backend, "max_batch", max_batch))
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._pending = deque()
+        self._ready = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="cortex-batcher", daemon=True)
+        self._thread.start()
+
+    # --- 1. CALLERS ---
+
+    def submit(self, prompt):
+        """Queues a prompt; the Future resolves to its completion."""
+        future = Future()
+        with self._ready:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._pending.append((prompt, future))
+            self._ready.notify()
+        return future
+
+    def generate(self, prompt, timeout=None):
+        """Blocking helper: submit() and wait for the completion."""
+        return self.submit(prompt).result(timeout)
+
+    async def agenerate(self, prompt):
+        """asyncio helper: awaits the completion without blocking the loop."""
+        return await asyncio.wrap_future(self.submit(prompt))
+
+    @property
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": self.items / self.batches if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+    # --- 2. DISPATCH ---
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            prompts = [prompt for prompt, _ in batch]
+            try:
+                results = self.backend.generate_batch(prompts)
+                if len(results) != len(prompts):
+                    raise RuntimeError(f"backend returned {len(results)} results for {len(prompts)} prompts")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _next_batch(self):
+        with self._ready:
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._ready.wait()
+            if self.max_wait > 0:
+                # Hold the batch open until it is full or the first prompt's deadline passes
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+            count = min(len(self._pending), self.max_batch)
+            batch = [self._pending.popleft() for _ in range(count)]
+        # Callers that gave up (cancelled futures) don't need a completion
+        return [item for item in batch if item[1].set_running_or_notify_cancel()]
+
+    def close(self):
+        """Finishes what is queued, then stops the dispatcher."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        self._thread.join()
+        self.backend.close()
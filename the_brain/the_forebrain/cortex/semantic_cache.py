@@ -0,0 +1,117 @@
+# semantic_cache.py
+# Reuses Cortex results for near-duplicate stimuli and goals.
+#
+# Each cached thought or plan is kept with the embedding of the text that
+# produced it. A new stimulus/goal is embedded and compared (cosine, the same
+# scoring the Hippocampus recalls with) against every live entry of its kind
+# in one matrix-vector product; if the best match clears `threshold`, its
+# result is reused and the model call is skipped.
+#
+# The cache is bounded: entries live in fixed slots of a preallocated matrix,
+# expired entries (older than `ttl`) are never served, and when every slot is
+# taken the least recently used entry is overwritten.
+
+import threading
+import time
+
+import numpy as np
+
+from the_forebrain.hippocampus.vector_index import VectorIndex
+
+
+class _Slots:
+    """Fixed-capacity vectors + values for one kind of result."""
+    def __init__(self, capacity, dim):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.values = [None] * capacity
+        self.expires = np.full(capacity, -np.inf)   # -inf = empty slot
+        self.last_used = np.zeros(capacity)
+
+
+class SemanticCache:
+    """Similarity-keyed cache of Cortex thoughts and plans.
+
+    embed:     callable(text) -> 1-D vector
+    threshold: cosine similarity (0 - 1) a query needs to reuse an entry
+    capacity:  entries kept per kind ("thought", "plan", ...)
+    ttl:       seconds an entry may be served after it was stored
+    """
+    def __init__(self, embed, threshold=0.92, capacity=1024, ttl=600.0, clock=time.monotonic):
+        self.embed = embed
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self._index = VectorIndex(metric="cosine")  # only used to normalise like the Hippocampus
+        self._kinds = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0, "expired": 0}
+
+    # --- 1. LOOKUP / STORE ---
+
+    def lookup(self, kind, text):
+        """Returns (cached result or None, key). Pass the key to put() on a miss."""
+        if not isinstance(text, str):
+            return None, None
+        vector = self._index.prepare(self.embed(text))[0]
+        now = self.clock()
+        with self._lock:
+            slots = self._kinds.get(kind)
+            if slots is None:
+                self._stats["misses"] += 1
+                return None, vector
+            live = slots.expires > now
+            self._stats["expired"] += int(np.count_nonzero(~live & np.isfinite(slots.expires)))
+            slots.expires[~live] = -np.inf  # expired entries free their slot
+            if not live.any():
+                self._stats["misses"] += 1
+                return None, vector
+            scores = np.where(live, slots.vectors @ vector, -np.inf)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self._stats["misses"] += 1
+                return None, vector
+            slots.last_used[best] = now
+            self._stats["hits"] += 1
+            return slots.values[best], vector
+
+    def put(self, kind, key, value):
+        """Caches value under the key returned by lookup()."""
+        if key is None:
+            return
+        now = self.clock()
+        with self._lock:
+            slots = self._kinds.get(kind)
+            if slots is None:
+                slots = self._kinds[kind] = _Slots(self.capacity, len(key))
+            empty = np.flatnonzero(slots.expires == -np.inf)
+            if len(empty):
+                slot = int(empty[0])
+            else:
+                slot = int(np.argmin(slots.last_used))
+                self._stats["evicted"] += 1
+            slots.vectors[slot] = key
+            slots.values[slot] = value
+            slots.expires[slot] = now + self.ttl
+            slots.last_used[slot] = now
+            self._stats["stored"] += 1
+
+    def invalidate(self, kind=None):
+        """Drops every entry (of one kind, or all), e.g. after the model changes."""
+        with self._lock:
+            for name, slots in self._kinds.items():
+                if kind is None or name == kind:
+                    slots.expires[:] = -np.inf
+                    slots.values = [None] * self.capacity
+
+    # --- 2. METRICS ---
+
+    @property
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            now = self.clock()
+            stats["entries"] = sum(int(np.count_nonzero(s.expires > now)) for s in self._kinds.values())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,386 @@
+# forebrain_pool.py
+# Runs the forebrain (Cortex -> DecisionMaker -> Cortex) in worker processes.
+#
+# In one process, CPU-bound cognition (embedding, memory search, local model
+# inference, policy evaluation) holds the GIL and delays the reflex path. A
+# ForebrainPool moves that work into dedicated worker processes: reflexes,
+# attention and vitals stay in the main process, and cognition throughput
+# scales with the number of workers. Each stimulus goes to the worker with the
+# fewest jobs in flight.
+#
+# Each worker builds its own forebrain with factory() -> (cortex,
+# decision_maker). Workers are forked where possible, so the factory is
+# inherited rather than pickled (elsewhere it has to be picklable). A forked
+# child has none of the parent's threads: start the pool before the threads
+# whose state the workers would inherit, as the Brain does. The trace writer
+# is the exception; tracing resets its buffer and locks in every child.
+#
+# Large NumPy arrays (frames, audio buffers, ...) are not pickled: anything of
+# at least `share_threshold` bytes is copied once into a shared memory block
+# and the worker gets a small handle it maps back into a read-only array
+# without copying. Request blocks are reused between jobs; results travel the
+# same way back.
+#
+# Memory stays single-writer. A worker's Cortex stores into a read-only
+# Hippocampus replica (recall over the memory-mapped segments on disk, which
+# every process shares through the page cache, plus this session's memories),
+# and the new memories come back with the result. The pool hands them to
+# `on_memory` (the main Hippocampus writes them to disk) and forwards them to
+# the other workers, so every replica recalls the same things.
+
+import itertools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import tracing
+
+
+# --- 1. SHARED MEMORY ---
+
+class SharedArray:
+    """Picklable handle to an array in a shared memory block."""
+    __slots__ = ("name", "shape", "dtype")
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def attach(self):
+        """Maps the block; returns (block, read-only array view)."""
+        block = shared_memory.SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=self.dtype, buffer=block.buf)
+        array.flags.writeable = False
+        return block, array
+
+
+class _Blocks:
+    """Shared memory blocks created by this process, reused by size class."""
+    def __init__(self):
+        self._free = {}    # size -> [block]
+        self._blocks = {}  # name -> (size, block)
+        self._lock = threading.Lock()
+
+    def take(self, nbytes):
+        size = 1 << max(12, (nbytes - 1).bit_length())
+        with self._lock:
+            free = self._free.get(size)
+            if free:
+                return free.pop()
+        block = shared_memory.SharedMemory(create=True, size=size)
+        with self._lock:
+            self._blocks[block.name] = (size, block)
+        return block
+
+    def give_back(self, names):
+        with self._lock:
+            for name in names:
+                size, block = self._blocks[name]
+                self._free.setdefault(size, []).append(block)
+
+    @property
+    def nbytes(self):
+        return sum(size for size, _ in self._blocks.values())
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def close(self):
+        with self._lock:
+            blocks, self._blocks, self._free = self._blocks, {}, {}
+        for _, block in blocks.values():
+            block.close()
+            block.unlink()
+
+
+def _pack(value, threshold, take, names):
+    """Replaces large arrays inside value (nested tuples/lists/dicts) with SharedArray handles."""
+    if isinstance(value, np.ndarray):
+        if value.nbytes < threshold or value.dtype.hasobject:
+            return value
+        block = take(value.nbytes)
+        names.append(block.name)
+        np.ndarray(value.shape, dtype=value.dtype, buffer=block.buf)[...] = value
+        return SharedArray(block.name, value.shape, value.dtype.str)
+    if type(value) in (tuple, list):
+        return type(value)(_pack(v, threshold, take, names) for v in value)
+    if type(value) is dict:
+        return {k: _pack(v, threshold, take, names) for k, v in value.items()}
+    return value
+
+
+def _unpack(value, attached, copy=False):
+    """Maps SharedArray handles back to arrays; the blocks are appended to `attached`."""
+    if isinstance(value, SharedArray):
+        block, array = value.attach()
+        attached.append(block)
+        return array.copy() if copy else array
+    if type(value) in (tuple, list):
+        return type(value)(_unpack(v, attached, copy) for v in value)
+    if type(value) is dict:
+        return {k: _unpack(v, attached, copy) for k, v in value.items()}
+    return value
+
+
+def _attached(value):
+    """Maps every SharedArray handle in value; returns the blocks."""
+    blocks = []
+    _unpack(value, blocks)
+    return blocks
+
+
+def _detach(blocks, unlink=False):
+    """Closes mapped blocks; returns the ones still referenced by a live array view."""
+    busy = []
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            busy.append(block)  # something kept a view; try again after the next job
+            continue
+        if unlink:
+            block.unlink()
+    return busy
+
+
+# --- 2. WORKER PROCESS ---
+
+def _worker_main(index, factory, inbox, outbox, share_threshold):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the main process decides when workers stop
+    cortex, decision_maker = factory()
+    memory = cortex.memory
+    journal = []
+    store = memory.store
+
+    def recording_store(thought, vector, metadata=None):
+        store(thought, vector, metadata)
+        journal.append((thought, np.asarray(vector, dtype=np.float32), metadata))
+
+    memory.store = recording_store
+    mapped, created = [], []
+
+    def create(nbytes):
+        block = shared_memory.SharedMemory(create=True, size=nbytes)
+        created.append(block)
+        return block
+
+    tracing.debug("Forebrain", "Worker %d ready (pid %d).", index, os.getpid())
+
+    while True:
+        message = inbox.get()
+        if message is None:
+            break
+        if message[0] == "remember":
+            # Memories another worker made: recall them here too, without reporting them again
+            for thought, vector, metadata in message[1]:
+                store(thought, vector, metadata)
+            continue
+
+        _, job, payload = message
+        start = time.perf_counter()
+        stimulus = None
+        try:
+            stimulus = _unpack(payload, mapped)
+            thought = cortex.process_stimulus(stimulus)
+            goal = decision_maker.choose_goal(thought)
+            plan = cortex.generate_plan(goal)
+            result = _pack((thought, goal, plan, list(journal)), share_threshold, create, [])
+            outbox.put(("done", index, job, result, time.perf_counter() - start))
+        except Exception as e:
+            outbox.put(("failed", index, job, f"{type(e).__name__}: {e}", time.perf_counter() - start))
+        finally:
+            journal.clear()
+            stimulus = payload = None
+            mapped = _detach(mapped)
+            # Result blocks stay alive until the main process has copied them out and unlinked them
+            _detach(created)
+            created.clear()
+
+    cortex.close()
+    tracing.flush()
+
+
+# --- 3. POOL ---
+
+class ForebrainPool:
+    """Forebrain worker processes.
+
+    factory:         factory() -> (cortex, decision_maker), called in each worker
+    workers:         processes to start (default: one per CPU, less one for the main process)
+    share_threshold: arrays of at least this many bytes travel through shared memory
+    on_memory:       on_memory(thought, vector, metadata) for each memory a worker stores
+    """
+    REAP_INTERVAL = 0.5  # seconds between worker liveness checks
+
+    def __init__(self, factory, workers=None, share_threshold=64 * 1024, on_memory=None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.share_threshold = share_threshold
+        self.on_memory = on_memory
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._blocks = _Blocks()
+        self._jobs = {}  # job id -> (future, worker, request block names)
+        self._ids = itertools.count()
+        self._in_flight = [0] * self.workers
+        self._lock = threading.Lock()
+        self._closed = False
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        resource_tracker.ensure_running()  # one tracker shared by every worker
+        self._outbox = context.Queue()
+        self._inboxes = [context.Queue() for _ in range(self.workers)]
+        self._processes = [
+            context.Process(target=_worker_main, name=f"forebrain-{i}", daemon=True,
+                            args=(i, factory, inbox, self._outbox, share_threshold))
+            for i, inbox in enumerate(self._inboxes)
+        ]
+        for process in self._processes:
+            process.start()
+        self._collector = threading.Thread(target=self._collect, name="forebrain-results", daemon=True)
+        self._collector.start()
+        tracing.info("Forebrain", "Thinking in %d worker processes.", self.workers)
+
+    # --- 3a. SUBMITTING ---
+
+    def submit(self, stimulus):
+        """Queues one stimulus; returns a Future of (thought, goal, plan)."""
+        future = Future()
+        future.set_running_or_notify_cancel()
+        names = []
+        payload = _pack(stimulus, self.share_threshold, self._blocks.take, names)
+        with self._lock:
+            if self._closed:
+                self._blocks.give_back(names)
+                raise RuntimeError("ForebrainPool is closed")
+            worker = min(range(self.workers), key=self._in_flight.__getitem__)
+            if self._in_flight[worker] == float("inf"):
+                self._blocks.give_back(names)
+                raise RuntimeError("Every forebrain worker has died")
+            job = next(self._ids)
+            self._in_flight[worker] += 1
+            self._jobs[job] = (future, worker, names)
+        self._inboxes[worker].put(("think", job, payload))
+        return future
+
+    def think(self, stimulus, timeout=None):
+        """Blocks for (thought, goal, plan)."""
+        return self.submit(stimulus).result(timeout)
+
+    # --- 3b. RESULTS ---
+
+    def _collect(self):
+        next_reap = time.monotonic() + self.REAP_INTERVAL
+        while True:
+            # Liveness is checked on a timer, not only when the outbox is idle,
+            # so a busy pool still notices a worker that died
+            if time.monotonic() >= next_reap:
+                self._reap()
+                next_reap = time.monotonic() + self.REAP_INTERVAL
+            try:
+                message = self._outbox.get(timeout=self.REAP_INTERVAL)
+            except queue.Empty:
+                continue
+            if message is None:
+                return
+            kind, worker, job, body, seconds = message
+            with self._lock:
+                entry = self._jobs.pop(job, None)
+                if entry is not None:
+                    self._in_flight[worker] -= 1
+                    self._blocks.give_back(entry[2])
+            if entry is None:
+                # Already failed by _reap; free the result's shared memory and drop it
+                _detach(_attached(body), unlink=True)
+                continue
+            future = entry[0]
+            self.busy_seconds += seconds
+            if kind == "failed":
+                self.failed += 1
+                future.set_exception(RuntimeError(f"forebrain-{worker}: {body}"))
+                continue
+            attached = []
+            thought, goal, plan, memories = _unpack(body, attached, copy=True)
+            _detach(attached, unlink=True)
+            if memories:
+                self._share_memories(worker, memories)
+            self.completed += 1
+            future.set_result((thought, goal, plan))
+
+    def _share_memories(self, worker, memories):
+        for other, inbox in enumerate(self._inboxes):
+            if other != worker:
+                inbox.put(("remember", memories))
+        if self.on_memory is None:
+            return
+        for thought, vector, metadata in memories:
+            try:
+                self.on_memory(thought, vector, metadata)
+            except Exception as e:
+                tracing.error("Forebrain", "Storing a worker memory failed: %r", e, sample=100)
+
+    def _reap(self):
+        """Fails the jobs of workers that died, and stops sending them work."""
+        for worker, process in enumerate(self._processes):
+            if process.is_alive() or self._in_flight[worker] == float("inf"):
+                continue
+            with self._lock:
+                self._in_flight[worker] = float("inf")
+                lost = [(job, entry) for job, entry in self._jobs.items() if entry[1] == worker]
+                for job, (_, _, names) in lost:
+                    del self._jobs[job]
+                    self._blocks.give_back(names)
+            if lost or not self._closed:
+                tracing.error("Forebrain", "Worker %d exited (code %s); %d jobs lost.",
+                              worker, process.exitcode, len(lost))
+            for _, (future, _, _) in lost:
+                self.failed += 1
+                future.set_exception(RuntimeError(f"forebrain-{worker} exited with code {process.exitcode}"))
+
+    # --- 3c. LIFECYCLE ---
+
+    @property
+    def stats(self):
+        with self._lock:
+            in_flight = [n if n != float("inf") else None for n in self._in_flight]
+        return {
+            "workers": self.workers,
+            "alive": sum(p.is_alive() for p in self._processes),
+            "in_flight": in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_seconds": self.busy_seconds,
+            "shared_blocks": len(self._blocks),
+            "shared_bytes": self._blocks.nbytes,
+        }
+
+    def close(self, timeout=2.0):
+        """Stops the workers (after their current job) and frees the shared memory."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+        self._reap()
+        self._outbox.put(None)
+        self._collector.join(timeout)
+        with self._lock:
+            leftover, self._jobs = self._jobs, {}
+        for future, _, _ in leftover.values():
+            future.set_exception(RuntimeError("ForebrainPool closed"))
+        self._blocks.close()
@@ -0,0 +1,295 @@
+# memory_store.py
+# Append-only, segment-based on-disk format for the Hippocampus.
+#
+# A store is a directory holding a manifest and a list of segments. Each
+# segment is three files:
+#
+#   <name>.vec   raw float32 rows (width = manifest "dim"), memory-mapped on load
+#   <name>.txt   JSON records {"thought": ..., "metadata": ...}, back to back
+#   <name>.off   uint64 (start, length) pairs indexing into <name>.txt
+#
+# New memories are appended to the active (last) segment as they are stored.
+# The .off entry is written last, so a torn write at a crash is simply ignored
+# on the next load. Every session starts a fresh active segment; older,
+# sealed segments are memory-mapped and merged by a background compaction.
+# Merged segments' files are deleted once nothing maps them any more; where
+# the OS refuses (Windows keeps mapped files open) deletion is retried on the
+# next compaction, close or open.
+
+import bisect
+import json
+import os
+import threading
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+
+
+class Segment:
+    """A read-only, memory-mapped view of one sealed segment."""
+    def __init__(self, root, name, dim):
+        self.name = name
+        base = os.path.join(root, name)
+        rows = min(os.path.getsize(base + ".vec") // (4 * dim),
+                   os.path.getsize(base + ".off") // 16)
+        self.rows = rows
+        self.vectors = _memmap(base + ".vec", np.float32, (rows, dim))
+        self.offsets = _memmap(base + ".off", np.uint64, (rows, 2))
+        self.text = _memmap(base + ".txt", np.uint8, (os.path.getsize(base + ".txt"),))
+
+    def record(self, row):
+        start, length = (int(v) for v in self.offsets[row])
+        data = json.loads(bytes(self.text[start:start + length]))
+        return data["thought"], data["metadata"]
+
+    def records(self):
+        for row in range(self.rows):
+            yield self.record(row)
+
+
+class SealedSegments:
+    """An immutable, ordered list of sealed segments addressed by global row id.
+
+    The store swaps in a new instance on compaction, so readers that hold on
+    to one always see a consistent set of row ids.
+    """
+    def __init__(self, segments):
+        self.segments = tuple(segments)
+        self._starts = [0]
+        for segment in self.segments:
+            self._starts.append(self._starts[-1] + segment.rows)
+        self.rows = self._starts[-1]
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def record(self, row):
+        """Returns (thought, metadata) for a global row id."""
+        i = bisect.bisect_right(self._starts, row) - 1
+        return self.segments[i].record(row - self._starts[i])
+
+
+class _SegmentWriter:
+    """Appends records to the active segment's files."""
+    def __init__(self, root, name):
+        self.name = name
+        base = os.path.join(root, name)
+        self._vec = open(base + ".vec", "ab")
+        self._txt = open(base + ".txt", "ab")
+        self._off = open(base + ".off", "ab")
+        self._text_end = self._txt.tell()
+        self.rows = 0
+
+    def append(self, thought, vector, metadata):
+        data = json.dumps({"thought": thought, "metadata": metadata}).encode("utf-8")
+        self._txt.write(data)
+        self._vec.write(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+        self._off.write(np.array([self._text_end, len(data)], dtype=np.uint64).tobytes())
+        self._text_end += len(data)
+        self.rows += 1
+
+    def flush(self, sync=False):
+        # Data before offsets, so a reader never sees an offset without its record
+        for f in (self._txt, self._vec, self._off):
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+
+    def close(self):
+        self.flush(sync=True)
+        for f in (self._txt, self._vec, self._off):
+            f.close()
+
+
+class MemoryStore:
+    """A directory of append-only memory segments.
+
+    metric:    the similarity metric the vectors are prepared for; reopening a
+               store written for another metric raises ValueError
+    read_only: only map what is on disk (no new segment, no appends), e.g. for
+               a replica in another process while the owner keeps writing
+    """
+    def __init__(self, path, segment_rows=65_536, flush_every=64, read_only=False, metric=None):
+        self.path = path
+        self.segment_rows = segment_rows
+        self.flush_every = flush_every
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if not read_only:
+            os.makedirs(path, exist_ok=True)
+
+        manifest = self._read_manifest()
+        self.dim = manifest.get("dim")
+        self.metric = manifest.get("metric")
+        self._check_metric(metric)
+        self._next_id = manifest.get("next_id", 0)
+
+        # Everything already on disk is sealed; this session appends to a new segment
+        segments = []
+        for name in manifest.get("segments", []):
+            if self.dim and os.path.exists(os.path.join(path, name + ".vec")):
+                segment = Segment(path, name, self.dim)
+                if segment.rows:
+                    segments.append(segment)
+        self.sealed = SealedSegments(segments)
+        self._compactable = len(segments)
+        self._session_names = [] # segments filled (and closed) during this session
+        self._writer = None
+        self._unflushed = 0
+        self._retired = [] # names of merged segments whose files are still to be deleted
+        if not read_only:
+            self._retired = [name for name in _segment_names(path) if name not in manifest.get("segments", [])]
+            self._remove_retired()
+
+    # --- 1. APPENDING ---
+
+    def append(self, thought, vector, metadata=None, metric=None):
+        """Appends one memory to the active segment."""
+        if self.read_only:
+            raise PermissionError(f"MemoryStore {self.path} is read-only")
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        with self._lock:
+            self._check_metric(metric)
+            if self.dim is None:
+                self.dim, self.metric = len(vector), metric
+                self._write_manifest()
+            if self._writer is None or self._writer.rows >= self.segment_rows:
+                self._roll()
+            self._writer.append(thought, vector, metadata)
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every:
+                self._writer.flush()
+                self._unflushed = 0
+
+    def flush(self, sync=True):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush(sync=sync)
+                self._unflushed = 0
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                # Still part of the store: later manifests must keep listing it
+                self._session_names.append(self._writer.name)
+                self._writer = None
+        self._remove_retired()
+
+    def _roll(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._session_names.append(self._writer.name)
+        self._writer = _SegmentWriter(self.path, self._new_name())
+        self._write_manifest()
+
+    # --- 2. COMPACTION ---
+
+    def compact(self, min_segments=4, on_compacted=None):
+        """Merges the segments sealed before this session into one.
+
+        Superseded memories (the same thought stored again later) are dropped.
+        on_compacted(sealed) is called with the new SealedSegments once they
+        are live. Returns True if anything was merged.
+        """
+        self._remove_retired()
+        old = self.sealed.segments[:self._compactable]
+        if self.read_only or len(old) < min_segments:
+            return False
+
+        latest = {}
+        for i, segment in enumerate(old):
+            for row, (thought, _) in enumerate(segment.records()):
+                latest[thought] = (i, row)
+        keep = sorted(latest.values())
+
+        with self._lock:
+            name = self._new_name()
+        writer = _SegmentWriter(self.path, name)
+        for i, row in keep:
+            thought, metadata = old[i].record(row)
+            writer.append(thought, old[i].vectors[row], metadata)
+        writer.close()
+        merged = Segment(self.path, name, self.dim)
+
+        with self._lock:
+            self.sealed = SealedSegments((merged,) + self.sealed.segments[len(old):])
+            self._compactable = 1
+            self._write_manifest()
+        if on_compacted is not None:
+            on_compacted(self.sealed)
+        with self._lock:
+            self._retired.extend(segment.name for segment in old)
+        old = segment = None  # this thread's last references to the old maps
+        self._remove_retired()
+        return True
+
+    def _remove_retired(self):
+        """Deletes merged segments' files; any still mapped by a reader are kept for a later try."""
+        with self._lock:
+            retired, self._retired = self._retired, []
+        kept = []
+        for name in retired:
+            try:
+                for ext in (".vec", ".txt", ".off"):
+                    path = os.path.join(self.path, name + ext)
+                    if os.path.exists(path):
+                        os.remove(path)
+            except PermissionError:
+                kept.append(name)
+        with self._lock:
+            self._retired = kept + self._retired
+
+    def start_compaction(self, min_segments=4, on_compacted=None):
+        """Runs compact() on a daemon thread and returns the thread."""
+        thread = threading.Thread(target=self.compact, args=(min_segments, on_compacted), daemon=True)
+        thread.start()
+        return thread
+
+    # --- 3. MANIFEST ---
+
+    def _new_name(self):
+        name = f"seg-{self._next_id:06d}"
+        self._next_id += 1
+        return name
+
+    def _check_metric(self, metric):
+        if metric is not None and self.metric is not None and metric != self.metric:
+            raise ValueError(f"MemoryStore {self.path} holds {self.metric} vectors, not {metric}")
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_manifest(self):
+        names = [segment.name for segment in self.sealed] + self._session_names
+        if self._writer is not None:
+            names.append(self._writer.name)
+        manifest = {"dim": self.dim, "metric": self.metric, "next_id": self._next_id, "segments": names}
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+
+def _segment_names(path):
+    """Names of the segments with files in a store directory."""
+    names = set()
+    for filename in os.listdir(path):
+        name, ext = os.path.splitext(filename)
+        if name.startswith("seg-") and ext in (".vec", ".txt", ".off"):
+            names.add(name)
+    return sorted(names)
+
+
+def _memmap(path, dtype, shape):
+    if not shape[0]:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
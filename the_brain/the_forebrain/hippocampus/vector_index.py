@@ -0,0 +1,268 @@
+# vector_index.py
+# The search structure behind the Hippocampus (long-term memory).
+#
+# Memories are packed into contiguous float32 matrices: read-only blocks
+# attached from disk (usually memory-mapped segments) plus one growable
+# in-RAM tail for memories added this session. While the store is small,
+# recall is an exact top-k search done as one matrix-vector product per block.
+# Once the store grows past `ivf_threshold` an inverted-file (IVF) index is
+# trained on top of it: vectors are bucketed under k-means centroids and a
+# query only scans the `nprobe` closest buckets.
+
+import threading
+
+import numpy as np
+
+
+class _GrowableRows:
+    """A float32 (or int64) row buffer that doubles its capacity when full."""
+    def __init__(self, width, dtype=np.float32, capacity=1024):
+        shape = (capacity, width) if width else (capacity,)
+        self._data = np.empty(shape, dtype=dtype)
+        self.size = 0
+
+    def append(self, rows):
+        count = len(rows)
+        needed = self.size + count
+        if needed > len(self._data):
+            new_capacity = max(needed, 2 * len(self._data))
+            grown = np.empty((new_capacity,) + self._data.shape[1:], dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:needed] = rows
+        self.size = needed
+
+    def view(self):
+        return self._data[:self.size]
+
+
+class VectorIndex:
+    """Top-k similarity search over float32 vectors.
+
+    metric is "cosine" (vectors are L2-normalised on the way in) or "dot".
+    Ids are dense row numbers: attached blocks first, then the in-RAM tail.
+    """
+    TRAINING_SAMPLE = 16_384  # most rows k-means sees, whatever the store's size
+    def __init__(self, dim=None, metric="cosine", ivf_threshold=50_000, nprobe=8,
+                 background_training=False):
+        if metric not in ("cosine", "dot"):
+            raise ValueError(f"Unknown metric: {metric}")
+        self.dim = dim
+        self.metric = metric
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.background_training = background_training
+
+        self._blocks = []   # read-only (often memory-mapped) blocks
+        self._block_rows = 0
+        self._vectors = _GrowableRows(dim) if dim else None
+        self._lock = threading.Lock()
+
+        # IVF state: None, or (centroids, list_ids, list_vectors), swapped atomically
+        self._ivf = None
+        self._trained_size = 0
+        self._training = None
+
+    def __len__(self):
+        return self._block_rows + (self._vectors.size if self._vectors else 0)
+
+    @property
+    def is_approximate(self):
+        return self._ivf is not None
+
+    # --- 1. INSERTION ---
+
+    def prepare(self, vectors):
+        """Validates vectors into a float32 (n, dim) array, normalised for cosine."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of width {self.dim}, got {vectors.shape[1]}")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def attach(self, block):
+        """Attaches a read-only block of already prepared vectors (e.g. a np.memmap).
+
+        Blocks must be attached before anything is added to the in-RAM tail.
+        """
+        if self._vectors is not None and self._vectors.size:
+            raise RuntimeError("Blocks must be attached before in-RAM vectors are added")
+        if self.dim is None:
+            self.dim = block.shape[1]
+        if block.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of width {self.dim}, got {block.shape[1]}")
+        self._blocks.append(block)
+        self._block_rows += len(block)
+
+    def add(self, vector):
+        """Adds one vector and returns its id."""
+        return int(self.add_batch(vector)[0])
+
+    def add_batch(self, vectors):
+        """Adds a batch of vectors and returns their ids."""
+        vectors = self.prepare(vectors)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = _GrowableRows(self.dim)
+            first_id = len(self)
+            self._vectors.append(vectors)
+            ids = np.arange(first_id, first_id + len(vectors), dtype=np.int64)
+            if self._ivf is not None:
+                _assign(self._ivf, ids, vectors)
+        self.maybe_train()
+        return ids
+
+    def tail(self):
+        """The vectors added in RAM (not attached from disk)."""
+        return self._vectors.view() if self._vectors else np.empty((0, self.dim or 0), np.float32)
+
+    # --- 2. SEARCH ---
+
+    def search(self, query, k=5):
+        """Returns (ids, scores) of the k best matches, best first."""
+        if len(self) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = self.prepare(query)[0]
+        ivf = self._ivf
+        if ivf is None:
+            ids = None
+            # A concurrent add may grow the tail buffer: take the views under the
+            # lock so each one pairs a buffer with a size that fits it
+            with self._lock:
+                blocks = [block for _, block in self._iter_blocks()]
+            scores = np.concatenate([block @ query for block in blocks])
+        else:
+            ids, scores = _probe(ivf, query, self.nprobe, self._lock)
+        top = _top_k(scores, k)
+        return (top if ids is None else ids[top]), scores[top]
+
+    def _iter_blocks(self):
+        first_id = 0
+        for block in self._blocks:
+            yield first_id, block
+            first_id += len(block)
+        if self._vectors is not None:
+            yield first_id, self._vectors.view()
+
+    # --- 3. IVF TRAINING ---
+
+    def maybe_train(self):
+        """(Re)trains the IVF index when the store has grown enough.
+
+        Retraining happens geometrically (every 4x growth) so its cost stays
+        amortised O(1) per insert.
+        """
+        with self._lock:
+            # Checked and claimed together so only one thread starts training
+            if self._training is not None or len(self) < self.ivf_threshold:
+                return
+            if len(self) < 4 * self._trained_size:
+                return
+            if self.background_training:
+                self._training = threading.Thread(target=self._train_ivf, daemon=True)
+            else:
+                self._training = True
+        if self.background_training:
+            self._training.start()
+        else:
+            self._train_ivf()
+
+    def _train_ivf(self, iterations=10, seed=0):
+        try:
+            count = len(self)
+            # Training cost is bounded by the sample, not the store: nlist stays
+            # at 39+ sample rows per centroid
+            sample_size = min(count, self.TRAINING_SAMPLE)
+            nlist = max(1, min(int(4 * np.sqrt(count)), sample_size // 39))
+            rng = np.random.default_rng(seed)
+            sample = self._gather(np.sort(rng.choice(count, size=min(sample_size, nlist * 64), replace=False)))
+
+            # Spherical k-means: assign by best dot product, re-normalise centroids
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+            members = np.zeros((len(sample), nlist), dtype=np.float32)
+            rows = np.arange(len(sample))
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                # Per-centroid sums as one matrix product over a one-hot assignment
+                members[rows, assignment] = 1.0
+                sums = members.T @ sample
+                members[rows, assignment] = 0.0
+                empty = np.bincount(assignment, minlength=nlist) == 0
+                sums[empty] = centroids[empty]
+                centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+            ivf = (
+                centroids.astype(np.float32),
+                [_GrowableRows(None, dtype=np.int64, capacity=64) for _ in range(nlist)],
+                [_GrowableRows(self.dim, capacity=64) for _ in range(nlist)],
+            )
+            covered = 0
+            for first_id, block in self._iter_blocks():
+                block = block[:max(0, count - first_id)]
+                _assign(ivf, np.arange(first_id, first_id + len(block), dtype=np.int64), block)
+                covered += len(block)
+
+            # Catch up on rows added while training, then swap in the new index
+            with self._lock:
+                for first_id, block in self._iter_blocks():
+                    lo = max(0, covered - first_id)
+                    if lo < len(block):
+                        _assign(ivf, np.arange(first_id + lo, first_id + len(block), dtype=np.int64), block[lo:])
+                self._ivf = ivf
+                self._trained_size = count
+        finally:
+            self._training = None
+
+    def _gather(self, ids):
+        """Copies the rows with the given (sorted) ids out of all blocks."""
+        parts = []
+        for first_id, block in self._iter_blocks():
+            lo, hi = np.searchsorted(ids, [first_id, first_id + len(block)])
+            if lo < hi:
+                parts.append(np.asarray(block[ids[lo:hi] - first_id]))
+        return np.concatenate(parts)
+
+
+def _probe(ivf, query, nprobe, lock):
+    """Scans the nprobe buckets whose centroids score best against query."""
+    centroids, list_ids, list_vectors = ivf
+    lists = _top_k(centroids @ query, min(nprobe, len(centroids)))
+    # Snapshot ids and vectors together: a concurrent add appends to one before
+    # the other. Appends never move rows already in a view, so the scan itself
+    # runs outside the lock.
+    with lock:
+        buckets = [(list_ids[i].view(), list_vectors[i].view()) for i in lists]
+    ids = [bucket_ids for bucket_ids, _ in buckets]
+    scores = [vectors @ query for _, vectors in buckets]
+    return np.concatenate(ids), np.concatenate(scores)
+
+
+def _assign(ivf, ids, vectors, chunk=65_536):
+    """Files vectors (and their ids) under their closest centroid."""
+    centroids, list_ids, list_vectors = ivf
+    for start in range(0, len(vectors), chunk):
+        block = np.asarray(vectors[start:start + chunk])
+        assignment = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        lists, starts = np.unique(assignment[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        for list_no, lo, hi in zip(lists, bounds[:-1], bounds[1:]):
+            rows = order[lo:hi]
+            list_ids[list_no].append(ids[start + rows])
+            list_vectors[list_no].append(block[rows])
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores, sorted best first."""
+    k = min(k, len(scores))
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
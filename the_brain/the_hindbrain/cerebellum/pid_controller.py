@@ -0,0 +1,196 @@
+# pid_controller.py
+# Fixed-rate PID control for many actuator channels (the Cerebellum's motor refinement).
+#
+# Gains, setpoints, integrators and the last errors live in NumPy arrays, one
+# element per channel, and one step() updates every channel with a handful of
+# in-place array operations (no per-channel Python objects and no allocation
+# per tick). That keeps a 500 Hz - 1 kHz loop over hundreds of channels cheap.
+#
+# ControlLoop runs a controller on its own thread on an absolute schedule:
+# tick k is due at start + k * period, so a late tick doesn't push the ones
+# after it back (no drift). It sleeps until the deadline; with `spin` set it
+# wakes that much earlier and busy-waits the rest for precision, which is
+# opt-in because it burns CPU on every tick. Ticks that can't be made at
+# all are skipped and counted rather than run back to back. How late each tick
+# started (jitter) is kept in a ring buffer for stats.
+
+import threading
+import time
+
+import numpy as np
+
+import tracing
+
+
+class PIDController:
+    """Vectorized PID over `channels` channels.
+
+    kp, ki, kd:        gains, scalars or per-channel arrays
+    output_limits:     (low, high) clamp on the output, scalars or arrays
+    integral_limit:    clamp on |integral| (None = unbounded)
+    derivative_filter: 0 - 1, low-pass smoothing of the derivative term (0 = none)
+
+    The derivative acts on the measurement, not the error, so setpoint changes
+    don't kick the output; integration pauses on channels saturated in the
+    direction of their error (anti-windup).
+    """
+    def __init__(self, channels, kp=1.0, ki=0.0, kd=0.0, output_limits=(-np.inf, np.inf),
+                 integral_limit=None, derivative_filter=0.0):
+        self.channels = channels
+        self.kp = _per_channel(kp, channels)
+        self.ki = _per_channel(ki, channels)
+        self.kd = _per_channel(kd, channels)
+        self.low = _per_channel(output_limits[0], channels)
+        self.high = _per_channel(output_limits[1], channels)
+        self.integral_limit = None if integral_limit is None else _per_channel(integral_limit, channels)
+        self.derivative_filter = derivative_filter
+
+        self.setpoint = np.zeros(channels)
+        self.integral = np.zeros(channels)
+        self.derivative = np.zeros(channels)
+        self.error = np.zeros(channels)
+        self.output = np.zeros(channels)
+        self._last = None
+        self._delta = np.zeros(channels)
+        self._term = np.zeros(channels)
+        self._pinned = np.zeros(channels, dtype=bool)
+        self._mask = np.zeros(channels, dtype=bool)
+
+    def step(self, measurement, dt):
+        """Advances every channel by dt seconds; returns the (shared) output array."""
+        if dt <= 0:
+            raise ValueError(f"dt must be positive, got {dt}")
+        measurement = np.asarray(measurement, dtype=np.float64)
+        np.subtract(self.setpoint, measurement, out=self.error)
+
+        # I: integrate, then undo it where the output is pinned in the same direction
+        np.multiply(self.error, dt, out=self._delta)
+        np.greater_equal(self.output, self.high, out=self._pinned)
+        np.greater(self.error, 0, out=self._mask)
+        self._pinned &= self._mask
+        np.copyto(self._delta, 0.0, where=self._pinned)
+        np.less_equal(self.output, self.low, out=self._pinned)
+        np.less(self.error, 0, out=self._mask)
+        self._pinned &= self._mask
+        np.copyto(self._delta, 0.0, where=self._pinned)
+        self.integral += self._delta
+        if self.integral_limit is not None:
+            np.clip(self.integral, -self.integral_limit, self.integral_limit, out=self.integral)
+
+        # D: on the measurement, optionally low-pass filtered
+        if self._last is None:
+            self._last = measurement.copy()
+        np.subtract(self._last, measurement, out=self._delta)
+        self._delta /= dt
+        if self.derivative_filter:
+            self.derivative *= self.derivative_filter
+            self._delta *= 1.0 - self.derivative_filter
+            self.derivative += self._delta
+        else:
+            self.derivative[:] = self._delta
+        self._last[:] = measurement
+
+        np.multiply(self.kp, self.error, out=self.output)
+        np.multiply(self.ki, self.integral, out=self._term)
+        self.output += self._term
+        np.multiply(self.kd, self.derivative, out=self._term)
+        self.output += self._term
+        np.clip(self.output, self.low, self.high, out=self.output)
+        return self.output
+
+    def reset(self, channels=None):
+        """Clears integrators/derivatives (all channels, or an index/mask)."""
+        index = slice(None) if channels is None else channels
+        self.integral[index] = 0.0
+        self.derivative[index] = 0.0
+        self.output[index] = 0.0
+        if channels is None:
+            self._last = None
+
+
+class ControlLoop:
+    """Runs a PIDController at a fixed rate on a dedicated thread.
+
+    read():       current measurements, shape (channels,) (sensor feedback)
+    write(out):   applies the controller output to the actuators
+    rate:         ticks per second
+    spin:         seconds before each deadline spent busy-waiting instead of sleeping
+                  (0 = sleep the whole way; lower jitter costs CPU)
+    history:      ticks of jitter kept for stats
+    """
+    def __init__(self, controller, read, write, rate=1000.0, spin=0.0, history=10_000):
+        self.controller = controller
+        self.read = read
+        self.write = write
+        self.period = 1.0 / rate
+        self.spin = spin
+        self.ticks = 0
+        self.skipped = 0
+        self.errors = 0
+        self._lateness = np.zeros(history)
+        self._step_time = np.zeros(history)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cerebellum-pid", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        clock = time.perf_counter
+        start = clock()
+        tick = 0
+        last = start
+        while not self._stop.is_set():
+            tick += 1
+            deadline = start + tick * self.period
+            now = clock()
+            if now > deadline + self.period:
+                # More than a whole period behind: skip the missed ticks instead of bursting
+                missed = int((now - deadline) / self.period)
+                self.skipped += missed
+                tick += missed
+                deadline = start + tick * self.period
+            remaining = deadline - clock()
+            if remaining > self.spin:
+                time.sleep(remaining - self.spin)
+            if self.spin:
+                while clock() < deadline:
+                    pass
+
+            began = clock()
+            try:
+                self.write(self.controller.step(self.read(), began - last))
+            except Exception as e:
+                self.errors += 1
+                tracing.error("Cerebellum", "Control step failed: %r", e, sample=1000)
+            last = began
+            slot = self.ticks % len(self._lateness)
+            self._lateness[slot] = began - deadline
+            self._step_time[slot] = clock() - began
+            self.ticks += 1
+
+    @property
+    def stats(self):
+        """Tick counts plus lateness (jitter) and step-time percentiles, in microseconds."""
+        n = min(self.ticks, len(self._lateness))
+        stats = {"ticks": self.ticks, "skipped": self.skipped, "errors": self.errors,
+                 "rate_hz": 1.0 / self.period}
+        if n:
+            late = self._lateness[:n] * 1e6
+            step = self._step_time[:n] * 1e6
+            p50, p99 = np.percentile(late, [50, 99])
+            stats.update(jitter_p50_us=float(p50), jitter_p99_us=float(p99), jitter_max_us=float(late.max()),
+                         step_mean_us=float(step.mean()), step_p99_us=float(np.percentile(step, 99)))
+        return stats
+
+
+def _per_channel(value, channels):
+    return np.array(np.broadcast_to(np.asarray(value, dtype=np.float64), (channels,)))
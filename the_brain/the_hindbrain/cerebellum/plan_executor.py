@@ -0,0 +1,284 @@
+# plan_executor.py
+# Runs Cortex plans as dependency graphs (the Cerebellum's motor sequencing).
+#
+# A Plan is a set of Steps, each naming the steps it must wait for. The
+# executor submits every step whose dependencies are done to a shared worker
+# pool, so independent steps (API calls, file writes, ...) run concurrently
+# while dependent ones still run in order. There is no scheduler thread:
+# finishing a step is what submits the steps it unblocks.
+#
+# Results are streamed: iterate a PlanRun to get each StepResult as soon as
+# its step finishes. Steps can have a timeout, and a whole run (or every run,
+# when a reflex preempts motor control) can be cancelled. Python threads can't
+# be killed, so a timed-out or cancelled step is reported straight away and
+# its context's `cancelled` event is set; long-running actions should check it.
+#
+# Plans from the Cortex are text; Plan.from_text reads one step per line:
+#
+#   1. Look up the weather
+#   2. Check the calendar [after: none]
+#   3. Write the summary [after: 1, 2]
+#
+# A step without an [after: ...] note waits for the step before it. Once a
+# plan has numbered steps, unnumbered lines (and lines repeating a number, as
+# in nested lists) belong to the step above them; text before the first step
+# is preamble. A plan with no numbers at all is one step per line.
+
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import tracing
+
+DONE, FAILED, TIMEOUT, CANCELLED, SKIPPED = "done", "failed", "timeout", "cancelled", "skipped"
+
+
+@dataclass
+class Step:
+    name: str
+    description: str = ""
+    action: Optional[Callable] = None  # action(ctx) -> value; None = the executor's runner
+    deps: tuple = ()
+    timeout: Optional[float] = None     # seconds; None = the executor's default
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str                         # done, failed, timeout, cancelled or skipped
+    value: Any = None
+    error: Optional[BaseException] = None
+    seconds: float = 0.0
+
+
+@dataclass
+class StepContext:
+    """Handed to each action: its step, its dependencies' values and a cancel flag."""
+    step: Step
+    inputs: dict
+    cancelled: threading.Event
+
+
+@dataclass
+class Plan:
+    goal: str
+    steps: list = field(default_factory=list)
+
+    _LINE = re.compile(r"^\s*(?:(\d+)[.):]\s+)?(.*?)\s*(?:\[after:\s*([^\]]*)\])?\s*$")
+
+    @classmethod
+    def from_text(cls, text, goal=None):
+        """Parses a numbered step list (see module notes)."""
+        lines = [cls._LINE.match(line).groups() for line in text.splitlines() if line.strip()]
+        numbered = any(label for label, _, _ in lines)
+        steps = []
+        for label, description, after in lines:
+            if numbered and (not label or any(s.name == label for s in steps)):
+                description = description.lstrip("-*• ")
+                if steps and description:
+                    # A continuation or sub-item of the step above
+                    steps[-1].description = f"{steps[-1].description}; {description}".lstrip("; ")
+                continue
+            name = label or str(len(steps) + 1)
+            if after is None:
+                deps = (steps[-1].name,) if steps else ()
+            elif after.strip().lower() in ("", "none", "-"):
+                deps = ()
+            else:
+                deps = tuple(d.strip() for d in after.split(",") if d.strip())
+            steps.append(Step(name, description, deps=deps))
+        if goal is None:
+            goal = text.strip().splitlines()[0] if text.strip() else ""
+        return cls(goal, steps)
+
+    def validate(self):
+        """Raises ValueError for duplicate names, unknown dependencies or cycles."""
+        names = [s.name for s in self.steps]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate step names in plan {self.goal!r}")
+        for step in self.steps:
+            unknown = [d for d in step.deps if d not in names]
+            if unknown:
+                raise ValueError(f"Step {step.name!r} depends on unknown steps: {', '.join(unknown)}")
+        # Kahn's algorithm: every step must become ready eventually
+        waiting = {s.name: len(set(s.deps)) for s in self.steps}
+        dependents = _dependents(self.steps)
+        ready = [name for name, count in waiting.items() if count == 0]
+        seen = 0
+        while ready:
+            name = ready.pop()
+            seen += 1
+            for child in dependents[name]:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    ready.append(child)
+        if seen != len(self.steps):
+            raise ValueError(f"Plan {self.goal!r} has a dependency cycle")
+
+
+class PlanRun:
+    """One plan in flight. Iterate it to stream StepResults as steps finish."""
+    def __init__(self, plan, on_finished=None):
+        self.plan = plan
+        self.on_finished = on_finished
+        self.results = {}
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self._stream = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiting = {s.name: len(set(s.deps)) for s in plan.steps}
+        self._steps = {s.name: s for s in plan.steps}
+        self._dependents = _dependents(plan.steps)
+        self._contexts = {}
+        self._timers = {}
+
+    def __iter__(self):
+        for _ in range(len(self.plan.steps)):
+            yield self._stream.get()
+
+    def wait(self, timeout=None):
+        """Blocks until every step has a result; returns them in plan order."""
+        self.finished.wait(timeout)
+        return [self.results[s.name] for s in self.plan.steps if s.name in self.results]
+
+    def cancel(self, reason="cancelled"):
+        """Stops the run: running steps are told to stop, pending ones never start."""
+        with self._lock:
+            if self.finished.is_set():
+                return
+            self.cancelled.set()
+            for name, ctx in self._contexts.items():
+                ctx.cancelled.set()
+            pending = [name for name in self._steps if name not in self.results]
+        tracing.debug("Cerebellum", "Plan %r cancelled (%s)", self.plan.goal, reason)
+        for name in pending:
+            self._finish(StepResult(name, CANCELLED, error=RuntimeError(reason)))
+
+    def _finish(self, result):
+        """Records a step's result once; returns the steps it unblocked."""
+        with self._lock:
+            if result.name in self.results:
+                return []
+            self.results[result.name] = result
+            timer = self._timers.pop(result.name, None)
+            unblocked, skipped = [], []
+            for child in self._dependents[result.name]:
+                if result.status != DONE:
+                    if not self.cancelled.is_set():  # cancel() reports the rest itself
+                        skipped.append(child)
+                    continue
+                self._waiting[child] -= 1
+                if self._waiting[child] == 0 and not self.cancelled.is_set():
+                    unblocked.append(self._steps[child])
+            done = len(self.results) == len(self._steps)
+        if timer is not None:
+            timer.cancel()
+        self._stream.put(result)
+        for child in skipped:
+            # A failed dependency means the child can never run (nor, in turn, its dependents)
+            self._finish(StepResult(child, SKIPPED, error=RuntimeError(f"dependency {result.name} {result.status}")))
+        if done:
+            self.finished.set()
+            if self.on_finished is not None:
+                self.on_finished(self)
+        return unblocked
+
+
+class PlanExecutor:
+    """Runs plans on a shared worker pool.
+
+    max_workers:     steps running at once, across all plans
+    default_timeout: seconds allowed per step unless the step sets its own
+    runner:          runner(ctx) for steps without an action (e.g. the motor
+                     controller); default only traces the step
+    """
+    def __init__(self, max_workers=4, default_timeout=None, runner=None):
+        self.default_timeout = default_timeout
+        self.runner = runner or _trace_step
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cerebellum")
+        self._runs = set()
+        self._lock = threading.Lock()
+
+    def run(self, plan):
+        """Starts a plan and returns its PlanRun straight away."""
+        plan.validate()
+        run = PlanRun(plan, on_finished=self._forget)
+        if not plan.steps:
+            run.finished.set()
+            return run
+        with self._lock:
+            self._runs.add(run)
+        for step in plan.steps:
+            if not step.deps:
+                self._submit(run, step)
+        return run
+
+    def execute(self, plan, timeout=None):
+        """Runs a plan to completion and returns its results in plan order."""
+        return self.run(plan).wait(timeout)
+
+    def cancel_all(self, reason="preempted"):
+        """Cancels every plan in flight (e.g. a reflex takes over motor control)."""
+        with self._lock:
+            runs = list(self._runs)
+        for run in runs:
+            run.cancel(reason)
+
+    def shutdown(self):
+        self.cancel_all("shutdown")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, run, step):
+        ctx = StepContext(step, {d: run.results[d].value for d in step.deps}, threading.Event())
+        with run._lock:
+            run._contexts[step.name] = ctx
+        timeout = step.timeout if step.timeout is not None else self.default_timeout
+        if timeout is not None:
+            timer = threading.Timer(timeout, self._timed_out, (run, step, ctx, timeout))
+            timer.daemon = True
+            with run._lock:
+                run._timers[step.name] = timer
+            timer.start()
+        self._pool.submit(self._run_step, run, step, ctx)
+
+    def _run_step(self, run, step, ctx):
+        start = time.perf_counter()
+        if ctx.cancelled.is_set():
+            return
+        try:
+            value = (step.action or self.runner)(ctx)
+            result = StepResult(step.name, DONE, value, seconds=time.perf_counter() - start)
+        except Exception as e:
+            result = StepResult(step.name, FAILED, error=e, seconds=time.perf_counter() - start)
+        self._after(run, result)
+
+    def _timed_out(self, run, step, ctx, timeout):
+        ctx.cancelled.set()
+        self._after(run, StepResult(step.name, TIMEOUT, error=TimeoutError(f"step exceeded {timeout}s"),
+                                    seconds=timeout))
+
+    def _after(self, run, result):
+        for step in run._finish(result):
+            self._submit(run, step)
+
+    def _forget(self, run):
+        with self._lock:
+            self._runs.discard(run)
+
+
+def _dependents(steps):
+    dependents = {s.name: [] for s in steps}
+    for step in steps:
+        for dep in set(step.deps):
+            dependents[dep].append(step.name)
+    return dependents
+
+
+def _trace_step(ctx):
+    tracing.debug("Cerebellum", "Performing step %s: %s", ctx.step.name, ctx.step.description)
+    # In a real app, this would send commands to actuators, or type text to a screen.
+    return None
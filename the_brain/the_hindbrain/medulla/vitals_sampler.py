@@ -0,0 +1,158 @@
+# vitals_sampler.py
+# Background vital-signs sampler for the medulla (AutonomicMonitor).
+#
+# A daemon thread reads /proc at a fixed rate and writes each sample into a
+# preallocated ring buffer. It also keeps exponentially smoothed CPU and
+# memory figures. Readers only ever look at `snapshot`, an immutable
+# VitalSigns that is swapped in after each sample, so checking vitals on the
+# hot path costs no I/O at all.
+
+import os
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+FIELDS = ("time", "cpu_percent", "process_cpu_percent", "rss_bytes", "mem_percent", "load_1m", "open_fds")
+
+
+class VitalSigns(NamedTuple):
+    time: float                 # time.monotonic() of the sample
+    cpu_percent: float          # whole machine, since the previous sample
+    process_cpu_percent: float  # this process, since the previous sample (100 = one core)
+    rss_bytes: float
+    mem_percent: float          # machine memory in use
+    load_1m: float
+    open_fds: float
+    cpu_smoothed: float         # EWMA of cpu_percent
+    mem_smoothed: float         # EWMA of mem_percent
+
+
+class VitalsSampler:
+    """Samples CPU, RSS, load average and fd count into a ring buffer.
+
+    rate:     samples per second
+    history:  samples kept in the ring buffer
+    smoothing: EWMA weight of each new sample (0 - 1)
+    """
+    def __init__(self, rate=2.0, history=512, smoothing=0.3, proc="/proc"):
+        self.interval = 1.0 / rate
+        self.smoothing = smoothing
+        self.proc = proc
+        self._ring = np.full((history, len(FIELDS)), np.nan)
+        self._count = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._last_cpu = None   # (busy, total) jiffies, whole machine
+        self._last_proc = None  # (process jiffies, monotonic time)
+        self.snapshot = VitalSigns(time.monotonic(), *([0.0] * (len(FIELDS) - 1)), 0.0, 0.0)
+
+    # --- 1. LIFECYCLE ---
+
+    def start(self):
+        """Takes a first sample synchronously, then keeps sampling on a daemon thread."""
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="vitals-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2 * self.interval)
+
+    def _run(self):
+        # Sleep to the next slot on a fixed schedule so the rate doesn't drift
+        next_at = time.monotonic()
+        while True:
+            next_at += self.interval
+            if self._stop.wait(max(0.0, next_at - time.monotonic())):
+                return
+            self.sample()
+
+    # --- 2. SAMPLING ---
+
+    def sample(self):
+        """Reads /proc once, records the sample and publishes a new snapshot."""
+        now = time.monotonic()
+        cpu = self._cpu_percent()
+        process_cpu = self._process_cpu_percent(now)
+        rss, mem = self._memory()
+        row = (now, cpu, process_cpu, rss, mem, self._load(), self._open_fds())
+
+        self._ring[self._count % len(self._ring)] = row
+        self._count += 1
+
+        previous = self.snapshot
+        a = self.smoothing if self._count > 1 else 1.0
+        self.snapshot = VitalSigns(*row,
+                                   cpu_smoothed=_ewma(previous.cpu_smoothed, cpu, a),
+                                   mem_smoothed=_ewma(previous.mem_smoothed, mem, a))
+        return self.snapshot
+
+    def history(self, n=None):
+        """The last n samples (oldest first) as an (n, len(FIELDS)) array copy."""
+        count = min(self._count, len(self._ring))
+        n = count if n is None else min(n, count)
+        end = self._count % len(self._ring)
+        idx = (np.arange(end - n, end)) % len(self._ring)
+        return self._ring[idx].copy()
+
+    def _read(self, name):
+        with open(os.path.join(self.proc, name)) as f:
+            return f.read()
+
+    def _cpu_percent(self):
+        try:
+            values = [int(v) for v in self._read("stat").split("\n", 1)[0].split()[1:]]
+        except (OSError, ValueError):
+            return float("nan")
+        idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+        total = sum(values[:8])
+        last, self._last_cpu = self._last_cpu, (total - idle, total)
+        if last is None or total == last[1]:
+            return 0.0
+        return 100.0 * (total - idle - last[0]) / (total - last[1])
+
+    def _process_cpu_percent(self, now):
+        try:
+            # Fields after the "(comm)" part; utime and stime are the 12th/13th of those
+            fields = self._read("self/stat").rsplit(")", 1)[1].split()
+            jiffies = int(fields[11]) + int(fields[12])
+        except (OSError, ValueError, IndexError):
+            return float("nan")
+        last, self._last_proc = self._last_proc, (jiffies, now)
+        if last is None or now == last[1]:
+            return 0.0
+        return 100.0 * (jiffies - last[0]) / self._ticks / (now - last[1])
+
+    def _memory(self):
+        try:
+            rss = int(self._read("self/statm").split()[1]) * self._page_size
+            meminfo = dict(line.split(":", 1) for line in self._read("meminfo").splitlines() if ":" in line)
+            total = int(meminfo["MemTotal"].split()[0])
+            available = int(meminfo["MemAvailable"].split()[0])
+        except (OSError, ValueError, KeyError, IndexError):
+            return float("nan"), float("nan")
+        return float(rss), 100.0 * (total - available) / total
+
+    def _load(self):
+        try:
+            return float(self._read("loadavg").split()[0])
+        except (OSError, ValueError, IndexError):
+            return float("nan")
+
+    def _open_fds(self):
+        try:
+            return float(len(os.listdir(os.path.join(self.proc, "self/fd"))))
+        except OSError:
+            return float("nan")
+
+
+def _ewma(previous, value, a):
+    if value != value:  # nan: keep the last good estimate
+        return previous
+    return a * value + (1 - a) * previous
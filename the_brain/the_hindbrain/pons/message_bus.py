@@ -0,0 +1,228 @@
+# message_bus.py
+# The Pons: an in-process message bus between the brain's regions.
+#
+# Each topic (sensory, stimulus, thought, plan, reflex, ...) is a preallocated
+# ring buffer with one write sequence and any number of independent
+# subscribers, each with its own read cursor, so every subscriber sees every
+# message (fan-out) without copying it. Payloads are handed over by
+# reference; large ones such as camera frames can be published read-only
+# (a zero-copy view that no consumer can modify).
+#
+# Publishing never blocks: a subscriber that falls more than `capacity`
+# messages behind skips ahead to the oldest message still in the ring, and the
+# skipped ones are counted as dropped. Subscribers can block (get), poll,
+# drain in batches, or await from asyncio (aget/adrain).
+#
+# Once every subscriber has read a message its slot is cleared, so big
+# payloads aren't kept alive by the ring any longer than needed. A topic with
+# no subscribers keeps nothing at all (a later from_start subscriber only sees
+# messages published while someone was listening).
+#
+# Payloads of the Brain's topics:
+#
+#   sensory   (source, data, perf_counter() at the reading)   source: "vision" or "audio"
+#   reflex    (action, perf_counter() at the triggering reading)
+#   stimulus  the stimulus handed to the forebrain
+#   thought   the Cortex's thought about it
+#   plan      the plan for the chosen goal
+#   frames    camera frames, read-only views (see frame_pipeline.py)
+#
+# The bus is for observers: it may drop messages for a slow subscriber, so
+# anything that must not be lost (reflexes) is also handed over directly.
+#
+# stats reports per-topic throughput and, per subscriber, its lag (messages
+# published but not yet read) and drops. Reading stats changes nothing: the
+# rate is measured over the last one to two RATE_WINDOWs, rolled by publish.
+
+import asyncio
+import threading
+import time
+
+DEFAULT_TOPICS = ("sensory", "stimulus", "thought", "plan", "reflex")
+RATE_WINDOW = 1.0  # seconds
+
+
+class Topic:
+    """One ring buffer plus its subscribers."""
+    def __init__(self, name, capacity=1024):
+        if capacity & (capacity - 1):
+            raise ValueError(f"capacity must be a power of two, got {capacity}")
+        self.name = name
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._payloads = [None] * capacity
+        self.head = 0       # sequence number of the next message
+        self._released = 0  # slots before this sequence have been cleared
+        self._ready = threading.Condition()
+        self._async_waiters = []  # (loop, future) pairs parked in aget()
+        self.subscribers = []
+        now = time.monotonic()
+        self._rate_marks = [(now, 0), (now, 0)]  # (time, head) at the start of the last two windows
+
+    def publish(self, payload, readonly=False):
+        """Appends a message; returns its sequence number. Never blocks."""
+        if readonly and getattr(payload, "flags", None) is not None and payload.flags.writeable:
+            payload = payload.view()  # NumPy view: same memory, but consumers can't write to it
+            payload.flags.writeable = False
+        now = time.monotonic()
+        with self._ready:
+            seq = self.head
+            self.head = seq + 1
+            if self.subscribers:
+                self._payloads[seq & self._mask] = payload
+            else:
+                self._release()  # nobody to read it: don't keep it (or anything older) alive
+            if now - self._rate_marks[1][0] >= RATE_WINDOW:
+                self._rate_marks = [self._rate_marks[1], (now, seq)]
+            self._ready.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+        return seq
+
+    def subscribe(self, name=None, from_start=False):
+        """A new subscriber reading from now on (or from the oldest message kept)."""
+        with self._ready:
+            start = max(self._released, self.head - self.capacity) if from_start else self.head
+            subscription = Subscription(self, name or f"{self.name}-{len(self.subscribers)}", start)
+            self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._ready:
+            if subscription in self.subscribers:
+                self.subscribers.remove(subscription)
+                self._release()
+
+    def _read(self, subscription, max_items):
+        # Caller holds self._ready
+        oldest = self.head - self.capacity
+        if subscription.cursor < oldest:
+            subscription.dropped += oldest - subscription.cursor
+            subscription.cursor = oldest
+        end = min(self.head, subscription.cursor + max_items)
+        items = [self._payloads[seq & self._mask] for seq in range(subscription.cursor, end)]
+        subscription.cursor = end
+        subscription.received += len(items)
+        if items:
+            self._release()
+        return items
+
+    def _release(self):
+        # Drop references to messages every subscriber has read (all of them, if nobody is left)
+        low = min(s.cursor for s in self.subscribers) if self.subscribers else self.head
+        for seq in range(max(self._released, self.head - self.capacity), low):
+            self._payloads[seq & self._mask] = None
+        self._released = max(self._released, low)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._ready:
+            since, count = self._rate_marks[0]
+            return {
+                "published": self.head,
+                "rate_per_sec": (self.head - count) / (now - since) if now > since else 0.0,
+                "subscribers": {s.name: {"lag": self.head - s.cursor, "received": s.received, "dropped": s.dropped}
+                                for s in self.subscribers},
+            }
+
+
+class Subscription:
+    """One consumer's cursor into a topic."""
+    def __init__(self, topic, name, cursor):
+        self.topic = topic
+        self.name = name
+        self.cursor = cursor
+        self.received = 0
+        self.dropped = 0
+
+    @property
+    def lag(self):
+        return self.topic.head - self.cursor
+
+    # --- blocking API ---
+
+    def poll(self):
+        """The next payload, or None if nothing is waiting."""
+        items = self.drain(1)
+        return items[0] if items else None
+
+    def drain(self, max_items=256):
+        """Up to max_items waiting payloads (maybe none), oldest first."""
+        with self.topic._ready:
+            return self.topic._read(self, max_items)
+
+    def get(self, timeout=None):
+        """Blocks for the next payload; raises TimeoutError if none arrives in time."""
+        topic = self.topic
+        with topic._ready:
+            if not topic._ready.wait_for(lambda: topic.head > self.cursor, timeout):
+                raise TimeoutError(f"No message on {topic.name} within {timeout}s")
+            return topic._read(self, 1)[0]
+
+    # --- asyncio API ---
+
+    async def adrain(self, max_items=256):
+        """Awaits at least one payload, then returns everything waiting (up to max_items)."""
+        while True:
+            items = self.drain(max_items)
+            if items:
+                return items
+            await self._wait()
+
+    async def aget(self):
+        """Awaits the next payload."""
+        return (await self.adrain(1))[0]
+
+    async def _wait(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        topic = self.topic
+        with topic._ready:
+            if topic.head > self.cursor:
+                return  # published while we were checking
+            topic._async_waiters.append((loop, future))
+        await future
+
+    def close(self):
+        self.topic.unsubscribe(self)
+
+
+class Pons:
+    """A set of named topics.
+
+    topics:   names created up front (more are created on first use)
+    capacity: ring size per topic (power of two)
+    """
+    def __init__(self, topics=DEFAULT_TOPICS, capacity=1024):
+        self.capacity = capacity
+        self._topics = {}
+        self._lock = threading.Lock()
+        for name in topics:
+            self.topic(name)
+
+    def topic(self, name, capacity=None):
+        """The named topic, created on first use (with its own capacity, if given)."""
+        topic = self._topics.get(name)
+        if topic is None:
+            with self._lock:
+                topic = self._topics.get(name)
+                if topic is None:
+                    topic = self._topics[name] = Topic(name, capacity or self.capacity)
+        return topic
+
+    def publish(self, name, payload, readonly=False):
+        return self.topic(name).publish(payload, readonly)
+
+    def subscribe(self, name, subscriber=None, from_start=False):
+        return self.topic(name).subscribe(subscriber, from_start)
+
+    @property
+    def stats(self):
+        """{topic: {published, rate_per_sec, subscribers: {name: {lag, received, dropped}}}}"""
+        return {name: topic.stats() for name, topic in self._topics.items()}
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,418 @@
+# audio_pipeline.py
+# Streaming audio -> startle reflexes and speech segments for the AudioSensor
+# (the inferior colliculus).
+#
+# Audio is read in fixed-size chunks (float32, -1 - 1, mono) into one
+# preallocated buffer and copied into a ring holding the last `ring_seconds`.
+# Each chunk costs one RMS (a dot product); anything further only happens
+# when there is sound:
+#
+#   silence (rms < silence_rms) -> nothing else is computed
+#   onset                       -> spectral flux (rise of the windowed magnitude
+#                                  spectrum) jumps above `flux_ratio` x its running
+#                                  mean; if the chunk is also loud (bang_rms) it
+#                                  becomes "loud_bang" (the STARTLE trigger) on
+#                                  this chunk
+#   voice activity              -> loud enough (vad_rms) with a low zero-crossing
+#                                  rate (hiss and bangs cross zero far more often)
+#
+# Voice activity opens a speech segment; `hangover` seconds without it close
+# it. Segments of at least `min_speech` seconds are copied out of the ring and
+# handed to `transcribe(samples, sample_rate) -> text`, so only speech ever
+# reaches transcription and trigger matching. Transcription runs on its own
+# thread, so a slow transcriber never holds up the chunk reader (and with it
+# the startle reflex); each transcript is returned by a later step(). Segments
+# that arrive while `transcribe_queue` of them are already waiting are dropped.
+# Without a transcriber the segment becomes an "untranscribed_speech
+# <seconds>s" stimulus (triggers.json queues it at a low priority).
+#
+# A source only has to fill a buffer: read_into(buffer) -> samples written
+# (0 = finished). ArraySource replays synthetic arrays, WavSource reads 16-bit
+# WAV files, MicrophoneSource uses sounddevice (optional dependency).
+
+import queue
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+import tracing
+
+REFLEX_LABEL = "loud_bang"
+SPEECH_LABEL = "untranscribed_speech"
+
+
+# --- 1. SOURCES ---
+
+class ArraySource:
+    """Replays samples from an array (float, -1 - 1, mono)."""
+    def __init__(self, samples, sample_rate=16_000, loop=False):
+        self.samples = np.asarray(samples, dtype=np.float32)
+        self.sample_rate = sample_rate
+        self.loop = loop
+        self._next = 0
+
+    def read_into(self, buffer):
+        if self._next >= len(self.samples):
+            if not self.loop:
+                return 0
+            self._next = 0
+        n = min(len(buffer), len(self.samples) - self._next)
+        buffer[:n] = self.samples[self._next:self._next + n]
+        self._next += n
+        return n
+
+    def close(self):
+        pass
+
+
+class WavSource:
+    """A 16-bit PCM WAV file; multi-channel audio is mixed down to mono."""
+    def __init__(self, path):
+        self.file = wave.open(path, "rb")
+        if self.file.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        self.sample_rate = self.file.getframerate()
+        self.channels = self.file.getnchannels()
+
+    def read_into(self, buffer):
+        pcm = np.frombuffer(self.file.readframes(len(buffer)), dtype="<i2")
+        n = len(pcm) // self.channels
+        if self.channels > 1:
+            np.mean(pcm.reshape(n, self.channels), axis=1, out=buffer[:n])
+        else:
+            buffer[:n] = pcm
+        buffer[:n] *= 1.0 / 32768
+        return n
+
+    def close(self):
+        self.file.close()
+
+
+class MicrophoneSource:
+    """Default input device through sounddevice (blocking reads)."""
+    def __init__(self, sample_rate=16_000, chunk=256):
+        try:
+            import sounddevice
+        except ImportError as e:
+            raise ImportError("MicrophoneSource needs `pip install sounddevice`") from e
+        self.sample_rate = sample_rate
+        self.stream = sounddevice.InputStream(samplerate=sample_rate, channels=1, dtype="float32",
+                                              blocksize=chunk)
+        self.stream.start()
+
+    def read_into(self, buffer):
+        data, _ = self.stream.read(len(buffer))
+        buffer[:len(data)] = data[:, 0]
+        return len(data)
+
+    def close(self):
+        self.stream.stop()
+        self.stream.close()
+
+
+# --- 2. RING BUFFER ---
+
+class AudioRing:
+    """The last `capacity` samples, addressed by absolute sample position."""
+    def __init__(self, capacity):
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.written = 0  # absolute position of the next sample
+
+    def write(self, samples):
+        n = len(samples)
+        if n > self.capacity:
+            # Only the newest `capacity` samples fit
+            self.written += n - self.capacity
+            samples, n = samples[-self.capacity:], self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:n - first] = samples[first:]
+        self.written += n
+
+    def read(self, start, end):
+        """A copy of samples [start, end); whatever has been overwritten is left out."""
+        start = max(start, self.written - self.capacity)
+        end = min(end, self.written)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        first, last = start % self.capacity, (end - 1) % self.capacity + 1
+        if first < last:
+            return self.buffer[first:last].copy()
+        return np.concatenate((self.buffer[first:], self.buffer[:last]))
+
+
+# --- 3. DETECTION ---
+
+class OnsetDetector:
+    """Spectral-flux onsets against an adaptive baseline.
+
+    chunk:      samples per chunk (FFT size)
+    flux_ratio: flux must exceed this multiple of its running mean
+    min_flux:   ... and this absolute floor
+    adapt:      smoothing of the running mean (closer to 1 = slower)
+    """
+    def __init__(self, chunk, flux_ratio=4.0, min_flux=0.05, adapt=0.9):
+        self.chunk = chunk
+        self.flux_ratio = flux_ratio
+        self.min_flux = min_flux
+        self.adapt = adapt
+        self.mean_flux = 0.0
+        self._window = np.hanning(chunk).astype(np.float32)
+        self._windowed = np.zeros(chunk, dtype=np.float32)
+        self._previous = np.zeros(chunk // 2 + 1, dtype=np.float32)
+        self._rise = np.zeros(chunk // 2 + 1, dtype=np.float32)
+
+    def update(self, samples):
+        """Returns (flux, onset) for one chunk."""
+        n = len(samples)
+        np.multiply(samples, self._window[:n], out=self._windowed[:n])
+        self._windowed[n:] = 0.0
+        magnitude = np.abs(np.fft.rfft(self._windowed))
+        np.subtract(magnitude, self._previous, out=self._rise)
+        np.maximum(self._rise, 0.0, out=self._rise)
+        flux = float(self._rise.sum()) / len(self._rise)
+        self._previous[:] = magnitude
+        onset = flux >= self.min_flux and flux > self.flux_ratio * self.mean_flux
+        self.mean_flux = self.adapt * self.mean_flux + (1.0 - self.adapt) * flux
+        return flux, onset
+
+    def silence(self):
+        """A silent chunk: the next sound is measured against silence."""
+        self._previous[:] = 0.0
+        self.mean_flux *= self.adapt
+
+
+# --- 4. PIPELINE ---
+
+class AudioPipeline:
+    """Reads audio chunks into a ring and turns them into reflexes and speech.
+
+    source:       has sample_rate and read_into(buffer) -> samples written
+    chunk:        samples per read (256 at 16 kHz = 16 ms)
+    ring_seconds: audio kept for speech segments (also their longest length)
+    silence_rms:  below this a chunk is silence and costs one dot product
+    bang_rms:     an onset at least this loud is a startle reflex
+    refractory:   seconds after a startle before the next one can fire
+    vad_rms:      voice activity needs at least this level ...
+    max_zcr:      ... and at most this zero-crossing rate (crossings per sample)
+    min_speech:   shortest speech segment passed on, in seconds
+    hangover:     seconds of non-voice that end a segment
+    transcribe:   transcribe(samples, sample_rate) -> text, for finished segments
+                  (called on a worker thread)
+    transcribe_queue: finished segments that may wait for the transcriber
+    realtime:     pace reads to the sample rate (files/arrays; a microphone paces itself)
+    history:      chunks of latency kept for stats
+
+    flux_ratio and min_flux go to the OnsetDetector.
+    """
+    def __init__(self, source, chunk=256, ring_seconds=10.0, silence_rms=0.005, bang_rms=0.3,
+                 refractory=0.25, vad_rms=0.02, max_zcr=0.25, min_speech=0.25, hangover=0.3, transcribe=None,
+                 transcribe_queue=4, realtime=False, history=4096, **onset_options):
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.chunk = chunk
+        self.silence_rms = silence_rms
+        self.bang_rms = bang_rms
+        self.refractory = int(refractory * self.sample_rate)
+        self.vad_rms = vad_rms
+        self.max_zcr = max_zcr
+        self.min_speech = int(min_speech * self.sample_rate)
+        self.hangover = int(hangover * self.sample_rate)
+        self.transcribe = transcribe
+        self.realtime = realtime
+        self.onsets = OnsetDetector(chunk, **onset_options)
+        self.ring = AudioRing(int(ring_seconds * self.sample_rate))
+        self._buffer = np.zeros(chunk, dtype=np.float32)
+        self._sign = np.zeros(chunk, dtype=bool)
+        self._flips = np.zeros(chunk - 1, dtype=bool)
+        self.throttled = False  # under backpressure speech is held back; reflexes are not
+        self.exhausted = False
+        self.rms = 0.0
+
+        self._speech_start = None  # absolute sample position of the open segment
+        self._quiet_run = 0
+        self._pending = None       # a finished segment waiting behind a reflex
+        self._last_reflex = None   # sample position of the last startle
+        self._segments = queue.Queue(maxsize=transcribe_queue)  # waiting for the transcriber
+        self._heard = deque()      # transcripts not handed out yet
+        self._transcriber = None
+
+        self.chunks = 0
+        self.silent = 0
+        self.reflexes = 0
+        self.segments = 0
+        self.segments_dropped = 0
+        self.speech_seconds = 0.0
+        self._process_time = np.zeros(history)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def step(self):
+        """Reads and processes one chunk; returns its label or None (see module notes)."""
+        n = self.source.read_into(self._buffer)
+        if not n:
+            self.exhausted = True
+            pending, self._pending = self._pending, None
+            return pending or self._close_segment(self.ring.written) or self._next_transcript()
+        began = time.perf_counter()
+        samples = self._buffer[:n]
+        self.ring.write(samples)
+        label = self.process(samples)
+        self._process_time[self.chunks % len(self._process_time)] = time.perf_counter() - began
+        self.chunks += 1
+        return label or self._next_transcript()
+
+    def process(self, samples):
+        """Classifies one chunk already written to the ring; returns a label or None."""
+        n = len(samples)
+        self.rms = float(np.sqrt(np.dot(samples, samples) / n))
+        pending, self._pending = self._pending, None
+        if self.rms < self.silence_rms:
+            self.silent += 1
+            self.onsets.silence()
+            return self._not_voice(n) or pending
+
+        _, onset = self.onsets.update(samples)
+        if onset and self.rms >= self.bang_rms and (
+                self._last_reflex is None or self.ring.written - self._last_reflex >= self.refractory):
+            self._last_reflex = self.ring.written
+            self.reflexes += 1
+            self._pending = pending or self._not_voice(n)
+            return REFLEX_LABEL
+
+        np.signbit(samples, out=self._sign[:n])
+        np.not_equal(self._sign[1:n], self._sign[:n - 1], out=self._flips[:n - 1])
+        zcr = np.count_nonzero(self._flips[:n - 1]) / n
+        if self.rms >= self.vad_rms and zcr <= self.max_zcr:
+            if self._speech_start is None:
+                self._speech_start = self.ring.written - n
+            self._quiet_run = 0
+            if self.ring.written - self._speech_start >= self.ring.capacity:
+                return self._close_segment(self.ring.written) or pending  # as long as the ring holds
+            return pending
+        return self._not_voice(n) or pending
+
+    def _not_voice(self, n):
+        if self._speech_start is None:
+            return None
+        self._quiet_run += n
+        if self._quiet_run < self.hangover:
+            return None
+        return self._close_segment(self.ring.written - self._quiet_run)
+
+    def _close_segment(self, end):
+        start, self._speech_start, self._quiet_run = self._speech_start, None, 0
+        if start is None or end - start < self.min_speech or self.throttled:
+            return None
+        samples = self.ring.read(start, end)
+        self.segments += 1
+        self.speech_seconds += len(samples) / self.sample_rate
+        if self.transcribe is None:
+            return f"{SPEECH_LABEL} {len(samples) / self.sample_rate:.1f}s"
+        if self._transcriber is None:
+            self._transcriber = threading.Thread(target=self._transcribe_segments, name="audio-transcribe",
+                                                 daemon=True)
+            self._transcriber.start()
+        try:
+            self._segments.put_nowait(samples)
+        except queue.Full:
+            self.segments_dropped += 1
+            tracing.warning("AudioSensor", "Transcriber behind, dropped a %.1fs segment",
+                            len(samples) / self.sample_rate, sample=100)
+        return None
+
+    # --- 4a. TRANSCRIPTION ---
+
+    def _transcribe_segments(self):
+        while True:
+            samples = self._segments.get()
+            try:
+                if samples is None:
+                    return
+                text = self.transcribe(samples, self.sample_rate)
+                if text:
+                    self._heard.append(text)
+            except Exception as e:
+                tracing.error("AudioSensor", "Transcription failed: %r", e, sample=100)
+            finally:
+                self._segments.task_done()
+
+    def _next_transcript(self):
+        return self._heard.popleft() if self._heard else None
+
+    def flush(self, timeout=None):
+        """Waits for queued segments to be transcribed; returns the transcripts not handed out yet."""
+        with self._segments.all_tasks_done:
+            self._segments.all_tasks_done.wait_for(lambda: not self._segments.unfinished_tasks, timeout)
+        heard = []
+        while self._heard:
+            heard.append(self._heard.popleft())
+        return heard
+
+    # --- 4b. BACKGROUND READING ---
+
+    def start(self, emit):
+        """Reads chunks on a thread until stop(), calling emit(label) for every label."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(emit,), name="audio-chunks", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self, emit):
+        period = self.chunk / self.sample_rate if self.realtime else 0.0
+        next_at = time.perf_counter()
+        while not self._stop.is_set() and not self.exhausted:
+            try:
+                label = self.step()
+            except Exception as e:
+                tracing.error("AudioSensor", "Chunk failed: %r", e, sample=100)
+                label = None
+            if label is not None:
+                emit(label)
+            if period:
+                next_at += period
+                self._stop.wait(max(0.0, next_at - time.perf_counter()))
+        if self.exhausted and not self._stop.is_set():
+            # The source ran out: hand over what is still being transcribed
+            for text in self.flush():
+                emit(text)
+
+    def close(self):
+        self.stop()
+        if self._transcriber is not None:
+            try:
+                self._segments.put_nowait(None)
+            except queue.Full:
+                pass  # a stuck transcriber is a daemon thread; it won't keep the process alive
+        self.source.close()
+
+    # --- 4c. METRICS ---
+
+    @property
+    def stats(self):
+        """Chunk counts, speech found and per-chunk processing latency (ms)."""
+        n = min(self.chunks, len(self._process_time))
+        chunk_ms = 1000.0 * self.chunk / self.sample_rate
+        stats = {"chunks": self.chunks, "silent": self.silent, "reflexes": self.reflexes,
+                 "segments": self.segments, "segments_dropped": self.segments_dropped,
+                 "transcribing": self._segments.qsize(), "speech_seconds": self.speech_seconds,
+                 "audio_seconds": self.ring.written / self.sample_rate, "chunk_ms": chunk_ms}
+        if n:
+            process = self._process_time[:n] * 1000
+            p50, p99 = np.percentile(process, [50, 99])
+            # Seconds of audio handled per second of processing
+            stats.update(process_p50_ms=float(p50), process_p99_ms=float(p99),
+                         process_max_ms=float(process.max()),
+                         realtime_factor=float(n * chunk_ms / process.sum()) if process.sum() else 0.0)
+        return stats
@@ -0,0 +1,223 @@
+# salience_queue.py
+# The scheduling stage behind the AttentionGate (reticular activating system).
+#
+# Stimuli wait here for the "expensive" forebrain, most salient first. The
+# queue is bounded and protects the forebrain in three ways:
+#
+#   dedup/coalesce - a stimulus repeated inside `dedup_window` seconds is folded
+#                    into the queued one (or dropped if it was just delivered)
+#   load shedding  - past the high watermark, low-salience input is refused and
+#                    already-queued low-salience input is purged
+#   backpressure   - listeners are told when the queue crosses the high
+#                    watermark (throttle) and when it drains below the low one
+#
+# When the queue is full a new stimulus evicts the least salient queued one,
+# or is dropped if it isn't more salient than that.
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class _Entry:
+    __slots__ = ("stimulus", "salience", "key", "count", "seq", "alive")
+
+    def __init__(self, stimulus, salience, key, seq):
+        self.stimulus = stimulus
+        self.salience = salience
+        self.key = key
+        self.count = 1
+        self.seq = seq
+        self.alive = True
+
+
+class SalienceQueue:
+    """Bounded max-priority queue of stimuli keyed by salience (0.0 - 1.0).
+
+    capacity:       most stimuli that can wait at once
+    dedup_window:   seconds within which a repeated stimulus is coalesced
+    high_watermark: fill ratio at which shedding and backpressure start
+    low_watermark:  fill ratio at which backpressure is released
+    shed_salience:  under pressure, stimuli below this salience are shed
+    """
+    def __init__(self, capacity=256, dedup_window=2.0, high_watermark=0.75, low_watermark=0.25,
+                 shed_salience=0.5, clock=time.monotonic):
+        self.capacity = capacity
+        self.dedup_window = dedup_window
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.shed_salience = shed_salience
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._max_heap = []  # (-salience, seq, entry): next to deliver
+        self._min_heap = []  # (salience, -seq, entry): next to evict
+        self._queued = {}    # dedup key -> live entry
+        self._recent = {}    # dedup key -> time last delivered
+        self._seq = itertools.count()
+        self._listeners = []
+        self.depth = 0
+        self.throttled = False
+
+        self.enqueued = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = {"duplicate": 0, "full": 0, "shed": 0, "evicted": 0}
+
+    # --- 1. PRODUCER SIDE ---
+
+    def push(self, stimulus, salience, key=None):
+        """Offers a stimulus; returns True if it is (now) queued."""
+        key = _dedup_key(stimulus) if key is None else key
+        with self._lock:
+            now = self._clock()
+            if key is not None:
+                entry = self._queued.get(key)
+                if entry is not None:
+                    # Coalesce: the queued copy inherits the higher salience
+                    entry.count += 1
+                    self.coalesced += 1
+                    if salience > entry.salience:
+                        self._requeue(entry, salience)
+                    return True
+                delivered_at = self._recent.get(key)
+                if delivered_at is not None and now - delivered_at < self.dedup_window:
+                    self.dropped["duplicate"] += 1
+                    return False
+
+            if self._under_pressure() and salience < self.shed_salience:
+                self.dropped["shed"] += 1
+                return False
+            if self.depth >= self.capacity:
+                lowest = self._peek_lowest()
+                if lowest is None or lowest.salience >= salience:
+                    self.dropped["full"] += 1
+                    return False
+                self._remove(lowest)
+                self.dropped["evicted"] += 1
+
+            self._insert(_Entry(stimulus, salience, key, next(self._seq)))
+            self.enqueued += 1
+            if self._under_pressure():
+                self._shed()
+            notify = self._update_pressure()
+        self._notify(notify)
+        return True
+
+    def add_listener(self, callback):
+        """callback(throttled: bool) is called when backpressure turns on or off."""
+        self._listeners.append(callback)
+
+    # --- 2. CONSUMER SIDE ---
+
+    def pop(self):
+        """Returns the most salient stimulus, or None if the queue is empty."""
+        with self._lock:
+            while self._max_heap:
+                _, _, entry = heapq.heappop(self._max_heap)
+                if entry.alive:
+                    self._remove(entry)
+                    if entry.key is not None:
+                        self._recent[entry.key] = self._clock()
+                        self._expire_recent()
+                    self.delivered += 1
+                    notify = self._update_pressure()
+                    break
+            else:
+                return None
+        self._notify(notify)
+        return entry.stimulus
+
+    def __len__(self):
+        return self.depth
+
+    @property
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "capacity": self.capacity,
+            "throttled": self.throttled,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "dropped": dict(self.dropped),
+        }
+
+    # --- 3. HEAP BOOKKEEPING (callers hold the lock) ---
+
+    def _insert(self, entry):
+        if len(self._min_heap) > 2 * self.depth + 64:
+            self._compact_heaps()
+        heapq.heappush(self._max_heap, (-entry.salience, entry.seq, entry))
+        heapq.heappush(self._min_heap, (entry.salience, -entry.seq, entry))
+        if entry.key is not None:
+            self._queued[entry.key] = entry
+        self.depth += 1
+
+    def _compact_heaps(self):
+        """Drops dead slots so the heaps stay O(depth)."""
+        self._max_heap = [slot for slot in self._max_heap if slot[2].alive]
+        self._min_heap = [slot for slot in self._min_heap if slot[2].alive]
+        heapq.heapify(self._max_heap)
+        heapq.heapify(self._min_heap)
+
+    def _remove(self, entry):
+        # Heap slots are discarded lazily once they surface
+        entry.alive = False
+        if entry.key is not None:
+            self._queued.pop(entry.key, None)
+        self.depth -= 1
+
+    def _requeue(self, entry, salience):
+        self._remove(entry)
+        replacement = _Entry(entry.stimulus, salience, entry.key, entry.seq)
+        replacement.count = entry.count
+        self._insert(replacement)
+
+    def _peek_lowest(self):
+        while self._min_heap and not self._min_heap[0][2].alive:
+            heapq.heappop(self._min_heap)
+        return self._min_heap[0][2] if self._min_heap else None
+
+    def _shed(self):
+        """Purges queued stimuli below shed_salience while under pressure."""
+        while self._under_pressure():
+            lowest = self._peek_lowest()
+            if lowest is None or lowest.salience >= self.shed_salience:
+                break
+            self._remove(lowest)
+            self.dropped["shed"] += 1
+
+    def _expire_recent(self):
+        if len(self._recent) > 4 * self.capacity:
+            cutoff = self._clock() - self.dedup_window
+            self._recent = {k: t for k, t in self._recent.items() if t >= cutoff}
+
+    def _under_pressure(self):
+        return self.depth >= self.high_watermark * self.capacity
+
+    def _update_pressure(self):
+        """Returns the new throttle state if it changed, else None."""
+        if not self.throttled and self._under_pressure():
+            self.throttled = True
+            return True
+        if self.throttled and self.depth <= self.low_watermark * self.capacity:
+            self.throttled = False
+            return False
+        return None
+
+    def _notify(self, throttled):
+        if throttled is None:
+            return
+        for callback in self._listeners:
+            callback(throttled)
+
+
+def _dedup_key(stimulus):
+    """Text-like stimuli dedup on their normalised text; anything else isn't deduped."""
+    if isinstance(stimulus, str):
+        return " ".join(stimulus.lower().split())
+    if isinstance(stimulus, (bytes, int, tuple)):
+        return stimulus
+    return None
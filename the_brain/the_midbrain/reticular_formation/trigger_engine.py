@@ -0,0 +1,214 @@
+# trigger_engine.py
+# Compiled trigger table for the reflex and attention fast path.
+#
+# Every wake word, log signature and reflex trigger is one rule. Substring
+# rules are compiled into a single Aho-Corasick automaton, so one pass over a
+# transcript finds every rule that occurs in it and the cost of a scan depends
+# on the text length, not on how many rules there are. Exact rules (the whole
+# input must equal the pattern, like "loud_bang") are a dict lookup.
+#
+# Rules live in a JSON file and are reloaded when the file changes:
+#
+#   [{"pattern": "loud_bang", "source": "audio", "exact": true, "reflex": "STARTLE"},
+#    {"pattern": "gemini", "source": "audio", "priority": 0.9, "word": true}]
+#
+#   pattern  - text to look for (matched case-insensitively, by casefold)
+#   source   - "audio", "vision" or "any" (default)
+#   exact    - whole input must equal the pattern (default false)
+#   word     - match only on word boundaries (default false)
+#   reflex   - reflex action to fire, or
+#   priority - salience (0.0 - 1.0) to queue the input with
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import tracing
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "triggers.json")
+
+
+@dataclass(frozen=True)
+class TriggerRule:
+    pattern: str
+    source: str = "any"
+    exact: bool = False
+    word: bool = False
+    reflex: Optional[str] = None
+    priority: float = 0.5
+
+
+@dataclass(frozen=True)
+class TriggerMatch:
+    rule: TriggerRule
+    start: int
+    end: int
+
+
+class _Automaton:
+    """Aho-Corasick automaton over case-folded patterns."""
+    def __init__(self, rules):
+        self.rules = rules
+        self.lengths = [len(rule.pattern.casefold()) for rule in rules]
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        self.exact = {}
+
+        for i, rule in enumerate(rules):
+            text = rule.pattern.casefold()
+            if rule.exact:
+                self.exact.setdefault(text, []).append(i)
+                continue
+            node = 0
+            for ch in text:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                    self.goto[node][ch] = nxt
+                node = nxt
+            self.out[node] += (i,)
+
+        # Breadth-first pass to fill in failure links and merged outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                self.out[child] += self.out[self.fail[child]]
+
+    def scan(self, text):
+        """Yields (rule index, end offset) for every occurrence, in one pass."""
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for end, ch in enumerate(text, 1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for i in out[node]:
+                yield i, end
+
+
+class TriggerTable:
+    """Multi-pattern matcher mapping text inputs to reflexes or priorities.
+
+    path:           JSON rules file (hot-reloaded when it changes)
+    check_interval: seconds between checks of the file's modification time
+    """
+    def __init__(self, path: Optional[str] = DEFAULT_RULES, rules=None, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._mtime = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        self._automaton = _Automaton([])
+        if rules is not None:
+            self.set_rules(rules)
+        elif path is not None:
+            self.reload()
+
+    def __len__(self):
+        return len(self._automaton.rules)
+
+    # --- 1. RULES ---
+
+    def set_rules(self, rules):
+        """Compiles a new rule list (TriggerRule or dicts) and swaps it in atomically."""
+        rules = [rule if isinstance(rule, TriggerRule) else TriggerRule(**rule) for rule in rules]
+        self._automaton = _Automaton(rules)
+
+    def reload(self):
+        """(Re)loads the rules file; a broken file keeps the current rules."""
+        with self._reload_lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                with open(self.path) as f:
+                    rules = json.load(f)
+                self.set_rules(rules)
+                self._mtime = mtime
+            except (OSError, ValueError, TypeError) as e:
+                tracing.warning("Triggers", "Keeping current rules, could not load %s: %s", self.path, e)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if self.path is None or now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    # --- 2. MATCHING ---
+
+    def scan(self, text: str, source: str = "any") -> list:
+        """Every rule that matches text from the given source, in text order."""
+        self._maybe_reload()
+        automaton = self._automaton  # one consistent rule set per scan
+        folded, origin = _fold(text)
+        matches = []
+        for i in automaton.exact.get(folded, ()):
+            if _accepts(automaton.rules[i], source):
+                matches.append(TriggerMatch(automaton.rules[i], 0, len(text)))
+        for i, end in automaton.scan(folded):
+            rule = automaton.rules[i]
+            if not _accepts(rule, source):
+                continue
+            # Offsets into the original text (casefolding can lengthen it, e.g. "ß" -> "ss")
+            start, end = end - automaton.lengths[i], end
+            if origin is not None:
+                start, end = origin[start], origin[end - 1] + 1
+            if rule.word and not _on_word_boundaries(text, start, end):
+                continue
+            matches.append(TriggerMatch(rule, start, end))
+        return matches
+
+    def classify(self, text: str, source: str = "any"):
+        """Returns (reflex_action, priority) for text.
+
+        reflex_action is the first matching reflex (or None); priority is the
+        highest matching priority, or None if nothing matched.
+        """
+        reflex_action = None
+        priority = None
+        for match in self.scan(text, source):
+            if match.rule.reflex:
+                if reflex_action is None:
+                    reflex_action = match.rule.reflex
+            elif priority is None or match.rule.priority > priority:
+                priority = match.rule.priority
+        return reflex_action, priority
+
+
+def _fold(text):
+    """(casefolded text, folded offset -> original offset), the map None when lengths agree."""
+    folded = text.casefold()
+    if len(folded) == len(text):
+        return folded, None  # casefolding never shortens a character, so offsets are unchanged
+    origin = []
+    for i, ch in enumerate(text):
+        origin.extend([i] * len(ch.casefold()))
+    return folded, origin
+
+
+def _accepts(rule, source):
+    return rule.source == "any" or source == "any" or rule.source == source
+
+
+def _on_word_boundaries(text, start, end):
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_")
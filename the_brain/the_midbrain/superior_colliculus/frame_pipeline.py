@@ -0,0 +1,318 @@
+# frame_pipeline.py
+# Camera/video frames -> motion events for the VisionSensor (the superior colliculus).
+#
+# Frames are decoded straight into a small pool of preallocated NumPy buffers
+# (no allocation per frame), and each one is compared with the previous frame
+# at reduced resolution: a grayscale view of every `downsample`-th pixel is
+# differenced in place and summed over a coarse grid of cells. The busiest
+# cell's mean change (0 - 1) is the frame's motion score:
+#
+#   score >= reflex_threshold -> "fast_moving_object" (the FLINCH trigger), on this frame
+#   score >= still_threshold  -> "movement <where>", a stimulus for the forebrain
+#   otherwise                 -> nothing: unchanged frames never leave the pipeline
+#
+# Using the busiest cell rather than the whole frame means a small object
+# moving fast still scores high, while sensor noise (per-pixel changes below
+# `pixel_noise` grey levels) is ignored.
+#
+# Grey levels are 8-bit: uint8 frames are used as they are, other unsigned
+# integer frames (e.g. 16-bit depth or raw sensors) are scaled down from their
+# full range and float frames are taken to be 0 - 1. Signed integer frames are
+# rejected, since there is no telling where their black is.
+#
+# A source only has to fill a buffer in place: read_into(buffer) -> bool.
+# ArraySource replays synthetic arrays (tests, benchmarks); VideoSource wraps
+# an OpenCV camera or video file (optional dependency). Every frame read can
+# be handed to `publish`; its buffer is reused `pool_size` frames later, so
+# `publish` must copy a frame it passes on to anything that may keep it longer
+# (the Brain copies frames before putting them on the Pons).
+
+import threading
+import time
+
+import numpy as np
+
+import tracing
+
+REFLEX_LABEL = "fast_moving_object"
+_ROWS = ("top", "middle", "bottom")
+_COLUMNS = ("left", "center", "right")
+
+
+# --- 1. SOURCES ---
+
+class ArraySource:
+    """Replays frames from arrays (or any sequence of same-shaped arrays).
+
+    loop: start over at the end instead of running out
+    """
+    def __init__(self, frames, loop=False):
+        self.frames = frames
+        self.loop = loop
+        self.shape = tuple(frames[0].shape)
+        self.dtype = frames[0].dtype
+        self._next = 0
+
+    def read_into(self, buffer):
+        if self._next >= len(self.frames):
+            if not self.loop:
+                return False
+            self._next = 0
+        np.copyto(buffer, self.frames[self._next])  # stands in for decoding
+        self._next += 1
+        return True
+
+    def close(self):
+        pass
+
+
+class VideoSource:
+    """OpenCV camera (index, e.g. 0 or "0") or video file/stream URL."""
+    def __init__(self, device=0):
+        try:
+            import cv2
+        except ImportError as e:
+            raise ImportError("VideoSource needs `pip install opencv-python`") from e
+        if isinstance(device, str) and device.isdigit():
+            device = int(device)
+        self.capture = cv2.VideoCapture(device)
+        if not self.capture.isOpened():
+            raise OSError(f"Cannot open video source {device!r}")
+        ok, first = self.capture.read()
+        if not ok:
+            raise OSError(f"No frames from video source {device!r}")
+        self.shape = first.shape
+        self.dtype = first.dtype
+        self._first = first
+
+    def read_into(self, buffer):
+        if self._first is not None:
+            np.copyto(buffer, self._first)
+            self._first = None
+            return True
+        ok, frame = self.capture.read(buffer)  # decodes into buffer when shape and type match
+        if ok and frame is not buffer:
+            np.copyto(buffer, frame)
+        return ok
+
+    def close(self):
+        self.capture.release()
+
+
+# --- 2. MOTION DETECTION ---
+
+class MotionDetector:
+    """Frame differencing at reduced resolution, all in preallocated buffers.
+
+    shape:       frame shape, (height, width) or (height, width, channels)
+    dtype:       frame element type (see module notes)
+    downsample:  use every n-th pixel in each direction
+    grid:        (rows, columns) of cells the change is summed over
+    pixel_noise: per-pixel changes below this many grey levels are ignored
+    """
+    def __init__(self, shape, dtype=np.uint8, downsample=4, grid=(6, 8), pixel_noise=8):
+        height, width = shape[0] // downsample, shape[1] // downsample
+        rows, columns = grid
+        cell_h, cell_w = height // rows, width // columns
+        if not cell_h or not cell_w:
+            raise ValueError(f"Frame {shape[:2]} is too small for a {grid} grid at downsample {downsample}")
+        self.downsample = downsample
+        self.grid = grid
+        self.pixel_noise = pixel_noise
+        self.channels = shape[2] if len(shape) == 3 else 1
+        # Only the part of the frame that divides evenly into cells is looked at
+        self._rows = slice(0, rows * cell_h * downsample, downsample)
+        self._columns = slice(0, columns * cell_w * downsample, downsample)
+        self._cell_shape = (rows, cell_h, columns, cell_w)
+        self._scale = 1.0 / (255.0 * self.channels * cell_h * cell_w)
+
+        small = (rows * cell_h, columns * cell_w)
+        self._gain = _grey_gain(np.dtype(dtype))
+        if self._gain is not None:
+            # Frames that aren't 8-bit are scaled to grey levels in this buffer first
+            self._grey = np.zeros(small + ((self.channels,) if self.channels > 1 else ()), dtype=np.float32)
+            self._grey_sum = np.zeros(small, dtype=np.float32)
+        self._current = np.zeros(small, dtype=np.int16)
+        self._previous = np.zeros(small, dtype=np.int16)
+        self._diff = np.zeros(small, dtype=np.int16)
+        self._quiet = np.zeros(small, dtype=bool)
+        self.cells = np.zeros(grid, dtype=np.int64)
+        self._primed = False
+
+    def update(self, frame):
+        """Compares a frame with the previous one; returns (score 0 - 1, (row, column) of the busiest cell)."""
+        view = frame[self._rows, self._columns]
+        if self._gain is not None:
+            np.multiply(view, self._gain, out=self._grey, casting="unsafe")
+            np.clip(self._grey, 0.0, 255.0, out=self._grey)
+            if self.channels > 1:
+                np.sum(self._grey, axis=2, out=self._grey_sum)
+                np.copyto(self._current, self._grey_sum, casting="unsafe")
+            else:
+                np.copyto(self._current, self._grey, casting="unsafe")
+        elif self.channels > 1:
+            np.sum(view, axis=2, dtype=np.int16, out=self._current)
+        else:
+            self._current[...] = view
+        if not self._primed:
+            self._primed = True
+            self._current, self._previous = self._previous, self._current
+            return 0.0, (0, 0)
+
+        np.subtract(self._current, self._previous, out=self._diff)
+        np.abs(self._diff, out=self._diff)
+        np.less(self._diff, self.pixel_noise * self.channels, out=self._quiet)
+        np.copyto(self._diff, 0, where=self._quiet)
+        np.sum(self._diff.reshape(self._cell_shape), axis=(1, 3), out=self.cells)
+        self._current, self._previous = self._previous, self._current
+
+        busiest = int(np.argmax(self.cells))
+        row, column = divmod(busiest, self.grid[1])
+        return float(self.cells[row, column]) * self._scale, (row, column)
+
+    def reset(self):
+        self._primed = False
+
+    def where(self, cell):
+        """A cell as a coarse place in the frame: "top-left", ..., "center"."""
+        row = _ROWS[cell[0] * 3 // self.grid[0]]
+        column = _COLUMNS[cell[1] * 3 // self.grid[1]]
+        if row == "middle":
+            return column
+        return row if column == "center" else f"{row}-{column}"
+
+
+def _grey_gain(dtype):
+    """Multiplier taking frame values to 0 - 255 grey levels (None: uint8, used as is)."""
+    if dtype == np.uint8:
+        return None
+    if dtype.kind == "u":
+        return 255.0 / np.iinfo(dtype).max
+    if dtype.kind == "f":
+        return 255.0
+    raise ValueError(f"Unsupported frame dtype {dtype}: use unsigned integers or floats in 0 - 1")
+
+
+# --- 3. PIPELINE ---
+
+class FramePipeline:
+    """Reads frames into a buffer pool and turns motion into reflexes and stimuli.
+
+    source:           has shape, dtype and read_into(buffer) -> bool
+    pool_size:        preallocated frame buffers, reused round-robin
+    still_threshold:  motion score below which a frame counts as unchanged
+    reflex_threshold: motion score that raises the flinch reflex
+    fps:              pace reading to this rate (None = as fast as the source delivers)
+    publish:          publish(frame) for every frame read
+    history:          frames of latency kept for stats
+
+    downsample, grid and pixel_noise go to the MotionDetector.
+    """
+    def __init__(self, source, pool_size=4, still_threshold=0.02, reflex_threshold=0.25, fps=None,
+                 publish=None, history=4096, **detector_options):
+        self.source = source
+        self.still_threshold = still_threshold
+        self.reflex_threshold = reflex_threshold
+        self.fps = fps
+        self.publish = publish
+        self.detector = MotionDetector(source.shape, source.dtype, **detector_options)
+        self.buffers = np.empty((pool_size,) + tuple(source.shape), dtype=source.dtype)
+        self.throttled = False  # under backpressure movement stimuli are held back; reflexes are not
+        self.exhausted = False
+        self.score = 0.0
+
+        self.frames = 0
+        self.unchanged = 0
+        self.stimuli = 0
+        self.reflexes = 0
+        self._read_time = np.zeros(history)
+        self._process_time = np.zeros(history)
+        self._read_at = np.zeros(history)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def step(self):
+        """Reads and processes one frame; returns its label or None (see module notes)."""
+        clock = time.perf_counter
+        began = clock()
+        frame = self.buffers[self.frames % len(self.buffers)]
+        if not self.source.read_into(frame):
+            self.exhausted = True
+            return None
+        read = clock()
+        label = self.process(frame)
+        slot = self.frames % len(self._read_time)
+        self._read_at[slot] = began
+        self._read_time[slot] = read - began
+        self._process_time[slot] = clock() - read
+        self.frames += 1
+        if self.publish is not None:
+            self.publish(frame)
+        return label
+
+    def process(self, frame):
+        """Scores one frame against the previous one; returns its label or None."""
+        self.score, cell = self.detector.update(frame)
+        if self.score >= self.reflex_threshold:
+            self.reflexes += 1
+            return REFLEX_LABEL
+        if self.score < self.still_threshold:
+            self.unchanged += 1
+            return None
+        if self.throttled:
+            return None
+        self.stimuli += 1
+        return f"movement {self.detector.where(cell)}"
+
+    # --- 3a. BACKGROUND READING ---
+
+    def start(self, emit):
+        """Reads frames on a thread until stop(), calling emit(label) for every label."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(emit,), name="vision-frames", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self, emit):
+        period = 1.0 / self.fps if self.fps else 0.0
+        next_at = time.perf_counter()
+        while not self._stop.is_set() and not self.exhausted:
+            try:
+                label = self.step()
+            except Exception as e:
+                tracing.error("VisionSensor", "Frame failed: %r", e, sample=100)
+                label = None
+            if label is not None:
+                emit(label)
+            if period:
+                next_at += period
+                self._stop.wait(max(0.0, next_at - time.perf_counter()))
+
+    def close(self):
+        self.stop()
+        self.source.close()
+
+    # --- 3b. METRICS ---
+
+    @property
+    def stats(self):
+        """Frame counts, frames/sec and per-frame read/processing latency (ms)."""
+        n = min(self.frames, len(self._read_time))
+        stats = {"frames": self.frames, "unchanged": self.unchanged, "stimuli": self.stimuli,
+                 "reflexes": self.reflexes}
+        if n > 1:
+            read_at = self._read_at[:n]
+            span = read_at.max() - read_at.min()
+            process = self._process_time[:n] * 1000
+            p50, p99 = np.percentile(process, [50, 99])
+            stats.update(fps=float((n - 1) / span) if span > 0 else 0.0,
+                         read_mean_ms=float(self._read_time[:n].mean() * 1000),
+                         process_p50_ms=float(p50), process_p99_ms=float(p99),
+                         process_max_ms=float(process.max()))
+        return stats
@@ -0,0 +1,190 @@
+# tracing.py
+# Buffered, levelled trace output for the brain.
+#
+# Components used to print() on every call, so at high tick rates synchronous
+# stdout writes were a real share of each tick and a source of jitter. Trace
+# records instead go into an in-memory buffer (one deque append: no I/O and no
+# formatting on the caller's thread), and a background writer formats them and
+# writes them out in batches.
+#
+#   tracing.info("Memory", "Storing: %.20s...", thought)
+#   tracing.debug("AudioSensor", "Listening...", sample=100)  # 1 call in 100
+#
+# Messages are %-formatted lazily on the writer thread, so pass values rather
+# than pre-built strings. Records below the current level cost one comparison.
+# If the buffer fills up, the oldest records are dropped and counted; the
+# caller never blocks. Warnings and errors wake the writer straight away.
+#
+# Forked processes (e.g. forebrain workers) get a fresh buffer and writer.
+#
+# The level comes from BRAIN_TRACE (debug, info, warning, error; default info)
+# or configure().
+
+import atexit
+import collections
+import itertools
+import os
+import sys
+import threading
+import time
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+
+class Tracer:
+    """Levelled trace sink with a non-blocking buffer and a background writer.
+
+    level:          records below this are discarded at the call site
+    stream:         where to write (default: whatever sys.stdout is at write time)
+    capacity:       records buffered before the oldest are dropped
+    flush_interval: seconds between writer passes
+    timestamps:     prefix each line with the wall-clock time of the call
+    """
+    def __init__(self, level=INFO, stream=None, capacity=8192, flush_interval=0.1, timestamps=False):
+        self.level = level
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.timestamps = timestamps
+        self.dropped = 0
+        self.written = 0
+        self._buffer = collections.deque(maxlen=capacity)
+        self._samples = collections.defaultdict(itertools.count)
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._writer = None
+
+    # --- 1. RECORDING ---
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def log(self, level, tag, message, *args, sample=1):
+        """Buffers one record; with sample=N only every Nth call for this message is kept."""
+        if level < self.level:
+            return
+        if sample > 1 and next(self._samples[(tag, message)]) % sample:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append((time.time(), level, tag, message, args, sample))
+        if self._writer is None:
+            self._start()
+        if level >= WARNING:
+            self._wake.set()
+
+    # --- 2. WRITING ---
+
+    def _start(self):
+        with self._start_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._writer.start()
+
+    def _after_fork(self):
+        # A forked child has no writer thread, and locks may have been held by
+        # threads that didn't survive the fork; what's buffered is the parent's
+        self._buffer.clear()
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._writer = None
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Formats and writes everything buffered so far (also called at exit)."""
+        with self._write_lock:
+            lines = []
+            while True:
+                try:
+                    lines.append(self._format(*self._buffer.popleft()))
+                except IndexError:
+                    break
+            if not lines:
+                return
+            stream = self.stream or sys.stdout
+            try:
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+            except (OSError, ValueError):
+                return  # stream closed (e.g. at interpreter exit)
+            self.written += len(lines)
+
+    def _format(self, when, level, tag, message, args, sample):
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                message = f"{message} {args!r}"
+        label = f"{LEVEL_NAMES[level].upper()}: " if level >= WARNING else ""
+        line = f"[{tag}] {label}{message}"
+        if sample > 1:
+            line += f" (1 in {sample})"
+        if self.timestamps:
+            line = time.strftime("%H:%M:%S", time.localtime(when)) + f".{int(when % 1 * 1000):03d} " + line
+        return line
+
+
+def _level(value):
+    return LEVELS[value.lower()] if isinstance(value, str) else value
+
+
+# --- 3. SHARED TRACER ---
+
+_tracer = Tracer(level=_level(os.getenv("BRAIN_TRACE", "info")))
+atexit.register(_tracer.flush)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: _tracer._after_fork())
+
+
+def get_tracer():
+    return _tracer
+
+
+def configure(level=None, stream=None, flush_interval=None, timestamps=None):
+    """Adjusts the shared tracer; level may be a name ("debug") or a number."""
+    if level is not None:
+        _tracer.level = _level(level)
+    if stream is not None:
+        _tracer.stream = stream
+    if flush_interval is not None:
+        _tracer.flush_interval = flush_interval
+    if timestamps is not None:
+        _tracer.timestamps = timestamps
+    return _tracer
+
+
+def enabled(level):
+    """Guard for callers whose arguments are expensive to compute."""
+    return level >= _tracer.level
+
+
+def debug(tag, message, *args, sample=1):
+    if DEBUG >= _tracer.level:
+        _tracer.log(DEBUG, tag, message, *args, sample=sample)
+
+
+def info(tag, message, *args, sample=1):
+    if INFO >= _tracer.level:
+        _tracer.log(INFO, tag, message, *args, sample=sample)
+
+
+def warning(tag, message, *args, sample=1):
+    if WARNING >= _tracer.level:
+        _tracer.log(WARNING, tag, message, *args, sample=sample)
+
+
+def error(tag, message, *args, sample=1):
+    if ERROR >= _tracer.level:
+        _tracer.log(ERROR, tag, message, *args, sample=sample)
+
+
+def flush():
+    _tracer.flush()